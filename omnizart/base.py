@@ -8,18 +8,35 @@ import glob
 import random
 from os.path import join as jpath
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
 import h5py
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras.models import model_from_yaml
 
 from omnizart import MODULE_PATH
+from omnizart.cache import PredictionCache, resolve_cache_dir
+from omnizart.midi import write_midi
 from omnizart.utils import get_logger, ensure_path_exists, get_filename
 from omnizart.constants.midi import LOWEST_MIDI_NOTE, HIGHEST_MIDI_NOTE
 
 
 logger = get_logger("Base Class")
 
+# Shared threads for loading the models in background, see ``BaseTranscription._load_model_in_background``.
+_MODEL_LOADER = ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-loader")
+
+
+def _load_keras_model(model_path, custom_objects=None):
+    try:
+        return tf.keras.models.load_model(model_path, custom_objects=custom_objects)
+    except (OSError):
+        raise FileNotFoundError(
+            f"Checkpoint file not found: {model_path}/variables/variables.data*. Perhaps not yet downloaded?\n"
+            "Try execute 'omnizart download-checkpoints'"
+        )
+
 
 class BaseTranscription(metaclass=ABCMeta):
     """Base class of transcription applications."""
@@ -32,6 +49,15 @@ class BaseTranscription(metaclass=ABCMeta):
     def transcribe(self, input_audio, model_path, output="./"):
         raise NotImplementedError
 
+    def reinfer(self, input_audio, model_path=None, output="./", cache_dir=None, **inference_settings):
+        """Re-run only the inference stage on the cached predictions.
+
+        The raw predictions should be cached by calling ``transcribe`` with the cache
+        enabled beforehand. Values of ``inference_settings`` override the corresponding
+        attributes of ``model_settings.inference``.
+        """
+        raise NotImplementedError(f"Re-inference is not supported by {type(self).__name__}")
+
     def get_model(self, settings):
         """Get the model from the python source file.
 
@@ -51,6 +77,29 @@ class BaseTranscription(metaclass=ABCMeta):
         raise NotImplementedError
 
     def _load_model(self, model_path=None, custom_objects=None):
+        model_path, settings = self._load_checkpoint_settings(model_path)
+        return _load_keras_model(model_path, custom_objects=custom_objects), settings
+
+    def _load_model_in_background(self, model_path=None, custom_objects=None):
+        """Starts loading the model on a background thread.
+
+        The checkpoint settings are loaded right away, thus the audio decoding and the
+        feature extraction depending on the settings can run while the model is being
+        deserialized. Call ``model_future.result()`` right before the prediction to join.
+
+        Returns
+        -------
+        model_future: concurrent.futures.Future
+            Resolves to the loaded model. Errors of loading are raised by ``result()``.
+        settings:
+            The settings of the checkpoint, same as returned by ``_load_model``.
+        """
+        model_path, settings = self._load_checkpoint_settings(model_path)
+        model_future = _MODEL_LOADER.submit(_load_keras_model, model_path, custom_objects=custom_objects)
+        return model_future, settings
+
+    def _load_checkpoint_settings(self, model_path=None):
+        """Resolves the checkpoint path and loads its settings without loading the model."""
         if model_path in self.settings.checkpoint_path:
             # The given model_path is actually the 'transcription_mode'.
             default_path = self.settings.checkpoint_path[model_path]
@@ -59,16 +108,35 @@ class BaseTranscription(metaclass=ABCMeta):
 
         model_path, conf_path = self._resolve_model_path(model_path)
         settings = self.setting_class(conf_path=conf_path)
-
-        try:
-            model = tf.keras.models.load_model(model_path, custom_objects=custom_objects)
-        except (OSError):
-            raise FileNotFoundError(
-                f"Checkpoint file not found: {model_path}/variables/variables.data*. Perhaps not yet downloaded?\n"
-                "Try execute 'omnizart download-checkpoints'"
-            )
-
-        return model, settings
+        return model_path, settings
+
+    def _cache_prediction(self, cache_dir, input_audio, model_path, settings, pred, **extras):
+        """Stores the raw prediction if the cache is enabled. Does nothing otherwise."""
+        cache_dir = resolve_cache_dir(cache_dir)
+        if cache_dir is None:
+            return
+
+        model_path, _ = self._load_checkpoint_settings(model_path)
+        cache = PredictionCache(cache_dir)
+        cache.save(cache.key(input_audio, model_path, settings.feature), pred, **extras)
+
+    def _load_cached_prediction(self, cache_dir, input_audio, model_path=None, inference_settings=None):
+        """Loads the cached prediction and the checkpoint settings with overridden inference settings."""
+        cache_dir = resolve_cache_dir(cache_dir)
+        if cache_dir is None:
+            raise ValueError("Cache directory is not specified. Either give 'cache_dir' or set OMNIZART_CACHE_DIR.")
+        if not os.path.isfile(input_audio):
+            raise FileNotFoundError(f"The given audio path does not exist. Path: {input_audio}")
+
+        model_path, settings = self._load_checkpoint_settings(model_path)
+        for key, value in (inference_settings or {}).items():
+            if not hasattr(settings.inference, key):
+                raise AttributeError(f"Unknown inference setting '{key}' of {type(settings.inference).__name__}")
+            setattr(settings.inference, key, value)
+
+        cache = PredictionCache(cache_dir)
+        cached = cache.load(cache.key(input_audio, model_path, settings.feature))
+        return cached, settings
 
     def _resolve_model_path(self, model_path=None):
         model_path = os.path.abspath(model_path) if model_path is not None else None
@@ -112,7 +180,11 @@ class BaseTranscription(metaclass=ABCMeta):
         ensure_path_exists(test_feat_out_path)
         return train_feat_out_path, test_feat_out_path
 
-    def _output_midi(self, output, input_audio, midi=None, verbose=True):
+    def _output_midi(self, output, input_audio, midi=None, verbose=True, tracks=None):
+        """Writes out the MIDI, which is either a pretty_midi.PrettyMIDI object or a note array.
+
+        ``tracks`` describes the tracks of the note array. See ``omnizart.midi`` for details.
+        """
         if output is None:
             return None
 
@@ -120,7 +192,10 @@ class BaseTranscription(metaclass=ABCMeta):
             output = jpath(output, get_filename(input_audio))
         if midi is not None:
             out_path = output if output.endswith(".mid") else f"{output}.mid"
-            midi.write(out_path)
+            if isinstance(midi, np.ndarray):
+                write_midi(midi, out_path, tracks=tracks)
+            else:
+                midi.write(out_path)
             if verbose:
                 logger.info("MIDI file has been written to %s.", out_path)
         return output
@@ -7,6 +7,7 @@ import numpy as np
 import tensorflow as tf
 
 from omnizart.io import write_yaml
+from omnizart.midi import to_pretty_midi
 from omnizart.base import BaseTranscription, BaseDatasetLoader
 from omnizart.train import get_train_val_feat_file_list
 from omnizart.utils import get_logger, ensure_path_exists, parallel_generator
@@ -14,7 +15,7 @@ from omnizart.constants.datasets import MusicNetStructure
 from omnizart.setting_loaders import BeatSettings
 from omnizart.beat.features import extract_musicnet_feature, extract_musicnet_label, extract_feature_from_midi
 from omnizart.beat.prediction import predict
-from omnizart.beat.inference import inference
+from omnizart.beat.inference import inference, BEAT_TRACKS
 from omnizart.models.rnn import blstm, blstm_attn
 from omnizart.models.t2t import MultiHeadAttention
 
@@ -29,7 +30,7 @@ class BeatTranscription(BaseTranscription):
 
         self.custom_objects = {"MultiHeadAttention": MultiHeadAttention}
 
-    def transcribe(self, input_audio, model_path=None, output="./"):
+    def transcribe(self, input_audio, model_path=None, output="./", cache_dir=None):
         """Transcribe beat positions in the given MIDI.
 
         Tracks the beat in symbolic domain. Outputs three files if the output path is given:
@@ -45,6 +46,10 @@ class BeatTranscription(BaseTranscription):
             Path to the trained model or the supported transcription mode.
         output: Path (optional)
             Path for writing out the transcribed MIDI file. Default to the current path.
+        cache_dir: Path (optional)
+            Directory for caching the raw prediction, which can later be re-used by
+            ``reinfer``. Default to the environment variable ``OMNIZART_CACHE_DIR``,
+            and the prediction will not be cached if neither is given.
 
         Returns
         -------
@@ -59,29 +64,72 @@ class BeatTranscription(BaseTranscription):
         if not os.path.isfile(input_audio):
             raise FileNotFoundError(f"The given audio path does not exist. Path: {input_audio}")
 
-        logger.info("Loading model...")
-        model, model_settings = self._load_model(model_path, custom_objects=self.custom_objects)
+        logger.info("Loading model in background...")
+        model_future, model_settings = self._load_model_in_background(model_path, custom_objects=self.custom_objects)
 
         logger.info("Extracting feature...")
         feature = extract_feature_from_midi(input_audio, t_unit=model_settings.feature.time_unit)
 
         logger.info("Predicting...")
+        model = model_future.result()
         pred = predict(feature, model, timesteps=model_settings.model.timesteps, batch_size=16)
+        self._cache_prediction(cache_dir, input_audio, model_path, model_settings, pred)
 
+        notes = self._infer(pred, model_settings)
+        self._output(output, input_audio, notes)
+        return to_pretty_midi(notes, tracks=BEAT_TRACKS)
+
+    def reinfer(self, input_audio, model_path=None, output="./", cache_dir=None, **inference_settings):
+        """Infer beat positions from the cached prediction with different inference settings.
+
+        Feature extraction and model prediction are skipped. The raw prediction should
+        be cached by ``transcribe`` beforehand with the same model.
+
+        Parameters
+        ----------
+        input_audio: Path
+            Path to the MIDI file (.mid).
+        model_path: Path
+            Path to the trained model or the supported transcription mode.
+        output: Path (optional)
+            Path for writing out the transcribed MIDI file. Default to the current path.
+        cache_dir: Path (optional)
+            Directory of the cached predictions. Default to ``OMNIZART_CACHE_DIR``.
+        **inference_settings:
+            Overrides the attributes of ``BeatSettings.inference``, e.g. ``beat_threshold=0.6``.
+
+        Returns
+        -------
+        midi: pretty_midi.PrettyMIDI
+            The transcribed beat positions.
+
+        See Also
+        --------
+        omnizart.cli.beat.reinfer: CLI entry point of this function.
+        """
+        cached, model_settings = self._load_cached_prediction(
+            cache_dir, input_audio, model_path=model_path, inference_settings=inference_settings
+        )
+        notes = self._infer(cached["pred"], model_settings)
+        self._output(output, input_audio, notes)
+        return to_pretty_midi(notes, tracks=BEAT_TRACKS)
+
+    def _infer(self, pred, model_settings):  # pylint: disable=R0201
         logger.info("Inferring beats and down beats...")
-        midi = inference(
+        return inference(
             pred,
             beat_th=model_settings.inference.beat_threshold,
             down_beat_th=model_settings.inference.down_beat_threshold,
             min_dist=model_settings.inference.min_distance,
-            t_unit=model_settings.feature.time_unit
+            t_unit=model_settings.feature.time_unit,
+            as_array=True
         )
 
-        output = self._output_midi(output=output, input_audio=input_audio, midi=midi)
+    def _output(self, output, input_audio, notes):
+        output = self._output_midi(output=output, input_audio=input_audio, midi=notes, tracks=BEAT_TRACKS)
         if output is not None:
-            _write_csv(midi, output=output.replace(".mid", ""))
+            _write_csv(notes, output=output.replace(".mid", ""))
             logger.info("MIDI and CSV file have been written to %s", output)
-        return midi
 
     def generate_feature(self, dataset_path, beat_settings=None, num_threads=8):
         """Extract the feature from the given dataset.
@@ -360,15 +408,11 @@ def weighted_binary_crossentropy(target, pred, down_beat_weight=5):
     return tf.reduce_mean(-bce)
 
 
-def _write_csv(midi, output):
+def _write_csv(notes, output):
     """Write out the beat and down beat information to files."""
-    for inst in midi.instruments:
-        if inst.name == "Beat":
-            out_name = f"{output}_beat.csv"
-        else:
-            out_name = f"{output}_down_beat.csv"
-        with open(out_name, "w") as out:
-            onsets = [f"{nn.start:.6f}\n" for nn in inst.notes]
+    for track_idx, postfix in enumerate(["beat", "down_beat"]):
+        with open(f"{output}_{postfix}.csv", "w") as out:
+            onsets = [f"{onset:.6f}\n" for onset in notes["start"][notes["track"] == track_idx]]
             out.writelines(onsets)
 
 
@@ -5,8 +5,7 @@ import pretty_midi
 from scipy.interpolate import interp1d
 
 from omnizart.utils import get_logger
-from omnizart.base import Label
-from omnizart.constants.midi import LOWEST_MIDI_NOTE
+from omnizart.constants.midi import LOWEST_MIDI_NOTE, HIGHEST_MIDI_NOTE
 from omnizart.constants.datasets import MusicNetStructure
 
 
@@ -22,11 +21,12 @@ def extract_feature_from_midi(midi_path, t_unit=0.01):
         The main feature extraction function of beat module.
     """
     midi = pretty_midi.PrettyMIDI(midi_path)
-    labels = []
-    for inst in midi.instruments:
-        for note in inst.notes:
-            labels.append(Label(start_time=note.start, end_time=note.end, note=note.pitch))
-    return extract_feature(labels, t_unit=t_unit)
+    notes = np.array([
+        [note.start, note.end, note.pitch]
+        for inst in midi.instruments
+        for note in inst.notes
+    ]).reshape(-1, 3)
+    return extract_feature_from_notes(notes[:, 0], notes[:, 1], notes[:, 2], t_unit=t_unit)
 
 
 def extract_musicnet_feature(csv_path, t_unit=0.01):
@@ -37,8 +37,8 @@ def extract_musicnet_feature(csv_path, t_unit=0.01):
     omnizart.beat.features.extract_feature:
         The main feature extraction function of beat module.
     """
-    labels = MusicNetStructure.load_label(csv_path)
-    return extract_feature(labels, t_unit=t_unit)
+    columns = MusicNetStructure.load_label_columns(csv_path)
+    return extract_feature_from_notes(columns["start_time"], columns["end_time"], columns["note"], t_unit=t_unit)
 
 
 def extract_feature(labels, t_unit=0.01):
@@ -56,52 +56,116 @@ def extract_feature(labels, t_unit=0.01):
     feature: 2D numpy array
         A piano roll like representation. Please refer to the original paper
         for more details.
+
+    See Also
+    --------
+    omnizart.beat.features.extract_feature_from_notes:
+        The same feature extraction from arrays of the note attributes.
+    """
+    start_time = np.array([label.start_time for label in labels])
+    end_time = np.array([label.end_time for label in labels])
+    pitch = np.array([label.note for label in labels])
+    return extract_feature_from_notes(start_time, end_time, pitch, t_unit=t_unit)
+
+
+def extract_feature_from_notes(start_time, end_time, pitch, t_unit=0.01):
+    """Extract feature representation required by beat module from note arrays.
+
+    Parameters
+    ----------
+    start_time: 1D numpy array
+        Onset time of each note in seconds.
+    end_time: 1D numpy array
+        Offset time of each note in seconds.
+    pitch: 1D numpy array
+        MIDI number of each note. Notes out of the piano range are skipped.
+    t_unit: float
+        Time unit of each frame of the output representation.
+
+    Returns
+    -------
+    feature: 2D numpy array
+        A piano roll like representation, with onset and duration rolls of the 88
+        piano keys, the inter-onset interval, and the spectral flux.
     """
-    max_sec = max(label.end_time for label in labels)
+    max_sec = np.max(end_time)
     frm_num = math.ceil(max_sec / t_unit)
-    onset = np.zeros((frm_num, 88))
-    dura = np.zeros((frm_num, 88))
-    inter_onset_interval = np.zeros(frm_num)
+    on_idx = np.round(np.asarray(start_time) / t_unit).astype(int)
+    off_idx = np.round(np.asarray(end_time) / t_unit).astype(int).clip(max=frm_num)
+    pitch = np.asarray(pitch).astype(int)
+
+    valid = (pitch >= LOWEST_MIDI_NOTE) & (pitch <= HIGHEST_MIDI_NOTE)
+    if not np.all(valid):
+        logger.warning("Skipped %d notes with out-of-bound midi number.", np.count_nonzero(~valid))
+    on_idx, off_idx, pitch = on_idx[valid], off_idx[valid], pitch[valid] - LOWEST_MIDI_NOTE
+
+    # Columns: onset (88), duration (88), IOI (1), spectral flux (1)
+    feature = np.zeros((frm_num, 178))
 
     # Extract piano roll feature (onset, duration)
-    onset_idx_set = set()
-    for label in labels:
-        on_idx = int(round(label.start_time / t_unit))
-        off_idx = int(round(label.end_time / t_unit))
-        pitch = int(label.note) - LOWEST_MIDI_NOTE
-        onset[on_idx, pitch] = 1
-        dura[on_idx:off_idx, pitch] = 1
-        onset_idx_set.add(on_idx)
+    onset = feature[:, :88]
+    onset[on_idx, pitch] = 1
+
+    # Paint the duration of each note by expanding the note ranges into frame indexes.
+    dura_len = (off_idx - on_idx).clip(min=0)
+    range_start = np.cumsum(dura_len) - dura_len
+    frame_idx = np.arange(np.sum(dura_len)) + np.repeat(on_idx - range_start, dura_len)
+    feature[frame_idx, 88 + np.repeat(pitch, dura_len)] = 1
 
     # Extract IOI feature
-    onset_idx_set = sorted(list(onset_idx_set))
-    for idx, val in enumerate(onset_idx_set[1:], 1):
-        sec_diff = (onset_idx_set[idx] - onset_idx_set[idx-1]) * t_unit  # noqa: E226
-        inter_onset_interval[val] = sec_diff
-    inter_onset_interval = np.expand_dims(inter_onset_interval, 1)
-
-    # Extract spectral flux feature
-    spec_flux = onset[1:] - onset[:-1]
-    spec_flux[spec_flux < 0] = 0
-    spec_flux = np.sum(spec_flux, axis=1)
-    spec_flux = np.insert(spec_flux, 0, 0)
-    spec_flux = np.expand_dims(spec_flux, 1)
-
-    feature = np.concatenate([onset, dura, inter_onset_interval, spec_flux], axis=1)
+    onset_idx = np.unique(on_idx)
+    feature[onset_idx[1:], 176] = np.diff(onset_idx) * t_unit
+
+    # Extract spectral flux feature, i.e. number of the onsets not present in the previous frame.
+    on_cells = np.unique(on_idx * 88 + pitch)
+    on_frame, on_pitch = np.divmod(on_cells, 88)
+    is_new = (on_frame > 0) & (onset[on_frame - 1, on_pitch] == 0)
+    feature[:, 177] = np.bincount(on_frame[is_new], minlength=frm_num)
     return feature
 
 
-def _infer_beat_offset(labels, rounding=1):
+def _infer_beat_offset(start_beat, rounding=1):
     # Check there is really no integer beat first.
-    for label in labels:
-        if int(label.start_beat) == label.start_beat:
-            return 0
+    if np.any(np.trunc(start_beat) == start_beat):
+        return 0
 
-    first_beat = labels[0].start_beat
+    first_beat = start_beat[0]
     round_holder = 10 ** rounding
     return (first_beat * round_holder - int(first_beat * round_holder)) / round_holder
 
 
+def _round_beats(beats, rounding=1):
+    """Round the beat positions to the given decimals, with the same result as the builtin ``round``.
+
+    ``np.round`` scales the values before rounding, which could turn a value slightly below
+    the half-way point into an exact tie. Those values are re-rounded with ``round``.
+    """
+    scaled = beats * 10**rounding
+    rounded = np.round(beats, rounding)
+    near_tie = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6
+    rounded[near_tie] = [round(float(beat), rounding) for beat in beats[near_tie]]
+    return rounded
+
+
+def _fade_out_activation(length, impulse_idx, fade_out):
+    """Paint the fade-out kernel [1, 1/2, ..., 1/fade_out] at each of the impulse positions.
+
+    Where the kernels overlap, the one later in ``impulse_idx`` takes over, which is the
+    same as writing the kernels one by one in order.
+    """
+    # Write order of the impulse at each frame, left-padded for the sliding window.
+    order = np.full(length + fade_out - 1, -1)
+    np.maximum.at(order, np.asarray(impulse_idx, dtype=int) + fade_out - 1, np.arange(len(impulse_idx)))
+
+    # For each frame, find the distance to the latest written impulse within the kernel length.
+    windows = np.lib.stride_tricks.as_strided(
+        order, shape=(length, fade_out), strides=order.strides * 2, writeable=False
+    )[:, ::-1]
+    dist = np.argmax(windows, axis=1)
+    written = windows[np.arange(length), dist] >= 0
+    return np.where(written, 1 / (dist + 1), 0)
+
+
 def extract_musicnet_label(csv_path, meter=4, t_unit=0.01, rounding=1, fade_out=15):
     """Label extraction function for MusicNet.
 
@@ -124,58 +188,41 @@ def extract_musicnet_label(csv_path, meter=4, t_unit=0.01, rounding=1, fade_out=
         Used to augment the sparse positive label in a fade-out manner, reducing
         the value from 1 to 1/fade_out, totaling in length of <fade_out>.
     """
-    labels = MusicNetStructure.load_label(csv_path)
+    columns = MusicNetStructure.load_label_columns(csv_path)
 
     # We found that some of the annotations in MusicNet may have a global beat offset,
     # making the whole piece lack of integer beats, and thus cause errors.
     # To adjust this, we retrieve the offset from the first note. And the offsets usually
     # start to occur from the second position below decimal.
-    offset = _infer_beat_offset(labels, rounding=rounding)
-    round_and_shift = lambda beat: round(beat - offset, rounding)
+    offset = _infer_beat_offset(columns["start_beat"], rounding=rounding)
+    start_beat = _round_beats(columns["start_beat"] - offset, rounding=rounding)
 
-    # Initialize beat and down beat array.
-    max_sec = max(label.end_time for label in labels)
+    max_sec = np.max(columns["end_time"])
     frm_num = math.ceil(max_sec / t_unit) + fade_out
-    beat_arr = np.zeros(frm_num)
-    down_beat_arr = np.zeros(frm_num)
-
-    # Extract beat label data for future training.
-    beat_idx_mapping = {}
-    added_beats = []
-    act_value = np.array([1 / (i + 1) for i in range(fade_out)])
-    for label in labels:
-        start_beat = round_and_shift(label.start_beat)
-        if int(start_beat) != start_beat:
-            # Not on the beat
-            continue
-
-        added_beats.append(start_beat)
-        beat_idx = round(label.start_time / t_unit)
-        beat_idx_mapping[start_beat] = beat_idx
-        beat_arr[beat_idx:beat_idx + fade_out] = act_value
-        if start_beat % meter == 1:
-            down_beat_arr[beat_idx:beat_idx + fade_out] = act_value
-    if len(beat_idx_mapping) == 0:
+
+    # Beat positions and frame indexes of the notes that start on the beat.
+    on_beat = np.trunc(start_beat) == start_beat
+    added_beats = start_beat[on_beat]
+    beat_idx = np.rint(columns["start_time"][on_beat] / t_unit).astype(int)
+    if len(added_beats) == 0:
         logger.error("No integer beat found in the piece: %s", csv_path)
 
-    # Recover missing beat position without time stamp by interpolation.
-    max_beat = math.ceil(max(label.end_beat - offset for label in labels))
-    min_beat = math.ceil(min(label.start_beat - offset for label in labels))
-    beats = set(range(min_beat, max_beat + 1))
-    missing_beats = beats - set(added_beats)
-    interp_beat_idx = interp1d(
-        sorted(beat_idx_mapping.keys()),
-        sorted(beat_idx_mapping.values()),
-        kind='linear',
-        fill_value='extrapolate'
-    )
-    for beat in missing_beats:
-        itp_beat_idx = int(interp_beat_idx(beat))
-        if (itp_beat_idx + fade_out >= len(beat_arr)) or itp_beat_idx < 0:
-            continue
-
-        beat_arr[itp_beat_idx:itp_beat_idx + fade_out] = act_value
-        if beat % meter == 1:
-            down_beat_arr[itp_beat_idx:itp_beat_idx + fade_out] = act_value
+    # Frame index of each beat, taken from the last note that starts on the beat.
+    uniq_beats, last_pos = np.unique(added_beats[::-1], return_index=True)
+    mapped_idx = beat_idx[::-1][last_pos]
 
+    # Recover missing beat position without time stamp by interpolation.
+    max_beat = math.ceil(np.max(columns["end_beat"] - offset))
+    min_beat = math.ceil(np.min(columns["start_beat"] - offset))
+    missing_beats = np.setdiff1d(np.arange(min_beat, max_beat + 1), added_beats)
+    interp_beat_idx = interp1d(uniq_beats, np.sort(mapped_idx), kind='linear', fill_value='extrapolate')
+    itp_beat_idx = np.trunc(interp_beat_idx(missing_beats)).astype(int)
+    valid = (itp_beat_idx + fade_out < frm_num) & (itp_beat_idx >= 0)
+    missing_beats, itp_beat_idx = missing_beats[valid], itp_beat_idx[valid]
+
+    all_beats = np.concatenate([added_beats, missing_beats])
+    all_idx = np.concatenate([beat_idx, itp_beat_idx])
+    down_beat_idx = all_idx[np.mod(all_beats, meter) == 1]
+    beat_arr = _fade_out_activation(frm_num, all_idx, fade_out)
+    down_beat_arr = _fade_out_activation(frm_num, down_beat_idx, fade_out)
     return beat_arr, down_beat_arr
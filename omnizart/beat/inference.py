@@ -1,12 +1,17 @@
-import pretty_midi
+import numpy as np
 from scipy.signal import find_peaks
 
+from omnizart.midi import note_array, to_pretty_midi
+
 
 BEAT_NOTE_NUM = 42  # Hihat
 DOWN_BEAT_NOTE_NUM = 36  # Bass drum
 
+#: Tracks of the inferred beats and down beats.
+BEAT_TRACKS = [("Beat", 0, True), ("Down Beat", 0, True)]
+
 
-def inference(pred, beat_th=0.5, down_beat_th=0.5, min_dist=0.3, t_unit=0.1):
+def inference(pred, beat_th=0.5, down_beat_th=0.5, min_dist=0.3, t_unit=0.1, as_array=False):
     """Infers the beat and down beat positions from the raw prediction values.
 
     Parameters
@@ -21,6 +26,8 @@ def inference(pred, beat_th=0.5, down_beat_th=0.5, min_dist=0.3, t_unit=0.1):
         Minimum distance between two beat positions in seconds.
     t_unit: float
         Time unit of each frame in seconds.
+    as_array: bool
+        Whether to return the note array of ``omnizart.midi.NOTE_DTYPE`` instead.
 
     Returns
     -------
@@ -32,27 +39,15 @@ def inference(pred, beat_th=0.5, down_beat_th=0.5, min_dist=0.3, t_unit=0.1):
     beat_pos, _ = find_peaks(pred[:, 0], height=beat_th, distance=mdist)
     db_pos, _ = find_peaks(pred[:, 1], height=down_beat_th, distance=mdist)
 
-    beat_notes = []
-    for pos in beat_pos:
-        start_time = pos * t_unit
-        end_time = start_time + 0.5
-        beat_notes.append(
-            pretty_midi.Note(start=start_time, end=end_time, pitch=BEAT_NOTE_NUM, velocity=100)
-        )
-
-    db_notes = []
-    for pos in db_pos:
-        start_time = pos * t_unit
-        end_time = start_time + 0.5
-        db_notes.append(
-            pretty_midi.Note(start=start_time, end=end_time, pitch=DOWN_BEAT_NOTE_NUM, velocity=100)
-        )
-
-    beat_inst = pretty_midi.Instrument(is_drum=True, program=0, name="Beat")
-    beat_inst.notes += beat_notes
-    db_inst = pretty_midi.Instrument(is_drum=True, program=0, name="Down Beat")
-    db_inst.notes += db_notes
-
-    midi = pretty_midi.PrettyMIDI()
-    midi.instruments = [beat_inst, db_inst]
-    return midi
+    start_time = np.concatenate([beat_pos, db_pos]) * t_unit
+    notes = note_array(
+        start=start_time,
+        end=start_time + 0.5,
+        pitch=np.repeat([BEAT_NOTE_NUM, DOWN_BEAT_NOTE_NUM], [len(beat_pos), len(db_pos)]),
+        velocity=100,
+        is_drum=True,
+        track=np.repeat([0, 1], [len(beat_pos), len(db_pos)])
+    )
+    if as_array:
+        return notes
+    return to_pretty_midi(notes, tracks=BEAT_TRACKS)
@@ -2,6 +2,7 @@ import math
 import numpy as np
 
 from omnizart.utils import get_logger
+from omnizart.models.rnn import ChunkedBLSTMInference
 
 
 logger = get_logger("Beat Prediction")
@@ -41,9 +42,14 @@ def create_batches(feature, timesteps, batch_size=8):
     pad_len += num_pad_batch * step_size + step_size
     new_feat = np.pad(feature, ((0, pad_len), (0, 0)))
 
-    batch_feat = [new_feat[idx:idx + timesteps] for idx in range(0, len(new_feat) - step_size, step_size)]
-    batches = [batch_feat[idx:idx + batch_size] for idx in range(0, len(batch_feat), batch_size)]
-    return np.array(batches)
+    # Overlapped slices as a strided view of the padded feature.
+    num_slices = (len(new_feat) - step_size - 1) // step_size + 1
+    s0, s1 = new_feat.strides
+    slices = np.lib.stride_tricks.as_strided(
+        new_feat, shape=(num_slices, timesteps, new_feat.shape[1]), strides=(s0 * step_size, s0, s1), writeable=False
+    )
+    num_batches = math.ceil(num_slices / batch_size)
+    return slices[:num_batches * batch_size].reshape(num_batches, batch_size, timesteps, -1)
 
 
 def merge_batches(batch_pred):
@@ -60,7 +66,16 @@ def merge_batches(batch_pred):
     return out
 
 
-def predict(feature, model, timesteps=1000, batch_size=64):
+def predict(
+    feature,
+    model,
+    timesteps=1000,
+    batch_size=64,
+    mode="overlap",
+    merge_overlap=False,
+    look_ahead=None,
+    carry_state=True
+):
     """Predict on the given feature with the model.
 
     Parameters
@@ -73,12 +88,37 @@ def predict(feature, model, timesteps=1000, batch_size=64):
         Size of the input feature dimension.
     batch_size: int
         Batch size for the model input.
+    mode: {'overlap', 'chunk'}
+        Predict on the overlapped slices ('overlap'), or predict on the contiguous chunks
+        with each frame computed only once ('chunk'). The latter only works with the
+        ``blstm`` and ``blstm_attn`` models.
+    merge_overlap: bool
+        Only for 'overlap' mode. If true, merge the slices by ``merge_batches``, keeping the
+        center half of each slice, so the output is aligned to the input frames. Default
+        to false, which concatenates the predictions of the slices as they are, and
+        reproduces the outputs of the previous versions. Note that the concatenated output
+        is not aligned to the input frames after the first half slice.
+    look_ahead: int
+        Number of look-ahead frames for the backward LSTM in 'chunk' mode.
+    carry_state: bool
+        Whether to carry the forward LSTM state over the chunks in 'chunk' mode.
 
     Returns
     -------
     pred: 2D numpy array
         The predicted probabilities of beat and down beat positions.
+
+    See Also
+    --------
+    omnizart.models.rnn.ChunkedBLSTMInference:
+        The inference of the 'chunk' mode.
     """
+    if mode == "chunk":
+        inference = ChunkedBLSTMInference(model, look_ahead=look_ahead, carry_state=carry_state)
+        return inference(feature, batch_size=batch_size)
+    if mode != "overlap":
+        raise ValueError(f"Unknown prediction mode: {mode}. Available: 'overlap', 'chunk'")
+
     logger.debug("Creating batches")
     ori_len = len(feature)
     batches = create_batches(feature, timesteps=timesteps, batch_size=batch_size)
@@ -86,10 +126,12 @@ def predict(feature, model, timesteps=1000, batch_size=64):
     batch_pred = []
     for idx, batch in enumerate(batches):
         print(f"{idx+1}/{len(batches)}", end="\r")
-        batch_pred.append(model.predict(batch))
+        batch_pred.append(model.predict_on_batch(batch))
 
     logger.debug("Merging batch prediction")
-    pred = np.concatenate(batch_pred)  # batches x timesteps x feat
-    pred = np.concatenate(pred)  # length x feat
-    assert len(pred.shape) == 2
+    if merge_overlap:
+        pred = merge_batches(batch_pred)
+    else:
+        pred = np.concatenate(batch_pred)  # batches x timesteps x feat
+        pred = np.concatenate(pred)  # length x feat
     return pred[:ori_len]
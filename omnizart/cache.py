@@ -0,0 +1,142 @@
+"""Cache of raw model predictions.
+
+Stores the raw outputs of the network so that the inference stage (thresholding,
+peak picking, MIDI rendering) can be re-run with different parameters without
+extracting the feature and running the model again.
+
+Each entry is keyed by the content of the input file, the identity of the
+checkpoint, and the feature settings, and is stored as a compressed ``.npz``
+file. Floating-point predictions are stored in half precision.
+
+Set the environment variable ``OMNIZART_CACHE_DIR`` to enable the cache for
+every transcription by default.
+"""
+
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from omnizart.utils import get_logger, ensure_path_exists
+
+
+logger = get_logger("Prediction Cache")
+
+#: Name of the environment variable for specifying the default cache directory.
+CACHE_DIR_ENV = "OMNIZART_CACHE_DIR"
+
+#: Checkpoint files taken into account when computing the identity of a model.
+CHECKPOINT_FILES = [
+    "saved_model.pb",
+    "configurations.yaml",
+    "arch.yaml",
+    "weights.h5",
+    os.path.join("variables", "variables.index"),
+]
+
+
+def resolve_cache_dir(cache_dir=None):
+    """Returns the given cache directory, or the one specified by ``OMNIZART_CACHE_DIR``."""
+    if cache_dir is not None:
+        return cache_dir
+    return os.environ.get(CACHE_DIR_ENV)
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Computes the SHA1 digest of the file content."""
+    sha = hashlib.sha1()
+    with open(path, "rb") as in_file:
+        for chunk in iter(lambda: in_file.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def checkpoint_identity(model_path):
+    """Computes a digest that identifies the checkpoint.
+
+    Uses the absolute path, together with the size and the modification time of
+    the checkpoint files, which changes whenever the checkpoint is re-trained or
+    replaced.
+    """
+    model_path = os.path.abspath(model_path)
+    sha = hashlib.sha1(model_path.encode("utf-8"))
+    for name in CHECKPOINT_FILES:
+        path = os.path.join(model_path, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            sha.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return sha.hexdigest()
+
+
+class PredictionCache:
+    """Compressed storage of raw predictions.
+
+    Parameters
+    ----------
+    cache_dir: Path
+        Directory for storing the cached predictions.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def key(self, input_path, model_path, feature_settings):
+        """Computes the cache key of a transcription.
+
+        Parameters
+        ----------
+        input_path: Path
+            Path to the input audio (or MIDI) file.
+        model_path: Path
+            Path to the resolved checkpoint folder.
+        feature_settings:
+            The feature settings instance of the model, i.e. ``model_settings.feature``.
+
+        Returns
+        -------
+        key: str
+            Hex digest identifying the cached predictions.
+        """
+        feat_conf = json.dumps(feature_settings.to_json(), sort_keys=True)
+        sha = hashlib.sha1()
+        sha.update(hash_file(input_path).encode("utf-8"))
+        sha.update(checkpoint_identity(model_path).encode("utf-8"))
+        sha.update(feat_conf.encode("utf-8"))
+        return sha.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def save(self, key, pred, **extras):
+        """Stores the prediction and the auxiliary arrays.
+
+        The floating-point ``pred`` is stored in half precision. Arrays given
+        in ``extras`` (e.g. time stamps) are kept in their original types.
+        """
+        ensure_path_exists(self.cache_dir)
+        pred = np.asarray(pred)
+        if np.issubdtype(pred.dtype, np.floating):
+            pred = pred.astype(np.float16)
+        np.savez_compressed(self.path(key), pred=pred, **extras)
+        logger.info("Prediction has been cached to %s", self.path(key))
+
+    def load(self, key):
+        """Loads the cached prediction.
+
+        Returns
+        -------
+        cached: dict
+            The cached arrays. Predictions are converted back to float32.
+        """
+        if not self.exists(key):
+            raise FileNotFoundError(
+                f"No cached prediction found at {self.path(key)}. Run 'transcribe' with the cache enabled first."
+            )
+        with np.load(self.path(key)) as data:
+            cached = {name: data[name] for name in data.files}
+        if np.issubdtype(cached["pred"].dtype, np.floating):
+            cached["pred"] = cached["pred"].astype(np.float32)
+        return cached
@@ -1,4 +1,5 @@
 import os
+import random
 from os.path import join as jpath
 from datetime import datetime
 
@@ -9,18 +10,23 @@ import tensorflow as tf
 from omnizart.base import BaseTranscription, BaseDatasetLoader
 from omnizart.setting_loaders import ChordSettings
 from omnizart.io import write_yaml
+from omnizart.midi import to_pretty_midi
 from omnizart.utils import get_logger, ensure_path_exists, parallel_generator
 from omnizart.constants.datasets import McGillBillBoard
 from omnizart.feature.chroma import extract_chroma
 from omnizart.models.t2t import MultiHeadAttention
-from omnizart.chord.features import extract_feature_label
-from omnizart.chord.inference import inference, write_csv
+from omnizart.chord.features import extract_feature_label, shift_segmented_chromagram, shift_chord
+from omnizart.chord.prediction import predict
+from omnizart.chord.inference import inference, write_csv, CHORD_TRACKS
 from omnizart.train import get_train_val_feat_file_list
 from omnizart.models.chord_model import ChordModel, ReduceSlope
 
 
 logger = get_logger("Chord Application")
 
+# HDF attribute marking the feature file stores only the unshifted feature.
+_LAZY_AUGMENT_MARK = "lazy_augment"
+
 
 class ChordTranscription(BaseTranscription):
     """Application class for chord transcription."""
@@ -28,7 +34,7 @@ class ChordTranscription(BaseTranscription):
         super().__init__(ChordSettings, conf_path=conf_path)
         self.custom_objects = {"MultiHeadAttention": MultiHeadAttention}
 
-    def transcribe(self, input_audio, model_path=None, output="./"):
+    def transcribe(self, input_audio, model_path=None, output="./", cache_dir=None):
         """Transcribe chords in the audio.
 
         This function transcribes chord progression in the audio and will outputs MIDI
@@ -44,6 +50,10 @@ class ChordTranscription(BaseTranscription):
             Path to the trained model or the supported transcription mode.
         output: Path (optional)
             Path for writing out the transcribed MIDI file. Default to the current path.
+        cache_dir: Path (optional)
+            Directory for caching the raw prediction, which can later be re-used by
+            ``reinfer``. Default to the environment variable ``OMNIZART_CACHE_DIR``,
+            and the prediction will not be cached if neither is given.
 
         Returns
         -------
@@ -55,44 +65,73 @@ class ChordTranscription(BaseTranscription):
         omnizart.cli.chord.transcribe: CLI entry point of this function.
         omnizart.chord.inference: Records the default chord-to-notes mappings.
         """
+        logger.info("Loading model in background")
+        model_future, settings = self._load_model_in_background(model_path, custom_objects=self.custom_objects)
 
         logger.info("Extracting feature")
         t_unit, chroma = extract_chroma(input_audio)
 
-        logger.info("Loading model")
-        model, settings = self._load_model(model_path, custom_objects=self.custom_objects)
+        logger.info("Predicting...")
+        chord = predict(
+            chroma,
+            model_future.result(),
+            segment_width=settings.feature.segment_width,
+            num_steps=settings.feature.num_steps
+        )
+        self._cache_prediction(cache_dir, input_audio, model_path, settings, chord, t_unit=t_unit)
 
-        logger.info("Preparing feature for model prediction")
-        pad_size = settings.feature.segment_width // 2
-        chroma_pad = np.pad(chroma, ((pad_size, pad_size), (0, 0)), constant_values=0)
-        segments = np.array([
-            chroma_pad[i-pad_size:i+pad_size+1] for i in range(pad_size, pad_size+len(chroma))  # noqa: E226
-        ])
-        segments = segments.reshape([-1, chroma.shape[1] * settings.feature.segment_width])
+        notes, info = self._infer(chord, t_unit, settings)
+        self._output(output, input_audio, notes, info)
+        logger.info("Transcription finished")
+        return to_pretty_midi(notes, tracks=CHORD_TRACKS)
 
-        num_steps = settings.feature.num_steps
-        pad_end = num_steps - len(segments) % num_steps
-        segments_pad = np.pad(segments, ((0, pad_end), (0, 0)), constant_values=0)
+    def reinfer(self, input_audio, model_path=None, output="./", cache_dir=None, **inference_settings):
+        """Infer chords from the cached prediction with different inference settings.
 
-        num_seqs = len(segments_pad) // num_steps
-        segments_pad = segments_pad.reshape([num_seqs, num_steps, segments_pad.shape[1]])
+        Feature extraction and model prediction are skipped. The raw prediction should
+        be cached by ``transcribe`` beforehand with the same model.
 
-        logger.info("Predicting...")
-        chord, _, _, _ = model.predict(segments_pad)
-        chord = chord.reshape(np.prod(chord.shape))[:-pad_end]  # Reshape and remove padding
+        Parameters
+        ----------
+        input_audio: Path
+            Path to the raw audio file (.wav).
+        model_path: Path
+            Path to the trained model or the supported transcription mode.
+        output: Path (optional)
+            Path for writing out the transcribed MIDI file. Default to the current path.
+        cache_dir: Path (optional)
+            Directory of the cached predictions. Default to ``OMNIZART_CACHE_DIR``.
+        **inference_settings:
+            Overrides the attributes of ``ChordSettings.inference``, e.g. ``min_dura=0.2``.
+
+        Returns
+        -------
+        midi: pretty_midi.PrettyMIDI
+            Transcribed chord progression with default chord-to-notes mappings.
+
+        See Also
+        --------
+        omnizart.cli.chord.reinfer: CLI entry point of this function.
+        """
+        cached, settings = self._load_cached_prediction(
+            cache_dir, input_audio, model_path=model_path, inference_settings=inference_settings
+        )
+        notes, info = self._infer(cached["pred"], float(cached["t_unit"]), settings)
+        self._output(output, input_audio, notes, info)
+        logger.info("Re-inference finished")
+        return to_pretty_midi(notes, tracks=CHORD_TRACKS)
 
+    def _infer(self, chord, t_unit, settings):  # pylint: disable=R0201
         logger.info("Infering chords...")
-        midi, info = inference(chord, t_unit, min_dura=settings.inference.min_dura)
+        return inference(chord, t_unit, min_dura=settings.inference.min_dura, as_array=True)
 
-        output = self._output_midi(output=output, input_audio=input_audio, midi=midi)
+    def _output(self, output, input_audio, notes, info):
+        output = self._output_midi(output=output, input_audio=input_audio, midi=notes, tracks=CHORD_TRACKS)
         if output is not None:
             write_csv(info, output=output.replace(".mid", ".csv"))
             logger.info("MIDI and CSV file have been written to %s", os.path.abspath(os.path.dirname(output)))
 
-        logger.info("Transcription finished")
-        return midi
-
-    def generate_feature(self, dataset_path, chord_settings=None, num_threads=4):
+    def generate_feature(self, dataset_path, chord_settings=None, num_threads=4, lazy_augment=False):
         """Extract feature of McGill BillBoard dataset.
 
         There are three main features that will be used in the training:
@@ -104,6 +143,11 @@ class ChordTranscription(BaseTranscription):
         The last two feature will be both used for computing the training loss.
         During the feature extraction, the feature data is stored as a numpy array
         with named field, makes it works like a dict type.
+
+        By default, all the 12 pitch-shifted copies of the feature are stored. With
+        ``lazy_augment=True``, only the unshifted feature is stored, and the shifts are
+        applied randomly by ``McGillDatasetLoader`` while training, which takes 1/12 of
+        the disk space and extraction time.
         """
         settings = self._validate_and_get_settings(chord_settings)
 
@@ -119,10 +163,14 @@ class ChordTranscription(BaseTranscription):
 
         # Start feature extraction
         logger.info("Start to extract training feature")
-        _parallel_feature_extraction(train_data_pair, train_feat_out_path, num_threads=num_threads)
+        _parallel_feature_extraction(
+            train_data_pair, train_feat_out_path, num_threads=num_threads, lazy_augment=lazy_augment
+        )
 
         logger.info("Start to extract testing feature")
-        _parallel_feature_extraction(test_data_pair, test_feat_out_path, num_threads=num_threads)
+        _parallel_feature_extraction(
+            test_data_pair, test_feat_out_path, num_threads=num_threads, lazy_augment=lazy_augment
+        )
 
         # Writing out the settings
         write_yaml(settings.to_json(), jpath(train_feat_out_path, ".success.yaml"))
@@ -236,13 +284,14 @@ def _extract_feature_arg_wrapper(input_tup, **kwargs):
     return extract_feature_label(input_tup[0], input_tup[1], **kwargs)
 
 
-def _parallel_feature_extraction(data_pair, out_path, num_threads=4):
+def _parallel_feature_extraction(data_pair, out_path, num_threads=4, lazy_augment=False):
     iters = enumerate(
         parallel_generator(
             _extract_feature_arg_wrapper,
             data_pair,
             max_workers=num_threads,
-            chunk_size=num_threads
+            chunk_size=num_threads,
+            augment=not lazy_augment
         )
     )
     for idx, ((feature), feat_idx) in iters:
@@ -251,16 +300,17 @@ def _parallel_feature_extraction(data_pair, out_path, num_threads=4):
         # logger.info("Progress: %d/%d - %s", idx + 1, len(data_pair), f_name)
         print(f"Progress: {idx+1}/{len(data_pair)} - {f_name}", end="\r")
         out_hdf = jpath(out_path, f"{os.path.basename(f_name)}.hdf")
-        _write_feature(feature, out_path=out_hdf)
+        _write_feature(feature, out_path=out_hdf, lazy_augment=lazy_augment)
 
 
-def _write_feature(feature, out_path):
+def _write_feature(feature, out_path, lazy_augment=False):
     key_list = ["chroma", "chord", "chord_change", "tc", "sequence_len"]
     with h5py.File(out_path, "w") as out_hdf:
         for key in key_list:
             data = np.concatenate([feat[key] for feat in feature])
             out_hdf.create_dataset(key, data=data, compression="gzip", compression_opts=3)
         out_hdf.create_dataset("num_sequence", data=feature[0]["num_sequence"])
+        out_hdf.attrs[_LAZY_AUGMENT_MARK] = lazy_augment
 
 
 class McGillDatasetLoader(BaseDatasetLoader):
@@ -271,6 +321,9 @@ class McGillDatasetLoader(BaseDatasetLoader):
     Also the returned label should be a tuple of two different ground-truth labels
     to fit the training scenario.
 
+    For the feature files generated with ``lazy_augment=True``, each sample is
+    transposed by a random number of semitones before yielding.
+
     Yields
     ------
     feature:
@@ -287,10 +340,26 @@ class McGillDatasetLoader(BaseDatasetLoader):
             slice_hop=slice_hop,
             feat_col_name="chroma"
         )
+        self.lazy_augment = {
+            hdf_name: bool(hdf_ref.attrs.get(_LAZY_AUGMENT_MARK, False))
+            for hdf_name, hdf_ref in self.hdf_refs.items()
+        }
+        self._shift = 0
+
+    def _get_feature(self, hdf_name, slice_start):
+        feature = super()._get_feature(hdf_name, slice_start)
+
+        # Draw the shift here, and apply the same shift to the label in _get_label.
+        self._shift = random.randrange(12) if self.lazy_augment[hdf_name] else 0
+        if self._shift > 0:
+            feature = shift_segmented_chromagram(feature, self._shift)
+        return feature
 
     def _get_label(self, hdf_name, slice_start):
         gt_chord = self.hdf_refs[hdf_name]["chord"][slice_start:slice_start + self.slice_hop].squeeze()
         gt_chord_change = self.hdf_refs[hdf_name]["chord_change"][slice_start:slice_start + self.slice_hop].squeeze()
+        if self._shift > 0:
+            gt_chord = shift_chord(gt_chord, self._shift)
         return gt_chord, gt_chord_change
 
 
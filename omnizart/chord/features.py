@@ -7,7 +7,7 @@ from scipy.ndimage import gaussian_filter1d
 from omnizart.constants.feature import CHORD_INT_MAPPING, ENHARMONIC_TABLE
 
 
-def extract_feature_label(feat_path, lab_path, segment_width=21, segment_hop=5, num_steps=100):
+def extract_feature_label(feat_path, lab_path, segment_width=21, segment_hop=5, num_steps=100, augment=True):
     """Basic feature extraction block.
 
     Including multiple steps for processing the feature.
@@ -29,6 +29,9 @@ def extract_feature_label(feat_path, lab_path, segment_width=21, segment_hop=5,
         Hop size for processing each segment.
     num_steps: int
         Number of steps while reshaping the feature.
+    augment: bool
+        Whether to include all the 12 pitch-shifted copies. If false, only the unshifted
+        feature is returned, and the shifts can be applied later at training time.
 
     Returns
     -------
@@ -37,7 +40,7 @@ def extract_feature_label(feat_path, lab_path, segment_width=21, segment_hop=5,
     """
     label = load_label(lab_path)
     feature = load_feature(feat_path, label)
-    feature = augment_feature(feature)
+    feature = augment_feature(feature, shifts=range(12) if augment else [0])
     feature = segment_feature(feature, segment_width=segment_width, segment_hop=segment_hop)
     feature = reshape_feature(feature, num_steps=num_steps)
 
@@ -59,45 +62,55 @@ def load_label(lab_path):
 
 def load_feature(feat_path, label):
     """Load and parse the feature into the desired format."""
-    frames = {"onset": [], "chroma": [], "chord": [], "chord_change": []}
-    pre_chord = None
-    for row in np.genfromtxt(feat_path, delimiter=","):
-        onset = row[1]
-        chroma1 = row[2:14]
-        chroma2 = row[14:26]
-        both_chroma = np.concatenate([chroma1, chroma2]).astype(np.float32)
-
-        filtered_label = label[(label["onset"] <= onset) & (label["end"] > onset)]
-        chord = filtered_label["chord"][0]
+    data = np.atleast_2d(np.genfromtxt(feat_path, delimiter=","))
+    onset = data[:, 1]
+    chroma = data[:, 2:26].astype(np.float32)
+
+    # Index of the label interval that each frame lies in.
+    label_onset = label["onset"].astype(np.float64)
+    label_end = label["end"].astype(np.float64)
+    label_idx = np.searchsorted(label_onset, onset, side="right") - 1
+    found = (label_idx >= 0) & (label_end[label_idx.clip(min=0)] > onset)
+
+    # Frames that may also lie in an earlier interval, i.e. with overlapped labels.
+    prev_max_end = np.concatenate([[-np.inf], np.maximum.accumulate(label_end)])
+    overlapped = found & (prev_max_end[label_idx.clip(min=0)] > onset)
+    for idx in np.flatnonzero(~found | overlapped):
+        # Falls back to the first matched interval for unsorted or overlapped labels.
+        label_idx[idx] = np.flatnonzero((label_onset <= onset[idx]) & (label_end > onset[idx]))[0]
+
+    chord_int = _chord_to_int(label["chord"])[label_idx]
+    chord_change = (np.diff(chord_int, prepend=-1) != 0).astype(int)
+    return {"onset": onset, "chroma": chroma, "chord": chord_int, "chord_change": chord_change}
+
+
+def _chord_to_int(chords):
+    """Map the chord names to the chord indices, with enharmonic roots normalized."""
+    mapping = {}
+    for chord in set(chords):
         root = chord.split(":")[0]
+        name = chord
         if "b" in root:
             root, quality = chord.split(':')
-            chord = f"{ENHARMONIC_TABLE[root]}:{quality}"
-        chord_int = CHORD_INT_MAPPING[chord]
-        chord_change = 0 if chord_int == pre_chord else 1
-        pre_chord = chord_int
+            name = f"{ENHARMONIC_TABLE[root]}:{quality}"
+        mapping[chord] = CHORD_INT_MAPPING[name]
+    return np.array([mapping[chord] for chord in chords], dtype=int)
 
-        frames["onset"].append(onset)
-        frames["chroma"].append(both_chroma)
-        frames["chord"].append(chord_int)
-        frames["chord_change"].append(chord_change)
-    return frames
 
-
-def augment_feature(feature):
+def augment_feature(feature, shifts=range(12)):
     """Feature augmentation
 
     Variying pitches with 12 different shifts.
     """
     new_feature = []
-    for shift in range(12):
+    for shift in shifts:
         chromagram = np.array(feature["chroma"])
         chord = feature["chord"]
         chord_change = feature["chord_change"]
 
         chromagram_shift = shift_chromagram(chromagram, shift)
         tc_shift = compute_tonal_centroids((chromagram_shift[:, :12] + chromagram_shift[:, 12:]) / 2)  # [time, 6]
-        chord_shift = np.array([shift_chord(x, shift) for x in chord])
+        chord_shift = shift_chord(np.asarray(chord), shift)
 
         new_feature.append({
             "chroma": chromagram_shift,
@@ -118,19 +131,29 @@ def shift_chromagram(chromagram, shift):
 
 
 def shift_chord(chord, shift):
-    """Shift chord"""
-    if chord < 12:
-        new_chord = (chord + shift) % 12
-    elif chord < 24:
-        new_chord = (chord - 12 + shift) % 12 + 12
-    else:
-        new_chord = chord
-    return new_chord
+    """Shift chord. Works on both a single chord and an array of chords."""
+    return _CHORD_SHIFT_TABLE[shift % 12, chord]
 
 
-def compute_tonal_centroids(chromagram, filtering=True, sigma=8):
-    """chromagram with shape [time, 12] """
+def _build_chord_shift_table(num_chords=26):
+    chord = np.arange(num_chords)
+    table = [
+        np.where(chord < 12, (chord + shift) % 12, np.where(chord < 24, (chord - 12 + shift) % 12 + 12, chord))
+        for shift in range(12)
+    ]
+    return np.array(table)
+
+
+# Lookup table of the shifted chord, indexed by [shift, chord].
+_CHORD_SHIFT_TABLE = _build_chord_shift_table()
+
+
+def shift_segmented_chromagram(chroma, shift):
+    """Shift the segmented chromagram, with the last axis in shape [segment_width * 24]."""
+    return shift_chromagram(chroma.reshape(-1, 24), shift).reshape(chroma.shape)
 
+
+def _tonal_centroid_transform():
     # define transformation matrix - phi
     r1, r2, r3 = 1, 1, 0.5
     base_arr = np.arange(12)
@@ -142,9 +165,16 @@ def compute_tonal_centroids(chromagram, filtering=True, sigma=8):
     phi_5 = r3 * np.cos(base_arr * 2 * math.pi / 3)
     phi_ = [phi_0, phi_1, phi_2, phi_3, phi_4, phi_5]
     phi = np.concatenate(phi_).reshape(6, 12)  # [6, 12]
-    phi_t = np.transpose(phi)  # [12, 6]
+    return np.transpose(phi)  # [12, 6]
+
+
+# Cached transformation matrix from chroma to tonal centroids, in shape [12 x 6].
+_PHI_T = _tonal_centroid_transform()
 
-    tc = chromagram.dot(phi_t)  # convert to tonal centroid representations, [time, 6]
+
+def compute_tonal_centroids(chromagram, filtering=True, sigma=8):
+    """chromagram with shape [time, 12] """
+    tc = chromagram.dot(_PHI_T)  # convert to tonal centroid representations, [time, 6]
     if filtering:
         # Gaussian filtering along time axis
         tc = gaussian_filter1d(tc, sigma=sigma, axis=0)
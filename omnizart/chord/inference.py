@@ -1,9 +1,9 @@
 import csv
 
-import pretty_midi
 import numpy as np
 
 from omnizart.constants.feature import CHORD_INT_MAPPING
+from omnizart.midi import note_array, to_pretty_midi
 
 
 C_MAJ_TEN_DEGREE = np.array([36, 43, 52], dtype=np.int32)
@@ -35,14 +35,16 @@ CHORD_MIDI_NOTES = {
     "B:min": C_MIN_TEN_DEGREE + 11,
 }
 
+#: Track of the inferred chord notes.
+CHORD_TRACKS = [("", 0, False)]
 
-def inference(chord_pred, t_unit, min_dura=0.1):
+
+def inference(chord_pred, t_unit, min_dura=0.1, as_array=False):
     no_chord = CHORD_INT_MAPPING["N"]
     chord_pred = np.pad(chord_pred, (1, 1), constant_values=no_chord)
     chord_change = np.where(chord_pred[:-1] != chord_pred[1:])[0]
     rev_map = {v: k for k, v in CHORD_INT_MAPPING.items()}
     info = []
-    notes = []
     last_chord_name = "N"
     for idx, ch_idx in enumerate(chord_change[1:], 1):
         chord_num = chord_pred[ch_idx]
@@ -59,21 +61,21 @@ def inference(chord_pred, t_unit, min_dura=0.1):
                 "start": start_t,
                 "end": end_t
             })
-            for pitch in CHORD_MIDI_NOTES[chord_name]:
-                notes.append(pretty_midi.Note(start=start_t, end=end_t, pitch=pitch, velocity=100))
         elif last_chord_name not in ["X", "N"]:
             # Duration of the current chord shorter than expected.
             # Append the activation to the last chord.
             info[-1]["end"] = end_t
-            note_count = len(CHORD_MIDI_NOTES[last_chord_name])
-            for lidx in range(-note_count, 0):
-                notes[lidx].end = end_t
 
-    inst = pretty_midi.Instrument(program=0)
-    inst.notes += notes
-    midi = pretty_midi.PrettyMIDI()
-    midi.instruments.append(inst)
-    return midi, info
+    # Each chord is rendered as the notes defined in CHORD_MIDI_NOTES.
+    notes = note_array(
+        start=[chord["start"] for chord in info for _ in CHORD_MIDI_NOTES[chord["chord"]]],
+        end=[chord["end"] for chord in info for _ in CHORD_MIDI_NOTES[chord["chord"]]],
+        pitch=[pitch for chord in info for pitch in CHORD_MIDI_NOTES[chord["chord"]]],
+        velocity=100
+    )
+    if as_array:
+        return notes, info
+    return to_pretty_midi(notes, tracks=CHORD_TRACKS), info
 
 
 def write_csv(info, output="./chord.csv"):
@@ -0,0 +1,57 @@
+import numpy as np
+
+from omnizart.utils import get_logger
+from omnizart.feature.chroma import segment_view
+
+
+logger = get_logger("Chord Predict")
+
+
+def iter_sequences(segments, num_steps, batch_size=64):
+    """Yields batches of non-overlapped sequences of the segments.
+
+    The last sequence is padded with zeros to ``num_steps``.
+
+    Yields
+    ------
+    batch: 3D numpy array
+        Batch of shape [sequences x num_steps x feat_size], with at most ``batch_size`` sequences.
+    """
+    chunk_size = num_steps * batch_size
+    for start_idx in range(0, len(segments), chunk_size):
+        chunk = segments[start_idx:start_idx + chunk_size]
+        pad_size = -len(chunk) % num_steps
+        if pad_size > 0:
+            chunk = np.pad(chunk, ((0, pad_size), (0, 0)), constant_values=0)
+        yield chunk.reshape([-1, num_steps, segments.shape[1]])
+
+
+def predict(chroma, model, segment_width=21, num_steps=100, batch_size=64):
+    """Predicts the chord of each frame, with sequences streamed to the model batch by batch.
+
+    Parameters
+    ----------
+    chroma: 2D numpy array
+        Chroma feature in shape [time x 24].
+    model: ChordModel
+        The chord model.
+    segment_width: int
+        Number of nearby frames concatenated for each frame.
+    num_steps: int
+        Number of frames of each sequence.
+    batch_size: int
+        Number of sequences to be predicted at once.
+
+    Returns
+    -------
+    chord: 1D numpy array
+        Predicted chord index of each frame.
+    """
+    segments = segment_view(chroma, segment_width=segment_width)
+    total_batches = int(np.ceil(len(segments) / (num_steps * batch_size)))
+    chord = []
+    for idx, batch in enumerate(iter_sequences(segments, num_steps, batch_size=batch_size)):
+        logger.debug("Batch %d/%d", idx + 1, total_batches)
+        chord_pred, _, _, _ = model.predict_on_batch(batch)
+        chord.append(np.asarray(chord_pred).reshape(-1))
+    return np.concatenate(chord)[:len(segments)]
@@ -1,6 +1,7 @@
 import click
 
 from omnizart.cli.beat.transcribe import transcribe
+from omnizart.cli.beat.reinfer import reinfer
 from omnizart.cli.beat.generate_feature import generate_feature
 from omnizart.cli.beat.train_model import train_model
 
@@ -11,5 +12,6 @@ def beat():
 
 
 beat.add_command(transcribe)
+beat.add_command(reinfer)
 beat.add_command(generate_feature)
 beat.add_command(train_model)
@@ -0,0 +1,45 @@
+# pylint: disable=C0303,W1401
+import click
+
+from omnizart.cli import silence_tensorflow
+from omnizart.cli.common_options import add_common_options, COMMON_REINFER_OPTIONS
+from omnizart.utils import LazyLoader
+
+
+beat = LazyLoader("beat", globals(), "omnizart.beat")
+
+
+@click.command()
+@add_common_options(COMMON_REINFER_OPTIONS)
+def reinfer(input_audio, model_path, output, cache_dir, inference_settings):
+    """Re-infer beat positions from the cached raw prediction.
+
+    Skips feature extraction and model prediction, and only runs the inference
+    stage with the given inference settings. The prediction should be cached by
+    running 'transcribe' with '--cache-dir' beforehand.
+
+    \b
+    Example Usage
+    $ omnizart beat reinfer \\ 
+        example.mid \\ 
+        --cache-dir path/to/cache \\ 
+        -s beat_threshold=0.6 \\ 
+        --output example_beat.mid
+    """
+    silence_tensorflow()
+    beat.app.reinfer(input_audio, model_path, output=output, cache_dir=cache_dir, **inference_settings)
+
+
+def process_doc():
+    # Some dirty work for preserving and converting the docstring inside the decorated
+    # function into .rst format.
+    doc = reinfer.__doc__
+    doc = doc.replace("\b", "").replace("    ", "").replace("--", "        --")
+
+    code_block = "\n.. code-block:: bash\n\n"
+    doc = doc.replace("$", f"{code_block}    $")
+
+    return doc
+
+
+__doc__ = process_doc()
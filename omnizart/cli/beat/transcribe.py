@@ -1,7 +1,7 @@
 import click
 
 from omnizart.cli import silence_tensorflow
-from omnizart.cli.common_options import add_common_options, COMMON_TRANSCRIBE_OPTIONS
+from omnizart.cli.common_options import add_common_options, COMMON_TRANSCRIBE_OPTIONS, COMMON_CACHE_OPTIONS
 from omnizart.utils import LazyLoader
 
 
@@ -9,8 +9,8 @@ beat = LazyLoader("beat", globals(), "omnizart.beat")
 
 
 @click.command()
-@add_common_options(COMMON_TRANSCRIBE_OPTIONS)
-def transcribe(input_audio, model_path, output):
+@add_common_options(COMMON_TRANSCRIBE_OPTIONS + COMMON_CACHE_OPTIONS)
+def transcribe(input_audio, model_path, output, cache_dir):
     """Transcribe a single audio and output both MIDI and CSV file."""
     silence_tensorflow()
-    beat.app.transcribe(input_audio, model_path=model_path, output=output)
+    beat.app.transcribe(input_audio, model_path=model_path, output=output, cache_dir=cache_dir)
@@ -1,6 +1,7 @@
 import click
 
 from omnizart.cli.chord.transcribe import transcribe
+from omnizart.cli.chord.reinfer import reinfer
 from omnizart.cli.chord.generate_feature import generate_feature
 from omnizart.cli.chord.train_model import train_model
 
@@ -11,5 +12,6 @@ def chord():
 
 
 chord.add_command(transcribe)
+chord.add_command(reinfer)
 chord.add_command(generate_feature)
 chord.add_command(train_model)
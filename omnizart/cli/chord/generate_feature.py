@@ -10,11 +10,18 @@ chord = LazyLoader("chord", globals(), "omnizart.chord")
 
 @click.command()
 @add_common_options(COMMON_GEN_FEATURE_OPTIONS)
-def generate_feature(dataset_path, output_path, num_threads):
+@click.option(
+    "--lazy-augment",
+    help="Store only the unshifted feature, and apply the pitch shift randomly while training.",
+    is_flag=True
+)
+def generate_feature(dataset_path, output_path, num_threads, lazy_augment):
     """Extract the feature of the whole dataset for training."""
     settings = ChordSettings()
 
     if output_path is not None:
         settings.dataset.feature_save_path = output_path
 
-    chord.app.generate_feature(dataset_path, chord_settings=settings, num_threads=num_threads)
+    chord.app.generate_feature(
+        dataset_path, chord_settings=settings, num_threads=num_threads, lazy_augment=lazy_augment
+    )
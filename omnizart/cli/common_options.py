@@ -1,4 +1,5 @@
 import click
+import yaml
 
 
 def add_common_options(options):
@@ -27,6 +28,39 @@ COMMON_TRANSCRIBE_OPTIONS = [
 ]
 
 
+COMMON_CACHE_OPTIONS = [
+    click.option(
+        "--cache-dir",
+        help="Directory for caching the raw predictions. Default to the environment variable OMNIZART_CACHE_DIR.",
+        type=click.Path(writable=True)
+    )
+]
+
+
+def parse_inference_settings(ctx, param, value):  # pylint: disable=W0613
+    """Parse the repeated KEY=VALUE options into a dict. Values are parsed as YAML."""
+    settings = {}
+    for item in value:
+        if "=" not in item:
+            raise click.BadParameter(f"Should be in the form of KEY=VALUE, but got '{item}'")
+        key, val = item.split("=", 1)
+        settings[key.strip()] = yaml.safe_load(val)
+    return settings
+
+
+COMMON_REINFER_OPTIONS = COMMON_TRANSCRIBE_OPTIONS + COMMON_CACHE_OPTIONS + [
+    click.option(
+        "-s",
+        "--inference-setting",
+        "inference_settings",
+        help="Override the inference setting of the model in the form of KEY=VALUE, e.g. onset_th=6. "
+        "Can be given multiple times.",
+        multiple=True,
+        callback=parse_inference_settings
+    )
+]
+
+
 COMMON_GEN_FEATURE_OPTIONS = [
     click.option(
         "-d",
@@ -1,6 +1,7 @@
 import click
 
 from omnizart.cli.drum.transcribe import transcribe
+from omnizart.cli.drum.reinfer import reinfer
 from omnizart.cli.drum.generate_feature import generate_feature
 from omnizart.cli.drum.train_model import train_model
 
@@ -11,5 +12,6 @@ def drum():
 
 
 drum.add_command(transcribe)
+drum.add_command(reinfer)
 drum.add_command(generate_feature)
 drum.add_command(train_model)
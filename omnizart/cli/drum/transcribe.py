@@ -2,7 +2,7 @@
 import click
 
 from omnizart.cli import silence_tensorflow
-from omnizart.cli.common_options import add_common_options, COMMON_TRANSCRIBE_OPTIONS
+from omnizart.cli.common_options import add_common_options, COMMON_TRANSCRIBE_OPTIONS, COMMON_CACHE_OPTIONS
 from omnizart.utils import LazyLoader
 
 
@@ -10,8 +10,8 @@ drum = LazyLoader("drum", globals(), "omnizart.drum")
 
 
 @click.command()
-@add_common_options(COMMON_TRANSCRIBE_OPTIONS)
-def transcribe(input_audio, model_path, output):
+@add_common_options(COMMON_TRANSCRIBE_OPTIONS + COMMON_CACHE_OPTIONS)
+def transcribe(input_audio, model_path, output, cache_dir):
     """Transcribe a single audio and output as a MIDI file.
 
     This will output a MIDI file with the same name as the given audio, except the
@@ -25,7 +25,7 @@ def transcribe(input_audio, model_path, output):
         --output example.mid
     """
     silence_tensorflow()
-    drum.app.transcribe(input_audio, model_path, output=output)
+    drum.app.transcribe(input_audio, model_path, output=output, cache_dir=cache_dir)
 
 
 def process_doc():
@@ -3,6 +3,7 @@ import click
 from omnizart.cli.music.generate_feature import generate_feature
 from omnizart.cli.music.train_model import train_model
 from omnizart.cli.music.transcribe import transcribe
+from omnizart.cli.music.reinfer import reinfer
 
 
 @click.group()
@@ -13,3 +14,4 @@ def music():
 music.add_command(generate_feature)
 music.add_command(train_model)
 music.add_command(transcribe)
+music.add_command(reinfer)
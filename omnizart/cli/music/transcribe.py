@@ -2,7 +2,7 @@
 import click
 
 from omnizart.cli import silence_tensorflow
-from omnizart.cli.common_options import add_common_options, COMMON_TRANSCRIBE_OPTIONS
+from omnizart.cli.common_options import add_common_options, COMMON_TRANSCRIBE_OPTIONS, COMMON_CACHE_OPTIONS
 from omnizart.utils import LazyLoader
 
 
@@ -10,8 +10,13 @@ music = LazyLoader("music", globals(), "omnizart.music")
 
 
 @click.command()
-@add_common_options(COMMON_TRANSCRIBE_OPTIONS)
-def transcribe(input_audio, model_path, output):
+@add_common_options(COMMON_TRANSCRIBE_OPTIONS + COMMON_CACHE_OPTIONS)
+@click.option(
+    "--variable-length",
+    help="Predict the whole audio in large tiles with the fully-convolutional model.",
+    is_flag=True
+)
+def transcribe(input_audio, model_path, output, cache_dir, variable_length):
     """Transcribe a single audio and output as a MIDI file.
 
     This will output a MIDI file with the same name as the given audio, except the
@@ -27,7 +32,7 @@ def transcribe(input_audio, model_path, output):
         --output example.mid
     """
     silence_tensorflow()
-    music.app.transcribe(input_audio, model_path, output=output)
+    music.app.transcribe(input_audio, model_path, output=output, cache_dir=cache_dir, variable_length=variable_length)
 
 
 def process_doc():
@@ -3,6 +3,7 @@ import click
 from omnizart.cli.vocal.generate_feature import generate_feature
 from omnizart.cli.vocal.train_model import train_model
 from omnizart.cli.vocal.transcribe import transcribe
+from omnizart.cli.vocal.reinfer import reinfer
 
 
 @click.group()
@@ -13,3 +14,4 @@ def vocal():
 vocal.add_command(generate_feature)
 vocal.add_command(train_model)
 vocal.add_command(transcribe)
+vocal.add_command(reinfer)
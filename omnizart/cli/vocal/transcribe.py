@@ -1,7 +1,7 @@
 import click
 
 from omnizart.cli import silence_tensorflow
-from omnizart.cli.common_options import add_common_options, COMMON_TRANSCRIBE_OPTIONS
+from omnizart.cli.common_options import add_common_options, COMMON_TRANSCRIBE_OPTIONS, COMMON_CACHE_OPTIONS
 from omnizart.utils import LazyLoader
 
 
@@ -9,12 +9,13 @@ vocal = LazyLoader("vocal", globals(), "omnizart.vocal")
 
 
 @click.command()
-@add_common_options(COMMON_TRANSCRIBE_OPTIONS)
-def transcribe(input_audio, model_path, output):
+@add_common_options(COMMON_TRANSCRIBE_OPTIONS + COMMON_CACHE_OPTIONS)
+@click.option("--sonify", help="Render the transcribed pitch contour to a WAV file.", is_flag=True)
+def transcribe(input_audio, model_path, output, cache_dir, sonify):
     """Transcribe a single audio and output as a MIDI file.
 
     This will output a MIDI file with the same name as the given audio, except the
     extension will be replaced with '.mid'.
     """
     silence_tensorflow()
-    vocal.app.transcribe(input_audio, model_path, output=output)
+    vocal.app.transcribe(input_audio, model_path, output=output, cache_dir=cache_dir, sonify=sonify)
@@ -10,11 +10,24 @@ vocal_contour = LazyLoader("vocal_contour", globals(), "omnizart.vocal_contour")
 
 @click.command()
 @add_common_options(COMMON_TRANSCRIBE_OPTIONS)
-def transcribe(input_audio, model_path, output):
-    """Transcribe a single audio and output as a WAV file.
-
-    This will output a WAV file with the same name as the given audio, except the
-    extension will be replaced with '.wav'.
+@click.option(
+    "--variable-length",
+    help="Predict the whole audio in large tiles with the fully-convolutional model.",
+    is_flag=True
+)
+@click.option(
+    "--hop-size",
+    help="Hop size of the sliding window in frames. Default to half of the window. Set to 1 for the reference mode.",
+    type=int
+)
+@click.option("--batch-size", help="Number of windows to be predicted at once.", type=int, default=16)
+@click.option("--sonify", help="Render the transcribed pitch contour to a WAV file.", is_flag=True)
+def transcribe(input_audio, model_path, output, variable_length, hop_size, batch_size, sonify):
+    """Transcribe a single audio and output the F0 contour as a CSV file.
+
+    This will output a CSV file with the same name as the given audio, except the
+    extension will be replaced with '_f0.csv'. With --sonify, the contour will also
+    be rendered to a WAV file with the postfix '_trans.wav'.
 
     \b
     Example Usage
@@ -23,7 +36,15 @@ def transcribe(input_audio, model_path, output):
         --model-path path/to/model \\ 
         --output example.mid
     """
-    vocal_contour.app.transcribe(input_audio, model_path, output=output)
+    vocal_contour.app.transcribe(
+        input_audio,
+        model_path,
+        output=output,
+        variable_length=variable_length,
+        hop_size=hop_size,
+        batch_size=batch_size,
+        sonify=sonify
+    )
 
 
 def process_doc():
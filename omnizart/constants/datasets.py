@@ -295,6 +295,31 @@ class MusicNetStructure(BaseStructure):
                 labels.append(label)
         return labels
 
+    @classmethod
+    def load_label_columns(cls, label_path):
+        """Load the label as columns of numpy arrays, without creating a Label per note.
+
+        Returns
+        -------
+        columns: dict
+            With keys ``start_time``, ``end_time``, ``note``, ``instrument``, ``start_beat``,
+            and ``end_beat``. Values are in the same units as :meth:`load_label`.
+        """
+        with open(label_path) as label_file:
+            rows = list(csv.DictReader(label_file, delimiter=","))
+
+        sample_rate = 44100
+        column = lambda name, dtype: np.array([row[name] for row in rows]).astype(dtype)
+        start_beat = column("start_beat", np.float64)
+        return {
+            "start_time": column("start_time", np.float64) / sample_rate,
+            "end_time": column("end_time", np.float64) / sample_rate,
+            "note": column("note", np.int64),
+            "instrument": column("instrument", np.int64) - 1,
+            "start_beat": start_beat,
+            "end_beat": column("end_beat", np.float64) + start_beat
+        }
+
 
 class MaestroStructure(BaseStructure):
     """Structure of Maestro dataset"""
@@ -0,0 +1,153 @@
+"""Vectorized utilities for decoding and aggregating F0 contours.
+
+The frame-level F0 contour is a 1D array of frequencies in Hz, with 0 for the
+unvoiced frames. Continuous frames of the same frequency are aggregated into
+segments, stored as a structured numpy array of :data:`F0_SEGMENT_DTYPE` with
+one row per segment. Columns can be accessed by name, e.g.
+``segments["start_time"]``, and each row can be indexed in the same way as the
+dict returned by ``omnizart.utils.aggregate_f0_info``.
+
+Examples
+--------
+.. code-block:: python
+
+    >>> from omnizart.contour import f0_segments
+    >>> segments = f0_segments(np.array([0, 440, 440, 0, 220]), t_unit=0.01)
+    >>> segments["frequency"]
+    array([440., 220.])
+"""
+
+import wave
+
+import numpy as np
+import pretty_midi
+from librosa import midi_to_hz
+
+from omnizart.constants.midi import LOWEST_MIDI_NOTE
+
+
+#: Data type of the aggregated F0 segments.
+F0_SEGMENT_DTYPE = np.dtype([
+    ("start_time", np.float64),
+    ("end_time", np.float64),
+    ("frequency", np.float64),
+    ("pitch", np.float64),
+])
+
+#: Frequencies within this difference are regarded as the same.
+F0_EPS = 1e-6
+
+
+def bin_to_hz(num_bins, bins_per_semitone=4, lowest_note=LOWEST_MIDI_NOTE):
+    """Lookup table of the frequency in Hz of each pitch bin."""
+    return midi_to_hz(np.arange(num_bins) / bins_per_semitone + lowest_note)
+
+
+def decode_f0(activation, hz_table):
+    """Decodes the F0 of each frame from the pitch activation.
+
+    Parameters
+    ----------
+    activation: 2D numpy array
+        Non-negative activation of shape [time x bins]. Frames with all-zero
+        activation are regarded as unvoiced.
+    hz_table: 1D numpy array
+        Frequency in Hz of each bin, e.g. the output of :func:`bin_to_hz`.
+
+    Returns
+    -------
+    f0: 1D numpy array
+        The F0 of each frame in Hz, and 0 for the unvoiced frames.
+    """
+    pidx = np.argmax(activation, axis=1)
+    voiced = activation[np.arange(len(activation)), pidx] > 0
+    return np.where(voiced, hz_table[pidx], 0)
+
+
+def f0_segments(f0, t_unit):
+    """Run-length encodes the F0 contour into segments of the same frequency.
+
+    Parameters
+    ----------
+    f0: 1D numpy array
+        Frame-level F0 contour in Hz.
+    t_unit: float
+        Time unit of each frame.
+
+    Returns
+    -------
+    segments: structured numpy array
+        Array of :data:`F0_SEGMENT_DTYPE` with the start time, end time, frequency,
+        and MIDI pitch of each voiced segment.
+    """
+    f0 = np.asarray(f0, dtype=np.float64)
+    padded = np.concatenate([[0], f0, [0]])
+    bounds = np.flatnonzero(np.abs(np.diff(padded)) >= F0_EPS)
+    starts, ends = bounds[:-1], bounds[1:]
+    voiced = f0[starts] >= F0_EPS
+    starts, ends = starts[voiced], ends[voiced]
+
+    segments = np.empty(len(starts), dtype=F0_SEGMENT_DTYPE)
+    segments["start_time"] = np.round(starts * t_unit, 6)
+    segments["end_time"] = np.round(ends * t_unit, 6)
+    segments["frequency"] = f0[ends - 1]
+    segments["pitch"] = pretty_midi.hz_to_note_number(segments["frequency"])
+    return segments
+
+
+def to_records(segments):
+    """Converts the segments to a list of dicts, one for each segment."""
+    return [dict(zip(F0_SEGMENT_DTYPE.names, row)) for row in segments.tolist()]
+
+
+def synthesize_contour(f0, t_unit, fs, amplitude=0.5, block_size=2**16):
+    """Renders the F0 contour as a sine wave, block by block.
+
+    Frequency and amplitude are linearly interpolated between frames, same as
+    ``mir_eval.sonify.pitch_contour``, and the phase is accumulated across blocks.
+    Unvoiced frames are rendered as silence.
+
+    Parameters
+    ----------
+    f0: 1D numpy array
+        Frame-level F0 contour in Hz.
+    t_unit: float
+        Time unit of each frame.
+    fs: int
+        Sampling rate of the output signal.
+    amplitude: float
+        Amplitude of the voiced frames.
+    block_size: int
+        Number of samples of each block.
+
+    Yields
+    ------
+    block: 1D numpy array
+        Block of the rendered signal in float32.
+    """
+    f0 = np.maximum(np.nan_to_num(np.asarray(f0, dtype=np.float64)), 0)
+    frame_idx = np.arange(len(f0))
+    phase_inc = 2 * np.pi * f0 / fs
+    amps = amplitude * (f0 > 0)
+
+    length = int((len(f0) - 1) * t_unit * fs) if len(f0) > 0 else 0
+    samples_per_frame = t_unit * fs
+    phase = 0.0
+    for start in range(0, length, block_size):
+        pos = np.arange(start, min(start + block_size, length)) / samples_per_frame
+        block_phase = phase + np.cumsum(np.interp(pos, frame_idx, phase_inc))
+        phase = block_phase[-1] % (2 * np.pi)
+        yield (np.interp(pos, frame_idx, amps) * np.sin(block_phase)).astype(np.float32)
+
+
+def write_contour_wav(f0, t_unit, fs, output_path, amplitude=0.5, block_size=2**16):
+    """Renders the F0 contour and streams it to a 16-bit WAV file.
+
+    See :func:`synthesize_contour` for the parameters.
+    """
+    with wave.open(output_path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(fs)
+        for block in synthesize_contour(f0, t_unit, fs, amplitude=amplitude, block_size=block_size):
+            out.writeframes((np.clip(block, -1, 1) * 32767).astype("<i2").tobytes())
@@ -2,8 +2,10 @@
 import os
 from os.path import join as jpath
 import time
+import queue
+import threading
 from datetime import datetime
-import asyncio
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 import h5py
 import numpy as np
@@ -12,10 +14,11 @@ import tensorflow as tf
 from omnizart.feature.wrapper_func import extract_patch_cqt
 from omnizart.drum.prediction import predict
 from omnizart.drum.labels import extract_label_13_inst
-from omnizart.drum.inference import inference
+from omnizart.drum.inference import inference, DRUM_TRACKS
 from omnizart.models.spectral_norm_net import drum_model, ConvSN2D
 from omnizart.utils import get_logger, ensure_path_exists, parallel_generator
 from omnizart.io import write_yaml
+from omnizart.midi import to_pretty_midi
 from omnizart.base import BaseTranscription, BaseDatasetLoader
 from omnizart.setting_loaders import DrumSettings
 from omnizart.train import get_train_val_feat_file_list
@@ -25,6 +28,9 @@ from omnizart.constants.feature import NOTE_PRIORITY_ARRAY
 
 logger = get_logger("Drum Transcription")
 
+# Attribute marking the feature file as completely written.
+_COMPLETE_MARK = "complete"
+
 
 class DrumTranscription(BaseTranscription):
     """Application class for drum transcriptions."""
@@ -32,7 +38,7 @@ class DrumTranscription(BaseTranscription):
         super().__init__(DrumSettings)
         self.custom_objects = {"ConvSN2D": ConvSN2D}
 
-    def transcribe(self, input_audio, model_path=None, output="./"):
+    def transcribe(self, input_audio, model_path=None, output="./", cache_dir=None):
         """Transcribe drum in the audio.
 
         This function transcribes drum activations in the music. Currently the model
@@ -47,6 +53,10 @@ class DrumTranscription(BaseTranscription):
             Path to the trained model or the supported transcription mode.
         output: Path (optional)
             Path for writing out the transcribed MIDI file. Default to the current path.
+        cache_dir: Path (optional)
+            Directory for caching the raw prediction, which can later be re-used by
+            ``reinfer``. Default to the environment variable ``OMNIZART_CACHE_DIR``,
+            and the prediction will not be cached if neither is given.
 
         Returns
         -------
@@ -60,31 +70,71 @@ class DrumTranscription(BaseTranscription):
         if not os.path.isfile(input_audio):
             raise FileNotFoundError(f"The given audio path does not exist. Path: {input_audio}")
 
+        logger.info("Loading model in background...")
+        model_future, model_settings = self._load_model_in_background(model_path, custom_objects=self.custom_objects)
+
         # Extract feature according to model configuration
         logger.info("Extracting feature...")
         patch_cqt_feature, mini_beat_arr = extract_patch_cqt(input_audio)
 
-        # Load model configurations
-        logger.info("Loading model...")
-        model, model_settings = self._load_model(model_path, custom_objects=self.custom_objects)
-
         logger.info("Predicting...")
+        model = model_future.result()
         pred = predict(patch_cqt_feature, model, model_settings.feature.mini_beat_per_segment)
         logger.debug("Prediction shape: %s", pred.shape)
+        self._cache_prediction(cache_dir, input_audio, model_path, model_settings, pred, mini_beat_arr=mini_beat_arr)
+
+        notes = self._infer(pred, mini_beat_arr, model_settings)
+        self._output_midi(output=output, input_audio=input_audio, midi=notes, tracks=DRUM_TRACKS)
+        logger.info("Transcription finished")
+        return to_pretty_midi(notes, tracks=DRUM_TRACKS)
 
+    def reinfer(self, input_audio, model_path=None, output="./", cache_dir=None, **inference_settings):
+        """Infer drum notes from the cached prediction with different inference settings.
+
+        Feature extraction and model prediction are skipped. The raw prediction should
+        be cached by ``transcribe`` beforehand with the same model.
+
+        Parameters
+        ----------
+        input_audio: Path
+            Path to the raw audio file (.wav).
+        model_path: Path
+            Path to the trained model or the supported transcription mode.
+        output: Path (optional)
+            Path for writing out the transcribed MIDI file. Default to the current path.
+        cache_dir: Path (optional)
+            Directory of the cached predictions. Default to ``OMNIZART_CACHE_DIR``.
+        **inference_settings:
+            Overrides the attributes of ``DrumSettings.inference``, e.g. ``bass_drum_th=0.9``.
+
+        Returns
+        -------
+        midi: pretty_midi.PrettyMIDI
+            The transcribed drum notes.
+
+        See Also
+        --------
+        omnizart.cli.drum.reinfer: CLI entry point of this function.
+        """
+        cached, model_settings = self._load_cached_prediction(
+            cache_dir, input_audio, model_path=model_path, inference_settings=inference_settings
+        )
+        notes = self._infer(cached["pred"], cached["mini_beat_arr"], model_settings)
+        self._output_midi(output=output, input_audio=input_audio, midi=notes, tracks=DRUM_TRACKS)
+        logger.info("Re-inference finished")
+        return to_pretty_midi(notes, tracks=DRUM_TRACKS)
+
+    def _infer(self, pred, mini_beat_arr, model_settings):  # pylint: disable=R0201
         logger.info("Infering MIDI...")
-        midi = inference(
+        return inference(
             pred,
             mini_beat_arr,
             bass_drum_th=model_settings.inference.bass_drum_th,
             snare_th=model_settings.inference.snare_th,
-            hihat_th=model_settings.inference.hihat_th
+            hihat_th=model_settings.inference.hihat_th,
+            as_array=True
         )
 
-        self._output_midi(output=output, input_audio=input_audio, midi=midi)
-        logger.info("Transcription finished")
-        return midi
-
     def generate_feature(self, dataset_path, drum_settings=None, num_threads=3):
         """Extract the feature of the whole dataset.
 
@@ -105,7 +155,12 @@ class DrumTranscription(BaseTranscription):
             The configuration instance that holds all relative settings for
             the life-cycle of building a model.
         num_threads:
-            Number of threads for parallel extracting the features.
+            Number of processes for parallel extracting the features.
+
+        Notes
+        -----
+        Feature files that are already completely written are skipped, thus an
+        interrupted extraction can be resumed by running this function again.
 
         See Also
         --------
@@ -274,46 +329,98 @@ def _parallel_feature_extraction(wav_paths, label_paths, out_path, feat_settings
 
 
 def _parallel_feature_extraction_v2(data_pair, out_path, feat_settings, num_threads=5):
-    iter_num = len(data_pair) / num_threads
-    if int(iter_num) < iter_num:
-        iter_num += 1
-    iter_num = int(iter_num)
-
-    for iter_idx in range(iter_num):
-        loop = asyncio.get_event_loop()
-        tasks = []
-        for chunk in range(num_threads):
-            wav_idx = num_threads*iter_idx + chunk  # noqa: E226
-            if wav_idx >= len(data_pair):
-                break
-            logger.info("%s/%s - %s", wav_idx+1, len(data_pair), data_pair[wav_idx][0])  # noqa: E226
-            tasks.append(
-                loop.create_task(_async_all_in_one_extract(
-                    data_pair[wav_idx][0], data_pair[wav_idx][1], feat_settings
-                ))
-            )
-
-        group = asyncio.gather(*tasks, return_exceptions=True)
-        print("Waiting...")
-        results = loop.run_until_complete(group)
-        for result in results:
-            patch_cqt, m_beat_arr, label_128, label_13, wav_path = result
-            basename = os.path.basename(wav_path)
-            filename, _ = os.path.splitext(basename)
-            out_hdf = jpath(out_path, f"{filename}.hdf")
-            with h5py.File(out_hdf, "w") as out_f:
-                out_f.create_dataset("feature", data=patch_cqt, compression="gzip", compression_opts=3)
-                out_f.create_dataset("label", data=label_13, compression="gzip", compression_opts=3)
-                out_f.create_dataset("label_128", data=label_128, compression="gzip", compression_opts=3)
-                out_f.create_dataset("mini_beat_arr", data=m_beat_arr, compression="gzip", compression_opts=3)
-
-
-async def _async_all_in_one_extract(wav_path, label_path, feat_settings):
-    loop = asyncio.get_event_loop()
-    patch_cqt, m_beat_arr, label_128, label_13 = await loop.run_in_executor(
-        None, _all_in_one_extract, wav_path, label_path, feat_settings
-    )
-    return patch_cqt, m_beat_arr, label_128, label_13, wav_path
+    """Extracts the features with a process pool, and writes them out in a writer thread.
+
+    At most ``num_threads`` files are processed at the same time, and a new file is
+    submitted as soon as any of them finishes. Files already having complete features
+    in ``out_path`` are skipped.
+    """
+    pending = [pair for pair in data_pair if not _is_feature_complete(_feature_out_path(out_path, pair[0]))]
+    skipped = len(data_pair) - len(pending)
+    if skipped > 0:
+        logger.info("Skipping %d files that already have complete features", skipped)
+
+    write_queue = queue.Queue(maxsize=num_threads)
+    write_errors = []
+    writer = threading.Thread(target=_feature_writer, args=(write_queue, write_errors), daemon=True)
+    writer.start()
+    try:
+        with ProcessPoolExecutor(max_workers=num_threads) as executor:
+            pending = iter(pending)
+            in_flight = {}
+
+            def _submit_next():
+                pair = next(pending, None)
+                if pair is not None:
+                    future = executor.submit(_all_in_one_extract, pair[0], pair[1], feat_settings)
+                    in_flight[future] = pair[0]
+
+            for _ in range(num_threads):
+                _submit_next()
+
+            finished = skipped
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    wav_path = in_flight.pop(future)
+                    result = future.result()
+                    if write_errors:
+                        raise write_errors[0]
+
+                    finished += 1
+                    logger.info("%d/%d - %s", finished, len(data_pair), wav_path)
+                    write_queue.put((_feature_out_path(out_path, wav_path), *result))
+                    _submit_next()
+    finally:
+        write_queue.put(None)
+        writer.join()
+
+    if write_errors:
+        raise write_errors[0]
+
+
+def _feature_out_path(out_path, wav_path):
+    filename, _ = os.path.splitext(os.path.basename(wav_path))
+    return jpath(out_path, f"{filename}.hdf")
+
+
+def _is_feature_complete(hdf_path):
+    if not os.path.isfile(hdf_path):
+        return False
+    try:
+        with h5py.File(hdf_path, "r") as hdf:
+            return bool(hdf.attrs.get(_COMPLETE_MARK, False))
+    except OSError:
+        return False
+
+
+def _write_feature(out_hdf, patch_cqt, m_beat_arr, label_128, label_13):
+    with h5py.File(out_hdf, "w") as out_f:
+        out_f.create_dataset("feature", data=patch_cqt, compression="gzip", compression_opts=3)
+        out_f.create_dataset("label", data=label_13, compression="gzip", compression_opts=3)
+        out_f.create_dataset("label_128", data=label_128, compression="gzip", compression_opts=3)
+        out_f.create_dataset("mini_beat_arr", data=m_beat_arr, compression="gzip", compression_opts=3)
+
+        # Marked at last, thus partially written files are extracted again when resuming.
+        out_f.attrs[_COMPLETE_MARK] = True
+
+
+def _feature_writer(write_queue, write_errors):
+    """Writes out the queued features until receiving ``None``.
+
+    Exceptions are recorded to ``write_errors``, and the remaining items are drained
+    without writing to keep the producer from blocking.
+    """
+    while True:
+        item = write_queue.get()
+        if item is None:
+            break
+        if write_errors:
+            continue
+        try:
+            _write_feature(*item)
+        except Exception as exp:  # pylint: disable=broad-except
+            write_errors.append(exp)
 
 
 def _all_in_one_extract(wav_path, label_path, feat_settings):
@@ -1,7 +1,12 @@
-import pretty_midi
 import numpy as np
 from scipy.signal import find_peaks
 
+from omnizart.midi import note_array, to_pretty_midi
+
+
+#: Track of the inferred drum notes.
+DRUM_TRACKS = [("drums", 1, True)]
+
 
 def get_3inst_ary(inst_13_ary_in):
     inst_3_ary_out = np.zeros_like(inst_13_ary_in)[:, :3]
@@ -12,7 +17,7 @@ def get_3inst_ary(inst_13_ary_in):
     return inst_3_ary_out
 
 
-def inference(pred, m_beat_arr, bass_drum_th=0.85, snare_th=1.2, hihat_th=0.17):
+def inference(pred, m_beat_arr, bass_drum_th=0.85, snare_th=1.2, hihat_th=0.17, as_array=False):
     insts = get_3inst_ary(pred)
 
     norm = lambda x: (x - np.mean(x)) / np.std(x)
@@ -20,17 +25,16 @@ def inference(pred, m_beat_arr, bass_drum_th=0.85, snare_th=1.2, hihat_th=0.17):
     snare_act, _ = find_peaks(norm(insts[:, 1]), height=snare_th, distance=1)
     hihat_act, _ = find_peaks(norm(insts[:, 2]), height=hihat_th, distance=1)
 
-    drum_inst = pretty_midi.Instrument(program=1, is_drum=True, name="drums")
-
-    def register_notes(act_list, pitch):
-        for onset in m_beat_arr[act_list]:
-            note = pretty_midi.Note(velocity=100, pitch=pitch, start=onset, end=onset + 0.05)
-            drum_inst.notes.append(note)
-
-    register_notes(bass_drum_act, pitch=35)
-    register_notes(snare_act, pitch=38)
-    register_notes(hihat_act, pitch=42)
-
-    midi = pretty_midi.PrettyMIDI(initial_tempo=120)
-    midi.instruments.append(drum_inst)
-    return midi
+    onsets = [m_beat_arr[bass_drum_act], m_beat_arr[snare_act], m_beat_arr[hihat_act]]
+    onsets = np.concatenate(onsets)
+    notes = note_array(
+        start=onsets,
+        end=onsets + 0.05,
+        pitch=np.repeat([35, 38, 42], [len(bass_drum_act), len(snare_act), len(hihat_act)]),
+        velocity=100,
+        program=1,
+        is_drum=True
+    )
+    if as_array:
+        return notes
+    return to_pretty_midi(notes, tracks=DRUM_TRACKS)
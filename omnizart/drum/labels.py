@@ -2,6 +2,45 @@ import pretty_midi
 import numpy as np
 
 
+# MIDI drum notes concluded into each of the 13 sub-classes.
+_INST_13_NOTES = [
+    [33, 35, 36],  # Bass drum
+    [27, 38, 40, 85, 87],  # Snare drum
+    [37],  # Side Stick
+    [39],  # Clap
+    [42],  # Closed HH
+    [44],  # Pedal HH
+    [46],  # Open HH
+    [41, 43],  # low-tom
+    [45, 47],  # mid-tom
+    [48, 50],  # high-tom
+    [49, 55, 57],  # Crash
+    [51, 53, 59],  # Ride
+    [69, 70, 82],  # Maracas
+]
+
+#: Mapping from the 128 drum notes to the 13 sub-classes, in shape [128 x 13].
+INST_13_MAPPING = np.zeros([128, 13], dtype=bool)
+for _inst_idx, _notes in enumerate(_INST_13_NOTES):
+    INST_13_MAPPING[_notes, _inst_idx] = True
+
+
+def _mini_beat_range(m_beat_arr):
+    """Boundaries of each mini beat, with len(m_beat_arr) + 1 elements.
+
+    Mini beat i ranges from ``m_beat_range[i]`` to ``m_beat_range[i+1]``. The first and the
+    last mini beats are centered at the beat position, and the others end at the beat position.
+    """
+    m_beat_arr = np.asarray(m_beat_arr)
+    first_half = (m_beat_arr[1] - m_beat_arr[0]) / 2
+    last_half = (m_beat_arr[-1] - m_beat_arr[-2]) / 2
+    return np.concatenate([
+        [m_beat_arr[0] - first_half, m_beat_arr[0] + first_half],
+        m_beat_arr[1:-1],
+        [m_beat_arr[-1] + last_half]
+    ])
+
+
 def extract_label(label_path, m_beat_arr):
     """Extract drum label notes.
 
@@ -25,17 +64,7 @@ def extract_label(label_path, m_beat_arr):
     omnizart.feature.beat_for_drum.extract_mini_beat_from_audio_path:
         The function for extracting mini-beat array from the given audio path.
     """
-    m_beat_range = []
-    start = m_beat_arr[0] - (m_beat_arr[1] - m_beat_arr[0]) / 2
-    end = m_beat_arr[0] + (m_beat_arr[1] - m_beat_arr[0]) / 2
-    m_beat_range.append(start)
-    m_beat_range.append(end)
-    for idx, beat in enumerate(m_beat_arr[1:-1]):
-        end = beat + (m_beat_arr[idx+1] - beat) / 2  # noqa: E226
-        m_beat_range.append(end)
-    end = m_beat_arr[-1] + (m_beat_arr[-1] - m_beat_arr[-2]) / 2
-    m_beat_range.append(end)
-    m_beat_range = np.array(m_beat_range)
+    m_beat_range = _mini_beat_range(m_beat_arr)
 
     midi = pretty_midi.PrettyMIDI(label_path)
     notes = np.array([
@@ -43,12 +72,14 @@ def extract_label(label_path, m_beat_arr):
         for inst in midi.instruments
         for nn in inst.notes
         if inst.is_drum
-    ])
+    ]).reshape(-1, 2)
+
+    # Index of the mini beat that each note starts in.
+    beat_idx = np.searchsorted(m_beat_range, notes[:, 0], side="right") - 1
+    valid = (beat_idx >= 0) & (beat_idx < len(m_beat_range) - 1)
+
     drum_track_ary = np.zeros([len(m_beat_arr), 128])
-    for idx, beat in enumerate(m_beat_range[:-1]):
-        for note in notes:
-            if beat <= note[0] < m_beat_range[idx+1]:  # noqa: E226
-                drum_track_ary[idx, int(note[1])] = 1.0
+    drum_track_ary[beat_idx[valid], notes[valid, 1].astype(int)] = 1.0
     return drum_track_ary
 
 
@@ -79,18 +110,8 @@ def extract_label_13_inst(label_path, m_beat_arr):
     """
     label = extract_label(label_path, m_beat_arr)
 
-    inst_ary_out = np.zeros([len(label), 13]).astype(np.float32)
-    inst_ary_out[:, 0] = np.max(label[:, [33, 35, 36]], axis=1)  # Bass drum
-    inst_ary_out[:, 1] = np.max(label[:, [27, 38, 40, 85, 87]], axis=1)  # Snare drum
-    inst_ary_out[:, 2] = np.max(label[:, [37]], axis=1)  # Side Stick
-    inst_ary_out[:, 3] = np.max(label[:, [39]], axis=1)  # Clap
-    inst_ary_out[:, 4] = np.max(label[:, [42]], axis=1)  # Closed HH
-    inst_ary_out[:, 5] = np.max(label[:, [44]], axis=1)  # Pedal HH
-    inst_ary_out[:, 6] = np.max(label[:, [46]], axis=1)  # Open HH
-    inst_ary_out[:, 7] = np.max(label[:, [41, 43]], axis=1)  # low-tom
-    inst_ary_out[:, 8] = np.max(label[:, [45, 47]], axis=1)  # mid-tom
-    inst_ary_out[:, 9] = np.max(label[:, [48, 50]], axis=1)  # high-tom
-    inst_ary_out[:, 10] = np.max(label[:, [49, 55, 57]], axis=1)  # Crash
-    inst_ary_out[:, 11] = np.max(label[:, [51, 53, 59]], axis=1)  # Ride
-    inst_ary_out[:, 12] = np.max(label[:, [69, 70, 82]], axis=1)  # Maracas
+    # Columns of the notes grouped by sub-class, and the first column of each group.
+    inst_idx, note_idx = np.nonzero(INST_13_MAPPING.T)
+    group_start = np.flatnonzero(np.diff(inst_idx, prepend=-1))
+    inst_ary_out = np.maximum.reduceat(label[:, note_idx], group_start, axis=1).astype(np.float32)
     return label, inst_ary_out
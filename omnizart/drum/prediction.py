@@ -7,6 +7,54 @@ from omnizart.utils import get_logger
 logger = get_logger("Drum Prediction")
 
 
+def _segment_view(feature, mini_beat_per_seg):
+    """Sliding segments of the feature, as a read-only strided view.
+
+    The segment starting at each mini beat is of shape [time x freq x mini_beat_per_seg].
+    The axis permutation is folded into the strides, thus no copy is made.
+    """
+    assert (len(feature.shape) == 3), f"Invalid feature shape: {feature.shape}. Should be three dimensional."
+
+    # Pad zeros to the end of the feature if not long enough.
+    if len(feature) < mini_beat_per_seg:
+        pad_len = mini_beat_per_seg - len(feature)
+        pads = np.zeros((pad_len, *feature.shape[1:]))
+        feature = np.concatenate([feature, pads])
+
+    hops = len(feature) - mini_beat_per_seg + 1
+    strides = feature.strides
+    return np.lib.stride_tricks.as_strided(
+        feature,
+        shape=(hops, *feature.shape[1:], mini_beat_per_seg),
+        strides=(strides[0], strides[1], strides[2], strides[0]),
+        writeable=False
+    )
+
+
+def iter_batches(feature, mini_beat_per_seg, b_size=6):
+    """Yields batches of the sliding segments for model prediction.
+
+    Parameters
+    ----------
+    feature: 3D numpy array
+        Should be in shape [mini_beat_pos x time x freq].
+    mini_beat_per_seg: int
+        Number of mini beats in one segment (a beat).
+    b_size: int
+        Output batch size. The last batch could be smaller.
+
+    Yields
+    ------
+    start_idx: int
+        Index of the first segment of the batch.
+    batch: 4D numpy array
+        Read-only view of shape [b_size x time x freq x mini_beat_per_seg].
+    """
+    segments = _segment_view(feature, mini_beat_per_seg)
+    for start_idx in range(0, len(segments), b_size):
+        yield start_idx, segments[start_idx:start_idx + b_size]
+
+
 def create_batches(feature, mini_beat_per_seg, b_size=6):
     """Create a 4D input for model prediction.
 
@@ -25,32 +73,25 @@ def create_batches(feature, mini_beat_per_seg, b_size=6):
         Dimensions are [batches x b_size x time x freq x mini_beat_per_seg].
     pad_size: int
         The additional padded size at the end of the batch.
-    """
-    assert (len(feature.shape) == 3), f"Invalid feature shape: {feature.shape}. Should be three dimensional."
 
-    # Pad zeros to the end of the feature if not long enough.
-    if len(feature) < mini_beat_per_seg:
-        pad_len = mini_beat_per_seg - len(feature)
-        pads = np.zeros((pad_len, *feature.shape[1:]))
-        feature = np.concatenate([feature, pads])
-
-    hops = len(feature) - mini_beat_per_seg + 1
-    hop_list = []
-    for idx in range(hops):
-        feat = feature[idx:idx + mini_beat_per_seg]
-        hop_list.append(np.transpose(feat, axes=[1, 2, 0]))
-
-    total_batches = int(np.ceil(len(hop_list) / b_size))
-    batch_feature = []
-    for idx in range(total_batches):
-        batch_feature.append(hop_list[idx * b_size:(idx+1) * b_size])  # noqa: E226
+    See Also
+    --------
+    omnizart.drum.prediction.iter_batches: Memory-efficient version of this function.
+    """
+    segments = _segment_view(feature, mini_beat_per_seg)
+    pad_size = b_size - ((len(segments) - 1) % b_size + 1)
+    pads = np.zeros((pad_size, *segments.shape[1:]), dtype=segments.dtype)
+    batch_feature = np.concatenate([segments, pads])
+    return batch_feature.reshape(-1, b_size, *segments.shape[1:]), pad_size
 
-    zero_feat = np.zeros_like(hop_list[0])
-    pad_size = b_size - len(batch_feature[-1])
-    for _ in range(pad_size):
-        batch_feature[-1].append(zero_feat)
 
-    return np.array(batch_feature), pad_size
+def _overlap_add(pred, counts, start_idx, batch_pred):
+    """Accumulates the batched prediction of shape [b_size x out_classes x mini_beat_per_seg x 1]."""
+    steps = np.transpose(batch_pred[..., 0], axes=[0, 2, 1])
+    b_size, mini_beat_per_seg = steps.shape[:2]
+    frame_idx = start_idx + np.arange(b_size)[:, np.newaxis] + np.arange(mini_beat_per_seg)
+    np.add.at(pred, frame_idx, steps)
+    np.add.at(counts, frame_idx, 1)
 
 
 def merge_batches(batch_pred):
@@ -62,28 +103,27 @@ def merge_batches(batch_pred):
     assert batch_pred.shape[-1] == 1
 
     logger.debug("Batch prediction shape: %s", batch_pred.shape)
-    batch_pred = np.transpose(batch_pred, axes=[0, 1, 3, 2, 4])
-    batches, b_size, mini_beat_per_seg, out_classes = batch_pred.shape[:4]
+    batches, b_size, out_classes, mini_beat_per_seg = batch_pred.shape[:4]
     pred = np.zeros((batches*b_size + mini_beat_per_seg - 1, out_classes))  # noqa: E226
-    for b_idx, batch in enumerate(batch_pred):
-        for s_idx, step in enumerate(batch):
-            start_idx = b_idx*b_size + s_idx  # noqa: E226
-            end_idx = start_idx + mini_beat_per_seg
-            pred[start_idx:end_idx] += step.squeeze()
-
-    max_len = min(mini_beat_per_seg - 1, len(pred) - mini_beat_per_seg)
-    pred[max_len:-max_len] /= max_len + 1
-    for idx in range(max_len):
-        pred[idx] /= idx + 1
-        pred[-1 - idx] /= idx + 1
-    return pred
+    counts = np.zeros((len(pred), 1))
+    _overlap_add(pred, counts, 0, batch_pred.reshape(-1, *batch_pred.shape[2:]))
+    return pred / counts
 
 
 def predict(patch_cqt_feature, model, mini_beat_per_seg, batch_size=32):
-    batches, pad_size = create_batches(patch_cqt_feature, mini_beat_per_seg, b_size=batch_size)
-    batch_pred = []
-    for idx, batch in enumerate(batches):
-        print(f"{idx+1}/{len(batches)}", end="\r")
-        batch_pred.append(model.predict(batch))
-    pred = merge_batches(np.array(batch_pred))
-    return pred[:-pad_size]   # Remove padding
+    """Predicts the drum activations, with segments streamed to the model batch by batch.
+
+    Overlapped predictions of the segments are averaged, and only one batch of the
+    segments is materialized at a time.
+    """
+    total_segments = max(len(patch_cqt_feature) - mini_beat_per_seg + 1, 1)
+    total_batches = int(np.ceil(total_segments / batch_size))
+    pred, counts = None, None
+    for idx, (start_idx, batch) in enumerate(iter_batches(patch_cqt_feature, mini_beat_per_seg, b_size=batch_size)):
+        print(f"{idx+1}/{total_batches}", end="\r")
+        batch_pred = np.asarray(model.predict_on_batch(batch))
+        if pred is None:
+            pred = np.zeros((total_segments + mini_beat_per_seg - 1, batch_pred.shape[1]))
+            counts = np.zeros((len(pred), 1))
+        _overlap_add(pred, counts, start_idx, batch_pred)
+    return pred / counts
@@ -354,7 +354,7 @@ def extract_vocal_cfp(filename, down_fs=16000, **kwargs):
 def extract_patch_cfp(
     filename,
     patch_size=25,
-    threshold=0.5,
+    threshold=None,
     hop=0.02,  # in seconds
     win_size=2049,
     fr=2.0,
@@ -374,7 +374,8 @@ def extract_patch_cfp(
     patch_size: int
         Height and width of each feature patch.
     threshold: float
-        Threshold for determine peaks.
+        Deprecated and has no effect. Patches are extracted around all the spectral peaks,
+        without thresholding, which is also how the peaks were always selected.
     hop: float
         Hop size in seconds, with regard to the sampling rate.
     win_size: int
@@ -408,6 +409,9 @@ def extract_patch_cfp(
     cenf: list[float]
         Records the corresponding center frequencies of the frequency dimension.
     """
+    if threshold is not None:
+        logger.warning("The 'threshold' parameter is deprecated and has no effect on the extracted patches.")
+
     logger.debug("Extracting CFP feature")
     Z, _, _, _, cenf = extract_cfp(
         filename,
@@ -422,29 +426,79 @@ def extract_patch_cfp(
         max_sample=max_sample
     )
 
-    half_ps = patch_size // 2
-    pad_z = np.pad(Z, ((0, half_ps), (half_ps, half_ps)), constant_values=0)  # feat x time
-    feat_dim, _ = pad_z.shape
-
-    max_len = 300000
-    data = np.zeros([max_len, patch_size, patch_size])
-    mapping = np.zeros([max_len, 2])
-    counter = 0
-    for tidx in range(half_ps, pad_z.shape[1] - half_ps):
-        _, locs = _find_peaks(pad_z[:, tidx], threshold=threshold)
-        for idx in locs:
-            if (half_ps <= idx < feat_dim - half_ps) and (counter < max_len):
-                prange = range(idx - half_ps, idx + half_ps + 1)
-                trange = range(tidx - half_ps, tidx + half_ps + 1)
-                patch = pad_z[np.ix_(prange, trange)]
-                data[counter, :, :] = patch.reshape(1, patch_size, patch_size)
-                mapping[counter] = np.array([idx, tidx - half_ps])
-                counter += 1
-            elif (half_ps <= idx < feat_dim - half_ps) and (counter >= max_len):
-                logger.error("The given audio is too long. Please clip the audio.")
+    batches = list(iter_patch_cfp(Z, patch_size=patch_size))
+    data = np.concatenate([batch[0] for batch in batches]) if batches else np.zeros((0, patch_size, patch_size))
+    mapping = np.concatenate([batch[1] for batch in batches]) if batches else np.zeros((0, 2))
 
     # Remove padding
-    data = data[:counter - 1][half_ps:-half_ps]
-    mapping = mapping[:counter - 1][half_ps:-half_ps]
-    pad_z = pad_z[:-half_ps, half_ps:-half_ps]
-    return data, mapping, pad_z, cenf
+    half_ps = patch_size // 2
+    data = data[:-1][half_ps:-half_ps]
+    mapping = mapping[:-1][half_ps:-half_ps]
+    return data, mapping, Z, cenf
+
+
+def iter_patch_cfp(Z, patch_size=25, batch_size=4096, block_size=1000):
+    """Iterates through the patches around the spectral peaks of the CFP feature.
+
+    Patches are extracted block by block of frames, and yielded in batches of
+    fixed size (except the last one), ordered by the time and frequency index.
+
+    Parameters
+    ----------
+    Z: 2D numpy array
+        The CFP feature. Dim: freq x time
+    patch_size: int
+        Height and width of each feature patch.
+    batch_size: int
+        Number of patches of each batch.
+    block_size: int
+        Number of frames to be processed at once.
+
+    Yields
+    ------
+    patch: 3D numpy array
+        Batch of float32 patches, having dimension of batch_size x patch_size x patch_size.
+    mapping: 2D numpy array
+        The frequency and time index of each patch, having dimension of batch_size x 2.
+    """
+    half_ps = patch_size // 2
+    pad_z = np.pad(Z, ((0, half_ps), (half_ps, half_ps)), constant_values=0).astype(np.float32)  # feat x time
+    feat_dim, time_dim = pad_z.shape
+
+    # View of all the patches, indexed by the top-left position of each patch.
+    st0, st1 = pad_z.strides
+    windows = np.lib.stride_tricks.as_strided(
+        pad_z,
+        shape=(feat_dim - patch_size + 1, time_dim - patch_size + 1, patch_size, patch_size),
+        strides=(st0, st1, st0, st1),
+        writeable=False
+    )
+
+    pending_patches, pending_mapping, pending_len = [], [], 0
+    for start in range(0, Z.shape[1], block_size):
+        block = pad_z[:, start + half_ps:min(start + block_size, Z.shape[1]) + half_ps]
+
+        # Local maximums along the frequency axis.
+        is_peak = (block[1:-1] > block[:-2]) & (block[1:-1] > block[2:])
+        is_peak[:half_ps - 1] = False
+        is_peak[feat_dim - half_ps - 1:] = False
+        tidx, fidx = np.nonzero(is_peak.T)
+        tidx += start
+        fidx += 1
+
+        pending_patches.append(windows[fidx - half_ps, tidx])
+        pending_mapping.append(np.stack([fidx, tidx], axis=1).astype(np.float64))
+        pending_len += len(tidx)
+        if pending_len < batch_size:
+            continue
+
+        patches = np.concatenate(pending_patches)
+        mapping = np.concatenate(pending_mapping)
+        num_full = len(patches) - len(patches) % batch_size
+        for idx in range(0, num_full, batch_size):
+            yield patches[idx:idx + batch_size], mapping[idx:idx + batch_size]
+        pending_patches, pending_mapping = [patches[num_full:]], [mapping[num_full:]]
+        pending_len = len(patches) - num_full
+
+    if pending_len > 0:
+        yield np.concatenate(pending_patches), np.concatenate(pending_mapping)
@@ -1,4 +1,5 @@
 import vamp
+import numpy as np
 
 from omnizart.io import load_audio
 
@@ -78,3 +79,36 @@ def extract_chroma(
         data, rate, "nnls-chroma:nnls-chroma", output=output_type, parameters=params
     )["matrix"]
     return step_size.to_float(), chroma
+
+
+def segment_view(feature, segment_width=21, segment_hop=1):
+    """Segments of the nearby frames centered at every ``segment_hop`` frames.
+
+    Each segment concatenates ``segment_width`` frames of the zero-padded feature to the
+    feature axis. Since the frames of a segment are contiguous in memory, segments are
+    returned as a read-only strided view without copying.
+
+    Parameters
+    ----------
+    feature: 2D numpy array
+        Feature in shape [time x freq], e.g. the chroma.
+    segment_width: int
+        Number of frames of each segment. Should be odd.
+    segment_hop: int
+        Hop size between the centers of two segments.
+
+    Returns
+    -------
+    segments: 2D numpy array
+        View of shape [segments x (segment_width * freq)].
+    """
+    pad_size = segment_width // 2
+    feat_pad = np.pad(feature, ((pad_size, pad_size), (0, 0)), constant_values=0)
+    num_segments = len(range(0, len(feature), segment_hop))
+    st0, st1 = feat_pad.strides
+    return np.lib.stride_tricks.as_strided(
+        feat_pad,
+        shape=(num_segments, (2*pad_size + 1) * feature.shape[1]),  # noqa: E226
+        strides=(st0 * segment_hop, st1),
+        writeable=False
+    )
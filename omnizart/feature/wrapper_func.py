@@ -78,12 +78,7 @@ def extract_patch_cqt(audio_path, sampling_rate=44100, hop_size=256):
 def extract_chord_chroma(audio_path, segment_width=21, segment_hop=5, num_steps=100):
     _, chroma = chrom.extract_chroma(audio_path)
 
-    pad_size = segment_width // 2
-    chroma_pad = np.pad(chroma, ((pad_size, pad_size), (0, 0)), constant_values=0)
-    segments = np.array([
-        chroma_pad[i-pad_size:i+pad_size+1] for i in range(pad_size, pad_size+len(chroma), segment_hop)  # noqa:E226
-    ])
-    segments = segments.reshape([-1, segment_width * chroma.shape[1]])
+    segments = chrom.segment_view(chroma, segment_width=segment_width, segment_hop=segment_hop)
 
     pad_size = 0 if len(segments)/num_steps == 0 else num_steps - len(segments)%num_steps  # noqa:E226,E228
     if pad_size != 0:
@@ -1,11 +1,12 @@
 import os
-import csv
 import pickle
 
 import yaml
 import librosa
+import numpy as np
 
 from omnizart.utils import ensure_path_exists, LazyLoader, get_logger
+from omnizart.contour import F0_SEGMENT_DTYPE
 
 
 # Lazy load the Spleeter pacakge for avoiding pulling large dependencies
@@ -126,8 +127,9 @@ def write_agg_f0_results(agg_f0, output_path):
 
     Parameters
     ----------
-    agg_f0: list[dict]
-        List of aggregated F0 information.
+    agg_f0: list[dict] or structured numpy array
+        Aggregated F0 information, either as a list of dicts, or the segment array of
+        ``omnizart.contour.F0_SEGMENT_DTYPE``.
     output_path: Path
         Path for output the CSV file. Should contain the file name.
 
@@ -135,14 +137,18 @@ def write_agg_f0_results(agg_f0, output_path):
     --------
     omnizart.utils.aggregate_f0_info:
         The function for generating the aggregated F0 information.
+    omnizart.contour.f0_segments:
+        The function for generating the segment array.
     """
-    fieldnames = ["start_time", "end_time", "frequency", "pitch"]
-
-    # Check the format is correct
-    if any(list(row.keys()) != fieldnames for row in agg_f0):
+    fieldnames = list(F0_SEGMENT_DTYPE.names)
+
+    if not isinstance(agg_f0, np.ndarray):
+        # Check the format is correct
+        if any(list(row.keys()) != fieldnames for row in agg_f0):
+            raise ValueError(f"Fields inconsistent! Expected: {fieldnames}")
+        agg_f0 = np.array([tuple(row.values()) for row in agg_f0], dtype=F0_SEGMENT_DTYPE)
+    elif agg_f0.dtype.names != F0_SEGMENT_DTYPE.names:
         raise ValueError(f"Fields inconsistent! Expected: {fieldnames}")
 
-    with open(output_path, "w") as out:
-        writer = csv.DictWriter(out, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(agg_f0)
+    columns = np.column_stack([agg_f0[name] for name in fieldnames])
+    np.savetxt(output_path, columns, fmt="%.6f", delimiter=",", header=",".join(fieldnames), comments="")
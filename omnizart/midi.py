@@ -0,0 +1,233 @@
+"""Compact note-array representation of the transcription results.
+
+Transcribed notes are stored as a structured numpy array of :data:`NOTE_DTYPE`,
+one row per note, instead of one ``pretty_midi.Note`` object per note. The
+array can be serialized to a standard MIDI file directly with :func:`write_midi`,
+and converted to ``pretty_midi.PrettyMIDI`` with :func:`to_pretty_midi` for
+compatibility.
+
+Notes are grouped into MIDI tracks by the ``track`` field. The name, program,
+and drum flag of each track can be given as a list of ``(name, program, is_drum)``
+tuples, where the i-th tuple describes the track of index i. If not given,
+tracks are derived from the notes with empty names.
+
+Examples
+--------
+.. code-block:: python
+
+    >>> from omnizart.midi import note_array, write_midi, to_pretty_midi
+    >>> notes = note_array(start=[0, 0.5], end=[0.5, 1], pitch=[60, 64], velocity=100)
+    >>> write_midi(notes, "out.mid")
+    >>> midi = to_pretty_midi(notes)
+"""
+
+import numpy as np
+import pretty_midi
+
+
+#: Data type of the note array.
+NOTE_DTYPE = np.dtype([
+    ("start", np.float64),
+    ("end", np.float64),
+    ("pitch", np.uint8),
+    ("velocity", np.uint8),
+    ("program", np.uint8),
+    ("is_drum", np.bool_),
+    ("track", np.uint8),
+])
+
+#: Default initial tempo and resolution, same as ``pretty_midi.PrettyMIDI``.
+INITIAL_TEMPO = 120.0
+RESOLUTION = 220
+
+# MIDI channels for the non-drum tracks, assigned in the same way as pretty_midi.
+_CHANNELS = [ch for ch in range(16) if ch != 9]
+_DRUM_CHANNEL = 9
+
+
+def note_array(start, end, pitch, velocity=100, program=0, is_drum=False, track=0):
+    """Constructs the note array. Parameters are broadcasted against each other."""
+    fields = np.broadcast_arrays(
+        *[np.atleast_1d(val) for val in [start, end, pitch, velocity, program, is_drum, track]]
+    )
+    notes = np.empty(fields[0].shape, dtype=NOTE_DTYPE)
+    for name, val in zip(NOTE_DTYPE.names, fields):
+        notes[name] = val
+    return notes
+
+
+def resolve_tracks(notes, tracks=None):
+    """Returns the ``(name, program, is_drum)`` of each track."""
+    if tracks is not None:
+        return list(tracks)
+
+    total_tracks = int(notes["track"].max()) + 1 if len(notes) > 0 else 0
+    resolved = [("", 0, False)] * total_tracks
+    track_ids, first_idx = np.unique(notes["track"], return_index=True)
+    for track_idx, note_idx in zip(track_ids, first_idx):
+        resolved[track_idx] = ("", int(notes["program"][note_idx]), bool(notes["is_drum"][note_idx]))
+    return resolved
+
+
+def to_pretty_midi(notes, tracks=None, initial_tempo=INITIAL_TEMPO):
+    """Converts the note array to ``pretty_midi.PrettyMIDI``.
+
+    Parameters
+    ----------
+    notes: structured numpy array
+        The note array of :data:`NOTE_DTYPE`.
+    tracks: list[tuple[str, int, bool]]
+        The name, program, and drum flag of each track.
+    initial_tempo: float
+        Initial tempo of the MIDI.
+
+    Returns
+    -------
+    midi: pretty_midi.PrettyMIDI
+        Each track is converted to one instrument.
+    """
+    midi = pretty_midi.PrettyMIDI(initial_tempo=initial_tempo)
+    for track_idx, (name, program, is_drum) in enumerate(resolve_tracks(notes, tracks)):
+        inst = pretty_midi.Instrument(program=program, is_drum=is_drum, name=name)
+        t_notes = notes[notes["track"] == track_idx]
+        inst.notes = [
+            pretty_midi.Note(velocity=vel, pitch=pitch, start=start, end=end)
+            for start, end, pitch, vel in zip(
+                t_notes["start"].tolist(), t_notes["end"].tolist(),
+                t_notes["pitch"].tolist(), t_notes["velocity"].tolist()
+            )
+        ]
+        midi.instruments.append(inst)
+    return midi
+
+
+def from_pretty_midi(midi):
+    """Converts ``pretty_midi.PrettyMIDI`` to the note array.
+
+    Returns
+    -------
+    notes: structured numpy array
+        The note array of :data:`NOTE_DTYPE`.
+    tracks: list[tuple[str, int, bool]]
+        The name, program, and drum flag of each instrument.
+    """
+    notes = [
+        note_array(
+            start=[nn.start for nn in inst.notes],
+            end=[nn.end for nn in inst.notes],
+            pitch=[nn.pitch for nn in inst.notes],
+            velocity=[nn.velocity for nn in inst.notes],
+            program=inst.program,
+            is_drum=inst.is_drum,
+            track=idx
+        ) for idx, inst in enumerate(midi.instruments)
+    ]
+    tracks = [(inst.name, int(inst.program), bool(inst.is_drum)) for inst in midi.instruments]
+    notes = np.concatenate(notes) if len(notes) > 0 else np.zeros(0, dtype=NOTE_DTYPE)
+    return notes, tracks
+
+
+def _var_len(values):
+    """Encodes values as MIDI variable-length quantities.
+
+    Returns the (N x 4) bytes and the mask of the valid bytes of each value.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    shifts = np.array([21, 14, 7, 0])
+    encoded = (values[:, None] >> shifts) & 0x7F
+    encoded[:, :3] |= 0x80
+    nbytes = 1 + (values >= 1 << 7) + (values >= 1 << 14) + (values >= 1 << 21)
+    mask = np.arange(4) >= 4 - nbytes[:, None]
+    return encoded.astype(np.uint8), mask
+
+
+def _chunk(name, data):
+    return name + len(data).to_bytes(4, "big") + bytes(data)
+
+
+def _meta(meta_type, data):
+    return bytes([0, 0xFF, meta_type]) + _var_len_bytes(len(data)) + data
+
+
+def _var_len_bytes(value):
+    encoded, mask = _var_len([value])
+    return encoded[mask].tobytes()
+
+
+def _track_chunk(notes, name, program, channel, tick_scale):
+    data = bytearray()
+    if name:
+        data += _meta(0x03, name.encode("latin1"))
+    data += bytes([0, 0xC0 | channel, program])
+
+    if len(notes) > 0:
+        ticks = np.round(np.concatenate([notes["start"], notes["end"]]) / tick_scale).astype(np.int64)
+        pitches = np.concatenate([notes["pitch"], notes["pitch"]])
+        velocities = np.concatenate([notes["velocity"], np.zeros(len(notes), dtype=np.uint8)])
+
+        # Sort by tick, then pitch, then velocity, so that note-offs precede note-ons of the same pitch.
+        order = np.lexsort((velocities, pitches, ticks))
+        ticks, pitches, velocities = ticks[order], pitches[order], velocities[order]
+
+        # Each event: delta time, status (only the first one due to running status), pitch, velocity.
+        delta, delta_mask = _var_len(np.diff(ticks, prepend=0))
+        events = np.zeros((len(ticks), 7), dtype=np.uint8)
+        events[:, :4] = delta
+        events[:, 4] = 0x90 | channel
+        events[:, 5] = pitches
+        events[:, 6] = velocities
+        mask = np.ones_like(events, dtype=bool)
+        mask[:, :4] = delta_mask
+        mask[1:, 4] = False
+        data += events[mask].tobytes()
+
+    data += bytes([1, 0xFF, 0x2F, 0])
+    return _chunk(b"MTrk", data)
+
+
+def midi_bytes(notes, tracks=None, initial_tempo=INITIAL_TEMPO, resolution=RESOLUTION):
+    """Serializes the note array into the content of a standard MIDI file.
+
+    The output is the same as writing the result of :func:`to_pretty_midi`
+    with ``pretty_midi.PrettyMIDI.write``, without constructing any note or
+    message object.
+
+    Parameters
+    ----------
+    notes: structured numpy array
+        The note array of :data:`NOTE_DTYPE`.
+    tracks: list[tuple[str, int, bool]]
+        The name, program, and drum flag of each track.
+    initial_tempo: float
+        Tempo of the MIDI.
+    resolution: int
+        Ticks per quarter note.
+
+    Returns
+    -------
+    content: bytes
+        Content of the MIDI file.
+    """
+    tracks = resolve_tracks(notes, tracks)
+    tick_scale = 60.0 / (initial_tempo * resolution)
+    tempo = int(6e7 / (60. / (tick_scale*resolution)))  # noqa: E226
+
+    # Format 1, with an additional track for the timing information.
+    header = _chunk(b"MThd", b"".join(val.to_bytes(2, "big") for val in [1, len(tracks) + 1, resolution]))
+    timing_track = _chunk(
+        b"MTrk",
+        _meta(0x51, tempo.to_bytes(3, "big")) + _meta(0x58, bytes([4, 2, 24, 8])) + bytes([1, 0xFF, 0x2F, 0])
+    )
+
+    chunks = [header, timing_track]
+    for track_idx, (name, program, is_drum) in enumerate(tracks):
+        channel = _DRUM_CHANNEL if is_drum else _CHANNELS[track_idx % len(_CHANNELS)]
+        t_notes = notes[notes["track"] == track_idx]
+        chunks.append(_track_chunk(t_notes, name, program, channel, tick_scale))
+    return b"".join(chunks)
+
+
+def write_midi(notes, output, tracks=None, initial_tempo=INITIAL_TEMPO, resolution=RESOLUTION):
+    """Writes the note array to a MIDI file. See :func:`midi_bytes` for the parameters."""
+    with open(output, "wb") as out:
+        out.write(midi_bytes(notes, tracks=tracks, initial_tempo=initial_tempo, resolution=resolution))
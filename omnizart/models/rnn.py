@@ -1,3 +1,4 @@
+import numpy as np
 import tensorflow as tf
 
 from omnizart.models.t2t import MultiHeadAttention
@@ -42,6 +43,90 @@ def blstm_attn(timesteps=1200, input_dim=178, lstm_hidden_dim=25, num_lstm_layer
     return tf.keras.Model(inputs=inputs, outputs=out)
 
 
+class ChunkedBLSTMInference:
+    """Chunked inference of the ``blstm`` and ``blstm_attn`` models on long sequences.
+
+    Instead of predicting on overlapped windows, the sequence is split into contiguous
+    chunks of ``timesteps`` frames, and each frame is computed only once. For each
+    bidirectional LSTM layer, the forward pass can carry the LSTM state over the
+    chunks, which is equivalent to running through the whole sequence. The backward
+    pass of each chunk starts from the ``look_ahead`` frames after the chunk, with
+    a zero initial state. The layers after the LSTMs are applied on each chunk, as the
+    output dense layers take exactly ``timesteps`` frames.
+
+    Parameters
+    ----------
+    model: tf.keras.Model
+        The model constructed by ``blstm`` or ``blstm_attn``.
+    look_ahead: int
+        Number of frames after each chunk to warm up the backward LSTM. Default to
+        half of the timesteps.
+    carry_state: bool
+        Whether to carry the forward LSTM state over the chunks. If false, each chunk
+        starts from a zero state, which is the same as the training scenario.
+    """
+    def __init__(self, model, look_ahead=None, carry_state=True):
+        self.timesteps = model.input_shape[1]
+        self.look_ahead = self.timesteps // 2 if look_ahead is None else look_ahead
+        self.carry_state = carry_state
+
+        self.layer_norm = _find_layers(model, tf.keras.layers.LayerNormalization)[0]
+        self.bilstms = _find_layers(model, tf.keras.layers.Bidirectional)
+        self.conv = _find_layers(model, tf.keras.layers.Conv1D)
+        self.attn = _find_layers(model, MultiHeadAttention)
+        self.beat_dense, self.down_beat_dense = _find_layers(model, tf.keras.layers.Dense)[-2:]
+
+    def __call__(self, feature, batch_size=64):
+        """Predict on the 2D feature, returns the prediction in shape [len(feature) x 2]."""
+        ori_len = len(feature)
+        num_chunks = int(np.ceil(ori_len / self.timesteps))
+        pad_len = num_chunks * self.timesteps - ori_len
+        seq = np.pad(feature, ((0, pad_len), (0, 0))).astype(np.float32)
+
+        seq = self.layer_norm(seq[np.newaxis])
+        for bilstm in self.bilstms:
+            seq = self._bilstm(bilstm, seq, num_chunks)
+
+        chunks = tf.reshape(seq, [num_chunks, self.timesteps, seq.shape[-1]])
+        pred = [self._head(chunks[idx:idx + batch_size]).numpy() for idx in range(0, num_chunks, batch_size)]
+        return np.concatenate(pred).reshape(-1, 2)[:ori_len]
+
+    def _bilstm(self, bilstm, seq, num_chunks):
+        # Forward pass, with shape [1 x length x dim] if carrying the state, or else [chunks x timesteps x dim].
+        fw_in = seq if self.carry_state else tf.reshape(seq, [num_chunks, self.timesteps, seq.shape[-1]])
+        fw_out = tf.reshape(bilstm.forward_layer(fw_in), [1, -1, bilstm.forward_layer.units])
+
+        # Backward pass on each chunk together with the following look-ahead frames. Windows
+        # near the end of the sequence are left-padded, so the backward LSTM starts right
+        # from the last frame of the sequence.
+        seq_len = num_chunks * self.timesteps
+        win_len = self.timesteps + self.look_ahead
+        chunk_start = np.arange(num_chunks) * self.timesteps
+        left_pad = win_len - (np.minimum(chunk_start + win_len, seq_len) - chunk_start)
+        win_idx = (chunk_start - left_pad)[:, np.newaxis] + np.arange(win_len)
+        win_idx[win_idx < chunk_start[:, np.newaxis]] = seq_len  # Points to the appended zero frame
+        windows = tf.gather(tf.pad(seq[0], [[0, 1], [0, 0]]), win_idx)
+
+        bw_out = tf.reverse(bilstm.backward_layer(windows), axis=[1])
+        out_idx = left_pad[:, np.newaxis] + np.arange(self.timesteps)
+        bw_out = tf.reshape(tf.gather(bw_out, out_idx, batch_dims=1), [1, -1, bilstm.backward_layer.units])
+        return tf.concat([fw_out, bw_out], axis=-1)
+
+    @tf.function
+    def _head(self, chunks):
+        out = chunks
+        for conv in self.conv:
+            out = conv(out)
+        for attn in self.attn:
+            out = attn(out, out, out)
+        out = tf.reshape(out, [tf.shape(out)[0], -1])
+        return tf.stack([self.beat_dense(out), self.down_beat_dense(out)], axis=2)
+
+
+def _find_layers(model, layer_type):
+    return [layer for layer in model.layers if isinstance(layer, layer_type)]
+
+
 if __name__ == "__main__":
     inputs = tf.random.normal([3, 1200, 178])
     model = blstm_attn()
@@ -2,6 +2,7 @@
 
 # pylint: disable=C0103,R0914,R0915,W0221
 
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras import Input, Model
 from tensorflow.keras.layers import (
@@ -16,6 +17,11 @@ from tensorflow.keras.layers import (
 from omnizart.models.t2t import local_attention_2d, split_heads_2d, combine_heads_2d
 
 
+#: Total down-sampling rate of the encoder along the time axis. The input length
+#: of the fully-convolutional inference should be a multiple of this value.
+DOWNSAMPLE_RATE = 2**4
+
+
 def conv_block(input_tensor, channel, kernel_size, strides=(2, 2), dilation_rate=1, dropout_rate=0.4):
     """Convolutional encoder block of U-net.
 
@@ -287,3 +293,81 @@ def semantic_segmentation_attn(feature_num=352, timesteps=256, ch_num=1, out_cla
     out = Conv2D(out_class, (1, 1), strides=(1, 1), padding="same", name="prediction")(de_l4)
 
     return Model(inputs=input_score, outputs=out)
+
+
+def to_variable_length(model, custom_objects=None):
+    """Rebuilds the U-net model with a variable-length time dimension.
+
+    The models are fully-convolutional along the time axis, so the weights trained with
+    a fixed ``timesteps`` can be applied on inputs of any length that is a multiple of
+    ``DOWNSAMPLE_RATE``.
+
+    Parameters
+    ----------
+    model: tf.keras.Model
+        The loaded model built by ``semantic_segmentation`` or ``semantic_segmentation_attn``.
+    custom_objects: dict
+        Custom layers of the model.
+
+    Returns
+    -------
+    model: tf.keras.Model
+        The model with input shape [batch x None x feature_num x channels].
+    """
+    if model.input_shape[1] is None:
+        return model
+
+    config = model.get_config()
+    for layer in config["layers"]:
+        if layer["class_name"] == "InputLayer":
+            shape = list(layer["config"]["batch_input_shape"])
+            shape[1] = None
+            layer["config"]["batch_input_shape"] = tuple(shape)
+
+    var_model = Model.from_config(config, custom_objects=custom_objects)
+    var_model.set_weights(model.get_weights())
+    return var_model
+
+
+def predict_on_tiles(feature, model, tile_size=1024, context=128, batch_size=1):
+    """Makes predictions of the whole feature with a variable-length U-net model.
+
+    Instead of sliding a fixed-length window with heavy overlapping, the feature is
+    divided into large tiles, and each tile is predicted in a single forward pass.
+    Each tile is extended with ``context`` frames on both sides, which are discarded
+    from the output, so that the tile boundaries are not affected by the zero padding.
+
+    Parameters
+    ----------
+    feature: numpy.ndarray
+        The input feature, with the feature dimension already padded to the input size of
+        the model. Dimension: timesteps x feature_num x channels
+    model: tf.keras.Model
+        Model returned by ``to_variable_length``.
+    tile_size: int
+        Number of frames of each tile. Will be rounded up to a multiple of ``DOWNSAMPLE_RATE``.
+    context: int
+        Number of extended frames on each side of the tile. Will be rounded up to a multiple
+        of ``DOWNSAMPLE_RATE``.
+    batch_size: int
+        Number of tiles of each forward pass.
+
+    Returns
+    -------
+    pred: numpy.ndarray
+        Raw output of the model. Dimension: timesteps x feature_num x out_class
+    """
+    round_up = lambda val: int(np.ceil(val / DOWNSAMPLE_RATE)) * DOWNSAMPLE_RATE
+    tile_size = round_up(min(tile_size, len(feature)))
+    context = round_up(context)
+
+    total_tiles = int(np.ceil(len(feature) / tile_size))
+    pad_end = total_tiles*tile_size - len(feature) + context  # noqa: E226
+    feature = np.pad(feature, ((context, pad_end),) + ((0, 0),) * (feature.ndim - 1))
+
+    tiles = np.array([
+        feature[idx*tile_size:(idx+1)*tile_size + 2*context] for idx in range(total_tiles)  # noqa: E226
+    ])
+    pred = model.predict(tiles, batch_size=batch_size)
+    pred = pred[:, context:context + tile_size]
+    return pred.reshape((-1,) + pred.shape[2:])[:len(feature) - context - pad_end]
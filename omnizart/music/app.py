@@ -19,8 +19,10 @@ import numpy as np
 import tensorflow as tf
 
 from omnizart.feature.wrapper_func import extract_cfp_feature
-from omnizart.models.u_net import MultiHeadAttention, semantic_segmentation, semantic_segmentation_attn
-from omnizart.music.inference import multi_inst_note_inference
+from omnizart.models.u_net import (
+    MultiHeadAttention, semantic_segmentation, semantic_segmentation_attn, to_variable_length
+)
+from omnizart.music.inference import multi_inst_note_inference, instrument_tracks
 from omnizart.music.prediction import predict
 from omnizart.music.labels import (
     LabelType, MaestroLabelExtraction, MapsLabelExtraction, MusicNetLabelExtraction, PopLabelExtraction
@@ -29,6 +31,7 @@ from omnizart.music.losses import focal_loss, smooth_loss
 from omnizart.base import BaseTranscription, BaseDatasetLoader
 from omnizart.utils import get_logger, parallel_generator, ensure_path_exists, resolve_dataset_type
 from omnizart.io import dump_pickle, write_yaml
+from omnizart.midi import to_pretty_midi
 from omnizart.train import get_train_val_feat_file_list
 from omnizart.setting_loaders import MusicSettings
 from omnizart.constants.midi import MUSICNET_INSTRUMENT_PROGRAMS, POP_INSTRUMENT_PROGRAMES
@@ -62,7 +65,7 @@ class MusicTranscription(BaseTranscription):
         }
         self.custom_objects = {"MultiHeadAttention": MultiHeadAttention}
 
-    def transcribe(self, input_audio, model_path=None, output="./"):
+    def transcribe(self, input_audio, model_path=None, output="./", cache_dir=None, variable_length=False):
         """Transcribe notes and instruments of the given audio.
 
         This function transcribes notes (onset, duration) of each instruments in the audio.
@@ -77,6 +80,14 @@ class MusicTranscription(BaseTranscription):
             the folder that contains `arch.yaml`, `weights.h5`, and `configuration.yaml`.
         output: Path (optional)
             Path for writing out the transcribed MIDI file. Default to current path.
+        cache_dir: Path (optional)
+            Directory for caching the raw prediction, which can later be re-used by
+            ``reinfer``. Default to the environment variable ``OMNIZART_CACHE_DIR``,
+            and the prediction will not be cached if neither is given.
+        variable_length: bool
+            Whether to predict the whole audio in large tiles with the fully-convolutional
+            model, instead of overlapping fixed-length windows. Much faster, while the
+            results could be slightly different.
 
         Returns
         -------
@@ -90,8 +101,8 @@ class MusicTranscription(BaseTranscription):
         if not os.path.isfile(input_audio):
             raise FileNotFoundError(f"The given audio path does not exist. Path: {input_audio}")
 
-        logger.info("Loading model...")
-        model, model_settings = self._load_model(model_path, custom_objects=self.custom_objects)
+        logger.info("Loading model in background...")
+        model_future, model_settings = self._load_model_in_background(model_path, custom_objects=self.custom_objects)
 
         logger.info("Extracting feature...")
         feature = extract_cfp_feature(
@@ -109,11 +120,62 @@ class MusicTranscription(BaseTranscription):
         )
 
         logger.info("Predicting...")
+        model = model_future.result()
+        if variable_length:
+            model = to_variable_length(model, custom_objects=self.custom_objects)
         channels = [FEATURE_NAME_TO_NUMBER[ch_name] for ch_name in model_settings.training.channels]
         pred = predict(feature[:, :, channels], model)
+        self._cache_prediction(cache_dir, input_audio, model_path, model_settings, pred)
+
+        notes = self._infer(pred, model_settings)
+        tracks = instrument_tracks(notes)
+        self._output_midi(output=output, input_audio=input_audio, midi=notes, tracks=tracks)
+        if os.environ.get("LOG_LEVEL", "") == "debug":
+            dump_pickle({"pred": pred, "feature": feature}, "./debug_pred.pickle")
+
+        logger.info("Transcription finished")
+        return to_pretty_midi(notes, tracks=tracks)
+
+    def reinfer(self, input_audio, model_path=None, output="./", cache_dir=None, **inference_settings):
+        """Infer notes from the cached prediction with different inference settings.
+
+        Feature extraction and model prediction are skipped. The raw prediction should
+        be cached by ``transcribe`` beforehand with the same model.
+
+        Parameters
+        ----------
+        input_audio: Path
+            Path to the wav audio file.
+        model_path: Path
+            Path to the trained model or the transcription mode.
+        output: Path (optional)
+            Path for writing out the transcribed MIDI file. Default to current path.
+        cache_dir: Path (optional)
+            Directory of the cached predictions. Default to ``OMNIZART_CACHE_DIR``.
+        **inference_settings:
+            Overrides the attributes of ``MusicSettings.inference``, e.g. ``onset_th=6``.
 
+        Returns
+        -------
+        midi: pretty_midi.PrettyMIDI
+            The transcribed notes of different instruments.
+
+        See Also
+        --------
+        omnizart.cli.music.reinfer: The coressponding command line entry.
+        """
+        cached, model_settings = self._load_cached_prediction(
+            cache_dir, input_audio, model_path=model_path, inference_settings=inference_settings
+        )
+        notes = self._infer(cached["pred"], model_settings)
+        tracks = instrument_tracks(notes)
+        self._output_midi(output=output, input_audio=input_audio, midi=notes, tracks=tracks)
+        logger.info("Re-inference finished")
+        return to_pretty_midi(notes, tracks=tracks)
+
+    def _infer(self, pred, model_settings):
         logger.info("Infering notes....")
-        midi = multi_inst_note_inference(
+        return multi_inst_note_inference(
             pred,
             mode=model_settings.training.label_type,
             onset_th=model_settings.inference.onset_th,
@@ -122,15 +184,9 @@ class MusicTranscription(BaseTranscription):
             inst_th=model_settings.inference.inst_th,
             t_unit=model_settings.feature.hop_size,
             channel_program_mapping=self.mode_inst_mapping[model_settings.transcription_mode],
+            as_array=True,
         )
 
-        self._output_midi(output=output, input_audio=input_audio, midi=midi)
-        if os.environ.get("LOG_LEVEL", "") == "debug":
-            dump_pickle({"pred": pred, "feature": feature}, "./debug_pred.pickle")
-
-        logger.info("Transcription finished")
-        return midi
-
     def generate_feature(self, dataset_path, music_settings=None, num_threads=4):
         """Extract the feature from the given dataset.
 
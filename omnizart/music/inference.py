@@ -2,7 +2,6 @@
 
 import math
 
-import pretty_midi
 import numpy as np
 from scipy.interpolate import CubicSpline
 from scipy.signal import find_peaks
@@ -10,26 +9,33 @@ from librosa import note_to_midi
 
 from omnizart.constants.midi import MUSICNET_INSTRUMENT_PROGRAMS, MIDI_PROGRAM_NAME_MAPPING
 from omnizart.utils import get_logger
+from omnizart.midi import NOTE_DTYPE, note_array, resolve_tracks, to_pretty_midi
 
 
 logger = get_logger("Music Inference")
 
 
-def roll_down_sample(data, base=88):
+def roll_down_sample(data, base=88, out=None):
     """Down sample feature size for a single pitch.
 
     Down sample the feature size from 354 to 88 for infering the notes.
+    Every ``data.shape[1] / base`` adjacent bins are averaged, and the
+    remaining dimensions (e.g. channels) are kept as is.
 
     Parameters
     ----------
-    data: 2D numpy array
-        The thresholded 2D prediction..
+    data: 2D or 3D numpy array
+        The thresholded prediction. Dimension: [timesteps x pitch (x channels)]
     base
         Should be constant as there are 88 pitches on the piano.
+    out: numpy array (optional)
+        Array for placing the result, which should be of shape [timesteps x base (x channels)].
+        Floating-point inputs keep their precision if not given, e.g. float32
+        predictions are down sampled in float32.
 
     Returns
     -------
-    return_v: 2D numpy array
+    return_v: 2D or 3D numpy array
         Down sampled prediction.
 
     Warnings
@@ -40,16 +46,12 @@ def roll_down_sample(data, base=88):
     total_roll = data.shape[1]
     assert total_roll % base == 0, f"Wrong length: {total_roll}, {total_roll} % {base} should be zero!"
 
-    scale = round(total_roll / base)
-    return_v = np.zeros((len(data), base))
-    for i in range(0, data.shape[1], scale):
-        total = np.sum(data[:, i:i + scale], axis=1)
-        return_v[:, int(i / scale)] = total / scale
+    scale = total_roll // base
+    data = data.reshape(data.shape[0], base, scale, *data.shape[2:])
+    return np.mean(data, axis=2, out=out)
 
-    return return_v
 
-
-def down_sample(pred):
+def down_sample(pred, out=None):
     """Down sample multi-channel predictions along the feature dimension.
 
     Down sample the feature size from 354 to 88 for infering the notes from a multi-channel prediction.
@@ -58,17 +60,15 @@ def down_sample(pred):
     ----------
     pred: 3D numpy array
         Thresholded prediction with multiple channels. Dimension: [timesteps x pitch x instruments]
+    out: 3D numpy array (optional)
+        Array for placing the result. Dimension: [timesteps x 88 x instruments]
 
     Returns
     -------
     d_sample: 3D numpy array
         Down-sampled prediction. Dimension: [timesteps x 88 x instruments]
     """
-    d_sample = roll_down_sample(pred[:, :, 0])
-    for i in range(1, pred.shape[2]):
-        d_sample = np.dstack([d_sample, roll_down_sample(pred[:, :, i])])
-
-    return d_sample
+    return roll_down_sample(pred, out=out)
 
 
 def infer_pitch(pitch, shortest=10, offset_interval=6):
@@ -182,30 +182,30 @@ def find_occur(pitch, t_unit=0.02, min_duration=0.03):
     return note
 
 
-def to_midi(notes, t_unit=0.02):
-    """Translate the intermediate data into final output MIDI file."""
+def to_midi(notes, t_unit=0.02, as_array=False):
+    """Translate the intermediate data into final output MIDI file.
 
-    midi = pretty_midi.PrettyMIDI()
-    piano = pretty_midi.Instrument(program=0)
+    Returns the note array of ``omnizart.midi.NOTE_DTYPE`` if ``as_array`` is True,
+    otherwise a pretty_midi.PrettyMIDI object.
+    """
 
     # Some tricky steps to determine the velocity of the notes
     l_bound, u_bound = find_min_max_stren(notes)
     s_low = 110
     s_up = 127
-    v_map = lambda stren: int(
-        s_low + ((s_up-s_low) * ((u_bound-stren) / (u_bound-l_bound+0.0001)))  # noqa: E226
-    )
+    stren = np.array([note["stren"] for note in notes])
+    velocity = s_low + ((s_up-s_low) * ((u_bound-stren) / (u_bound-l_bound+0.0001)))  # noqa: E226
 
     low_b = note_to_midi("A0")
-    for note in notes:
-        pitch = note["pitch"] + low_b
-        start = note["start"] * t_unit
-        end = note["end"] * t_unit
-        volume = v_map(note["stren"])
-        m_note = pretty_midi.Note(velocity=volume, pitch=pitch, start=start, end=end)
-        piano.notes.append(m_note)
-    midi.instruments.append(piano)
-    return midi
+    out_notes = note_array(
+        start=np.array([note["start"] for note in notes]) * t_unit,
+        end=np.array([note["end"] for note in notes]) * t_unit,
+        pitch=np.array([note["pitch"] for note in notes], dtype=np.int64) + low_b,
+        velocity=velocity.astype(np.int64)
+    )
+    if as_array:
+        return out_notes
+    return to_pretty_midi(out_notes, tracks=[("", 0, False)])
 
 
 def interpolation(data, ori_t_unit=0.02, tar_t_unit=0.01):
@@ -228,26 +228,47 @@ def norm(data):
     return (data - np.mean(data)) / np.std(data)
 
 
-def norm_onset_dura(pred, onset_th, dura_th, interpolate=True, normalize=True):
-    """Normalizes prediction values of onset and duration channel."""
+def prepare_onset_dura(pred, normalize=True):
+    """Interpolates and normalizes the onset and duration channel.
+
+    This is the threshold-independent part of ``norm_onset_dura``, which could be
+    computed once and shared among different thresholds.
 
-    length = len(pred) * 2 if interpolate else len(pred)
-    norm_pred = np.zeros((length, ) + pred.shape[1:])
+    Returns
+    -------
+    norm_onset: 2D numpy array
+        Normalized onset channel with the doubled time resolution.
+    norm_dura: 2D numpy array
+        Normalized duration channel with the doubled time resolution.
+    """
     onset = interpolation(pred[:, :, 2])
     dura = interpolation(pred[:, :, 1])
 
     onset = np.where(onset < dura, 0, onset)
     norm_onset = norm(onset) if normalize else onset
+    norm_dura = norm(dura) if normalize else dura
+    return norm_onset, norm_dura
+
+
+def threshold_onset_dura(norm_onset, norm_dura, onset_th, dura_th, channels=3):
+    """Thresholds the output of ``prepare_onset_dura`` into the 3D prediction."""
+    norm_pred = np.zeros(norm_onset.shape + (channels,))
     onset = np.where(norm_onset < onset_th, 0, norm_onset - onset_th)
     norm_pred[:, :, 2] = onset
 
-    norm_dura = norm(dura) + onset if normalize else dura + onset
+    norm_dura = norm_dura + onset
     dura = np.where(norm_dura < dura_th, 0, norm_dura)
     norm_pred[:, :, 1] = dura
 
     return norm_pred
 
 
+def norm_onset_dura(pred, onset_th, dura_th, interpolate=True, normalize=True):  # pylint: disable=W0613
+    """Normalizes prediction values of onset and duration channel."""
+    norm_onset, norm_dura = prepare_onset_dura(pred, normalize=normalize)
+    return threshold_onset_dura(norm_onset, norm_dura, onset_th, dura_th, channels=pred.shape[2])
+
+
 def norm_split_onset_dura(pred, onset_th, lower_onset_th, split_bound, dura_th, interpolate=True, normalize=True):
     """An advanced version of function for normalizing onset and duration channel.
 
@@ -322,6 +343,7 @@ def note_inference(
     frm_th=1,
     normalize=True,
     t_unit=0.02,
+    as_array=False,
 ):
     if "note" in mode:
         if lower_onset_th is not None:
@@ -339,36 +361,121 @@ def note_inference(
 
         # norm_pred = np.where(norm_pred > 0, norm_pred + 1, 0)
         notes = infer_piece(down_sample(norm_pred), t_unit=0.01)
-        midi = to_midi(notes, t_unit=t_unit / 2)
+        midi = to_midi(notes, t_unit=t_unit / 2, as_array=as_array)
 
     else:
-        ch_num = pred.shape[2]
-        if ch_num == 2:
-            mix = pred[:, :, 1]
-        elif ch_num == 3:
-            mix = (pred[:, :, 1] + pred[:, :, 2]) / 2
-        else:
-            raise ValueError(f"Unknown channel length: {ch_num}")
-
-        prob = norm(mix) if normalize else mix
-        prob = np.where(prob > frm_th, 1, 0)
-        prob = roll_down_sample(prob)
-
-        notes = []
-        for idx in range(prob.shape[1]):
-            p_note = find_occur(prob[:, idx], t_unit=t_unit)
-            for note in p_note:
-                note_info = {
-                    "pitch": idx,
-                    "start": note["onset"],
-                    "end": note["offset"],
-                    "stren": mix[int(note["onset"] * t_unit), idx * 4],
-                }
-                notes.append(note_info)
-        midi = to_midi(notes, t_unit=t_unit)
+        mix, prob = prepare_frame(pred, normalize=normalize)
+        notes = infer_frame(mix, prob, frm_th=frm_th, t_unit=t_unit)
+        midi = to_midi(notes, t_unit=t_unit, as_array=as_array)
     return midi
 
 
+def prepare_frame(pred, normalize=True):
+    """Merges and normalizes the channels for frame-level inference.
+
+    Returns
+    -------
+    mix: 2D numpy array
+        The merged raw prediction.
+    prob: 2D numpy array
+        The normalized ``mix``.
+    """
+    ch_num = pred.shape[2]
+    if ch_num == 2:
+        mix = pred[:, :, 1]
+    elif ch_num == 3:
+        mix = (pred[:, :, 1] + pred[:, :, 2]) / 2
+    else:
+        raise ValueError(f"Unknown channel length: {ch_num}")
+
+    prob = norm(mix) if normalize else mix
+    return mix, prob
+
+
+def infer_frame(mix, prob, frm_th=1, t_unit=0.02):
+    """Infers notes from the output of ``prepare_frame``."""
+    prob = np.where(prob > frm_th, 1, 0)
+    prob = roll_down_sample(prob)
+
+    notes = []
+    for idx in range(prob.shape[1]):
+        p_note = find_occur(prob[:, idx], t_unit=t_unit)
+        for note in p_note:
+            note_info = {
+                "pitch": idx,
+                "start": note["onset"],
+                "end": note["offset"],
+                "stren": mix[int(note["onset"] * t_unit), idx * 4],
+            }
+            notes.append(note_info)
+    return notes
+
+
+def split_instrument_channels(pred, mode="note-stream", normalize=True):
+    """Splits the raw multi-instrument prediction into per-instrument predictions.
+
+    Parameters
+    ----------
+    pred: 3D numpy array
+        Raw prediction of the model.
+    mode: {'note-stream', 'note', 'frame-stream', 'frame', 'true-frame', 'true-frame-stream', 'pop-note-stream'}
+        Inference mode. See ``multi_inst_note_inference`` for more details.
+    normalize: bool
+        Whether to normalize the predictions.
+
+    Returns
+    -------
+    mode: str
+        The resolved inference mode.
+    iters: int
+        Number of instruments.
+    inst_preds: generator
+        Yields the prediction of each instrument. Dimension: [timesteps x pitch x (1 + channels)],
+        where the first channel is filled with zeros.
+    """
+    if mode in ["note-stream", "note", "pop-note-stream"]:
+        ch_per_inst = 2
+    elif mode in ["frame-stream", "frame"]:
+        ch_per_inst = 2
+    elif mode in ["true-frame", "true-frame-stream"]:
+        # For older version compatibility that models were trained on pure frame-level.
+        mode = "frame"
+        ch_per_inst = 1
+    else:
+        raise ValueError(f"Unsupported mode: {mode}")
+    assert (pred.shape[-1] - 1) % ch_per_inst == 0, f"Input shape: {pred.shape}"
+
+    ch_container = []
+    iters = (pred.shape[-1] - 1) // ch_per_inst
+    for i in range(ch_per_inst):
+        # First item would be duration channel
+        # Second item would be onset channel
+        item = pred[:, :, [it*ch_per_inst + i + 1 for it in range(iters)]]  # noqa: E226
+        ch_container.append(norm(item) if normalize else item)
+
+    if not mode.endswith("-stream") and mode != "true_frame":
+        # Some different process for none-instrument care cases
+        # Merge all channels into first channel
+        iters = 1
+        for i in range(ch_per_inst):
+            normed_p = ch_container[i]
+            normed_p[:, :, 0] = np.average(normed_p, axis=2)
+            ch_container[i] = normed_p
+
+    def gen_inst_preds():
+        zeros = np.zeros(pred.shape[:-1])
+        for i in range(iters):
+            yield np.dstack([zeros] + [ch_container[ii][:, :, i] for ii in range(ch_per_inst)])
+
+    return mode, iters, gen_inst_preds()
+
+
+def instrument_std(inst_pred):
+    """Average standard deviation of the channels, i.e. the confidence of the instrument."""
+    ch_per_inst = inst_pred.shape[2] - 1
+    return sum(np.std(inst_pred[:, :, ch]) for ch in range(1, inst_pred.shape[2])) / ch_per_inst
+
+
 def multi_inst_note_inference(
     pred,
     mode="note-stream",
@@ -379,6 +486,7 @@ def multi_inst_note_inference(
     normalize=True,
     t_unit=0.02,
     channel_program_mapping=MUSICNET_INSTRUMENT_PROGRAMS,
+    as_array=False,
 ):
     """Function for infering raw multi-instrument predictions.
 
@@ -405,45 +513,21 @@ def multi_inst_note_inference(
         extraction
     channel_program_mapping: list[int]
         Mapping prediction channels to MIDI program numbers.
+    as_array: bool
+        Whether to return the note array of ``omnizart.midi.NOTE_DTYPE``. The instrument
+        of each note is recorded in the ``program`` field.
 
     Returns
     -------
     out_midi
-        A pretty_midi.PrettyMIDI object.
+        A pretty_midi.PrettyMIDI object, or the note array if ``as_array`` is True.
 
     References
     ----------
     Publications can be found `here <https://bit.ly/2QhdWX5>`_.
     """
 
-    if mode in ["note-stream", "note", "pop-note-stream"]:
-        ch_per_inst = 2
-    elif mode in ["frame-stream", "frame"]:
-        ch_per_inst = 2
-    elif mode in ["true-frame", "true-frame-stream"]:
-        # For older version compatibility that models were trained on pure frame-level.
-        mode = "frame"
-        ch_per_inst = 1
-    else:
-        raise ValueError(f"Unsupported mode: {mode}")
-    assert (pred.shape[-1] - 1) % ch_per_inst == 0, f"Input shape: {pred.shape}"
-
-    ch_container = []
-    iters = (pred.shape[-1] - 1) // ch_per_inst
-    for i in range(ch_per_inst):
-        # First item would be duration channel
-        # Second item would be onset channel
-        item = pred[:, :, [it*ch_per_inst + i + 1 for it in range(iters)]]  # noqa: E226
-        ch_container.append(norm(item) if normalize else item)
-
-    if not mode.endswith("-stream") and mode != "true_frame":
-        # Some different process for none-instrument care cases
-        # Merge all channels into first channel
-        iters = 1
-        for i in range(ch_per_inst):
-            normed_p = ch_container[i]
-            normed_p[:, :, 0] = np.average(normed_p, axis=2)
-            ch_container[i] = normed_p
+    mode, iters, inst_preds = split_instrument_channels(pred, mode=mode, normalize=normalize)
 
     # Handling given thresholds that could be type of either scalar value or list
     onset_th = threshold_type_converter(onset_th, iters)
@@ -451,32 +535,22 @@ def multi_inst_note_inference(
     frm_th = threshold_type_converter(frm_th, iters)
 
     # Multi-instrument inference loop, iterate through different instrument channels
-    zeros = np.zeros(pred.shape[:-1])
-    out_midi = pretty_midi.PrettyMIDI()
-    for i in range(iters):
-        normed_ch = []
-        std = 0
-        ent = 0
+    out_notes = [np.zeros(0, dtype=NOTE_DTYPE)]
+    tracks = []
+    for i, normed_p in enumerate(inst_preds):
         # Compute confidence of the instrument
-        for ii in range(ch_per_inst):
-            cha = ch_container[ii][:, :, i]
-            std += np.std(cha)
-            ent += entropy(cha)
-            normed_ch.append(cha)
-
-        confidence = (
-            f"std: {std / ch_per_inst:.3f} "
-            f"ent: {ent / ch_per_inst:.3f} "
-            f"mult: {std * ent / ch_per_inst ** 2:.3f}"
-        )
+        ch_per_inst = normed_p.shape[2] - 1
+        std = instrument_std(normed_p)
+        ent = sum(entropy(normed_p[:, :, ch]) for ch in range(1, normed_p.shape[2])) / ch_per_inst
+
+        confidence = f"std: {std:.3f} ent: {ent:.3f} mult: {std * ent:.3f}"
         logger.debug("Instrument confidence: %s", confidence)
-        if iters > 1 and (std / ch_per_inst < inst_th):
+        if iters > 1 and (std < inst_th):
             # Filter out instruments that the confidence is under the given threshold
             continue
 
         # Infer notes according to raw predictions
-        normed_p = np.dstack([zeros] + normed_ch)
-        midi = note_inference(
+        notes = note_inference(
             normed_p,
             mode=mode,
             onset_th=onset_th[i],
@@ -484,13 +558,31 @@ def multi_inst_note_inference(
             frm_th=frm_th[i],
             normalize=normalize,
             t_unit=t_unit,
+            as_array=True,
         )
 
-        # Assign instrument class to the infered MIDI accroding to its channel index
+        # Assign instrument class to the infered notes accroding to its channel index
         inst_program = channel_program_mapping[i]
-        inst_name = MIDI_PROGRAM_NAME_MAPPING[str(inst_program)]
-        inst = pretty_midi.Instrument(program=inst_program, name=inst_name)
-        inst.notes = midi.instruments[0].notes
-        out_midi.instruments.append(inst)
+        notes["program"] = inst_program
+        notes["track"] = len(tracks)
+        out_notes.append(notes)
+        tracks.append((MIDI_PROGRAM_NAME_MAPPING[str(inst_program)], inst_program, False))
+
+    out_notes = np.concatenate(out_notes)
+    if as_array:
+        # Drop the tracks of the instruments without any inferred notes.
+        out_notes["track"] = np.unique(out_notes["track"], return_inverse=True)[1]
+        return out_notes
+    return to_pretty_midi(out_notes, tracks=tracks)
 
-    return out_midi
+
+def instrument_tracks(notes):
+    """Returns the tracks of the note array inferred by ``multi_inst_note_inference``.
+
+    Tracks are named after the instrument programs. Instruments without any
+    inferred notes are not included.
+    """
+    return [
+        (MIDI_PROGRAM_NAME_MAPPING[str(program)], program, is_drum)
+        for _, program, is_drum in resolve_tracks(notes)
+    ]
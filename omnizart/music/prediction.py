@@ -4,6 +4,7 @@ import numpy as np
 from scipy.special import expit
 
 from omnizart.utils import get_logger
+from omnizart.models.u_net import predict_on_tiles
 
 
 logger = get_logger("Music Prediction")
@@ -143,10 +144,12 @@ def merge_batches(batches, step_size=10):
     return output
 
 
-def predict(feature, model, batch_size=4, step_size=64):
+def predict(feature, model, batch_size=4, step_size=64, tile_size=1024):
     """Make predictions on the feature.
 
-    Generate predictions by using the loaded model.
+    Generate predictions by using the loaded model. If the model accepts inputs of
+    variable length (see ``omnizart.models.u_net.to_variable_length``), the feature
+    is predicted in large tiles without overlapping windows.
 
     Parameters
     ----------
@@ -159,6 +162,8 @@ def predict(feature, model, batch_size=4, step_size=64):
     step_size: int
         Step size for hopping the feature. Value smaller then ``timesteps`` means there will be
         overlapping.
+    tile_size: int
+        Number of frames of each tile for variable-length models.
 
     Returns
     -------
@@ -175,17 +180,20 @@ def predict(feature, model, batch_size=4, step_size=64):
         pad_shape = ((0, 0), (pb, pt), (0, 0))
         feature = np.pad(feature, pad_shape, constant_values=0)
 
-    # Create input batches
-    batches = create_batches(feature, timesteps, b_size=batch_size, step_size=step_size)
-    batch_pred = []
-    for idx, batch in enumerate(batches):
-        print(f"{idx+1}/{len(batches)}", end='\r')
-        pred = model.predict(np.array(batch))
-        # batch_pred.append(pred)
-        batch_pred.append(expit(pred))
-
-    # Merge batch predictions into complete output
-    pred = merge_batches(batch_pred, step_size=step_size)
+    if timesteps is None:
+        pred = expit(predict_on_tiles(feature, model, tile_size=tile_size))
+    else:
+        # Create input batches
+        batches = create_batches(feature, timesteps, b_size=batch_size, step_size=step_size)
+        batch_pred = []
+        for idx, batch in enumerate(batches):
+            print(f"{idx+1}/{len(batches)}", end='\r')
+            pred = model.predict(np.array(batch))
+            # batch_pred.append(pred)
+            batch_pred.append(expit(pred))
+
+        # Merge batch predictions into complete output
+        pred = merge_batches(batch_pred, step_size=step_size)
 
     # Remove paddings
     if diff > 0:
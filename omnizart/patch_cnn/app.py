@@ -5,18 +5,18 @@ from datetime import datetime
 import h5py
 import numpy as np
 import tensorflow as tf
-from mir_eval import sonify
 from mir_eval.util import midi_to_hz
-from scipy.io.wavfile import write as wavwrite
 
 from omnizart.io import write_yaml, write_agg_f0_results
-from omnizart.utils import get_logger, parallel_generator, get_filename, ensure_path_exists, aggregate_f0_info
+from omnizart.contour import f0_segments, write_contour_wav
+from omnizart.utils import get_logger, parallel_generator, get_filename, ensure_path_exists
 from omnizart.base import BaseTranscription, BaseDatasetLoader
 from omnizart.constants import datasets as d_struct
-from omnizart.feature.cfp import extract_patch_cfp
+from omnizart.feature.cfp import extract_cfp, extract_patch_cfp, iter_patch_cfp
 from omnizart.setting_loaders import PatchCNNSettings
 from omnizart.models.patch_cnn import patch_cnn_model
 from omnizart.patch_cnn.inference import inference
+from omnizart.patch_cnn.prediction import predict_patches
 from omnizart.train import get_train_val_feat_file_list
 
 
@@ -28,7 +28,7 @@ class PatchCNNTranscription(BaseTranscription):
     def __init__(self, conf_path=None):
         super().__init__(PatchCNNSettings, conf_path=conf_path)
 
-    def transcribe(self, input_audio, model_path=None, output="./"):
+    def transcribe(self, input_audio, model_path=None, output="./", sonify=False):
         """Transcribe frame-level fundamental frequency of vocal from the given audio.
 
         Parameters
@@ -40,12 +40,14 @@ class PatchCNNTranscription(BaseTranscription):
             the folder that contains `arch.yaml`, `weights.h5`, and `configuration.yaml`.
         output: Path (optional)
             Path for writing out the extracted vocal f0. Default to current path.
+        sonify: bool
+            Whether to render the pitch contour to ``<output>_trans.wav``.
 
         Returns
         -------
-        agg_f0: list[dict]
-            List of aggregated F0 information, with each entry containing the onset, offset,
-            and freqeuncy (Hz).
+        agg_f0: structured numpy array
+            Aggregated F0 information, with each row containing the onset, offset,
+            and freqeuncy (Hz). See ``omnizart.contour.F0_SEGMENT_DTYPE``.
 
         See Also
         --------
@@ -54,14 +56,12 @@ class PatchCNNTranscription(BaseTranscription):
         if not os.path.isfile(input_audio):
             raise FileNotFoundError(f"The given audio path does not exist. Path: {input_audio}")
 
-        logger.info("Loading model...")
-        model, model_settings = self._load_model(model_path)
+        logger.info("Loading model in background...")
+        model_future, model_settings = self._load_model_in_background(model_path)
 
-        logger.info("Extracting patch CFP feature...")
-        feat, mapping, zzz, cenf = extract_patch_cfp(
+        logger.info("Extracting CFP feature...")
+        zzz, _, _, _, cenf = extract_cfp(
             input_audio,
-            patch_size=model_settings.feature.patch_size,
-            threshold=model_settings.feature.peak_threshold,
             down_fs=model_settings.feature.sampling_rate,
             hop=model_settings.feature.hop_size,
             win_size=model_settings.feature.window_size,
@@ -72,9 +72,9 @@ class PatchCNNTranscription(BaseTranscription):
             bin_per_octave=model_settings.feature.bins_per_octave,
         )
 
-        logger.info("Predicting...")
-        feat = np.expand_dims(feat, axis=-1)
-        pred = model.predict(feat)
+        logger.info("Predicting on the patches...")
+        patches = iter_patch_cfp(zzz, patch_size=model_settings.feature.patch_size)
+        pred, mapping = predict_patches(model_future.result(), patches)
 
         logger.info("Inferring contour...")
         contour = inference(
@@ -85,20 +85,21 @@ class PatchCNNTranscription(BaseTranscription):
             threshold=model_settings.inference.threshold,
             max_method=model_settings.inference.max_method
         )
-        agg_f0 = aggregate_f0_info(contour, t_unit=model_settings.feature.hop_size)
+        agg_f0 = f0_segments(contour, t_unit=model_settings.feature.hop_size)
 
         output = self._output_midi(output, input_audio, verbose=False)
         if output is not None:
             # Output contour information
             write_agg_f0_results(agg_f0, output_path=f"{output}_f0.csv")
 
-            # Synthesize audio
-            timestamp = np.arange(len(contour)) * model_settings.feature.hop_size
-            wav = sonify.pitch_contour(
-                timestamp, contour, model_settings.feature.sampling_rate, amplitudes=0.5 * np.ones(len(contour))
-            )
-            wavwrite(f"{output}_trans.wav", model_settings.feature.sampling_rate, wav)
-            logger.info("Text and Wav files have been written to %s", os.path.abspath(os.path.dirname(output)))
+            if sonify:
+                write_contour_wav(
+                    contour,
+                    model_settings.feature.hop_size,
+                    model_settings.feature.sampling_rate,
+                    f"{output}_trans.wav"
+                )
+            logger.info("Output files have been written to %s", os.path.abspath(os.path.dirname(output)))
 
         return agg_f0
 
@@ -335,7 +336,6 @@ def _all_in_one_extract(data_pair, **feat_params):
 def _parallel_feature_extraction(data_pair_list, out_path, feat_settings, num_threads=4):
     feat_params = {
         "patch_size": feat_settings.patch_size,
-        "threshold": feat_settings.peak_threshold,
         "down_fs": feat_settings.sampling_rate,
         "hop": feat_settings.hop_size,
         "win_size": feat_settings.window_size,
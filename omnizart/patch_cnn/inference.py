@@ -27,33 +27,37 @@ def inference(pred, mapping, zzz, cenf, threshold=0.5, max_method="posterior"):
     contour: 1D numpy array
         Sequence of freqeuncies in Hz, representing the inferred pitch contour.
     """
-    pred = pred[:, 1]
+    if max_method not in ("posterior", "prior"):
+        raise ValueError(f"Invalid maximum method: {max_method}")
 
-    pred_idx = np.where(pred > threshold)
-    probs = np.expand_dims(pred[pred_idx[0]], axis=-1)
-    maps = mapping[pred_idx[0]]
-    maps = np.concatenate([maps, probs], axis=1)
-    maps = maps[maps[:, 1].argsort()]
-
-    contour = np.zeros(int(np.max(maps)) + 1)
-    for tidx in range(len(probs)):
-        candidate = maps[np.where(maps[:, 1] == tidx)[0]]
-        if len(candidate) < 1:
-            continue
-        if len(candidate) == 1:
-            contour[int(candidate[0, 1])] = candidate[0, 0]
-        else:
-            if max_method == "posterior":
-                freq_idx = np.where(candidate[:, 2] == np.max(candidate[:, 2]))[0]
-            elif max_method == "prior":
-                freq_idx = zzz[candidate[:, 0].astype('int'), tidx].argmax(axis=0)
-            else:
-                raise ValueError(f"Invalid maximum method: {max_method}")
-            freq_idx = int(freq_idx)
-            contour[int(candidate[freq_idx, 1])] = candidate[freq_idx, 0]
-
-    for idx, cont in enumerate(contour):
-        if cont > 1:
-            contour[idx] = cenf[int(cont)]
+    pred = pred[:, 1]
+    pred_idx = np.where(pred > threshold)[0]
+    probs = pred[pred_idx]
+    freqs = mapping[pred_idx, 0]
+    times = mapping[pred_idx, 1]
+    if len(probs) == 0:
+        return np.zeros(0)
+    contour = np.zeros(int(np.max(mapping[pred_idx])) + 1)
+
+    # Group the candidates by time frame.
+    order = np.lexsort((freqs, times))
+    freqs, times, probs = freqs[order], times[order], probs[order]
+    group_start = np.flatnonzero(np.diff(times, prepend=-1) != 0)
+    group_size = np.diff(group_start, append=len(times))
+
+    # Select the candidate with the maximum score of each frame, the lowest frequency on ties.
+    if max_method == "posterior":
+        score = probs
+    else:
+        score = zzz[freqs.astype("int"), times.astype("int")]
+    is_max = score == np.repeat(np.maximum.reduceat(score, group_start), group_size)
+    group_id = np.repeat(np.arange(len(group_start)), group_size)
+    max_idx = np.flatnonzero(is_max)
+    _, first_idx = np.unique(group_id[max_idx], return_index=True)
+    selected = max_idx[first_idx]
+    contour[times[selected].astype("int")] = freqs[selected]
+
+    voiced = contour > 1
+    contour[voiced] = np.asarray(cenf)[contour[voiced].astype(int)]
 
     return contour
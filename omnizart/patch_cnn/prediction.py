@@ -0,0 +1,34 @@
+import numpy as np
+
+from omnizart.utils import get_logger, prefetch_generator
+
+
+logger = get_logger("Patch CNN Prediction")
+
+
+def predict_patches(model, patch_batches, prefetch=2):
+    """Predicts the patches batch by batch, while the next batches are being extracted.
+
+    Parameters
+    ----------
+    model: tf.keras.Model
+        The patch CNN model.
+    patch_batches: generator
+        Yields the batches of patches and the corresponding mapping, e.g. the output of
+        ``omnizart.feature.cfp.iter_patch_cfp``.
+    prefetch: int
+        Number of batches to be extracted in advance.
+
+    Returns
+    -------
+    pred: 2D numpy array
+        The predicted probabilities of each patch.
+    mapping: 2D numpy array
+        The frequency and time index of each patch.
+    """
+    preds, mappings = [np.zeros((0, 2), dtype=np.float32)], [np.zeros((0, 2))]
+    for idx, (patches, mapping) in enumerate(prefetch_generator(patch_batches, buffer_size=prefetch)):
+        logger.debug("Predicting batch %d with %d patches", idx + 1, len(patches))
+        preds.append(np.asarray(model.predict_on_batch(patches[:, :, :, np.newaxis])))
+        mappings.append(mapping)
+    return np.concatenate(preds), np.concatenate(mappings)
@@ -0,0 +1,375 @@
+"""Grid search of inference thresholds over cached raw predictions.
+
+Evaluates a grid of inference settings of the music, drum, and beat modules
+against the ground-truth, using the raw predictions cached by ``transcribe``
+(see :mod:`omnizart.cache`). The threshold-independent work, i.e. normalization,
+interpolation, and peak detection, is computed once and shared among all grid
+points, and the grid is evaluated in parallel across processes.
+
+Examples
+--------
+.. code-block:: python
+
+    >>> from omnizart.music import app
+    >>> from omnizart.sweep import sweep
+    >>> table, best = sweep(
+            app,
+            [("song1.wav", "song1.mid"), ("song2.wav", "song2.mid")],
+            grid={"onset_th": [4, 5, 6], "dura_th": [1, 2]},
+            model_path="Piano",
+            cache_dir="./cache",
+            output="./sweep.csv"
+        )
+"""
+
+import csv
+import math
+import itertools
+
+import numpy as np
+import pretty_midi
+from scipy.signal import find_peaks
+from mir_eval import transcription as mir_transcription, onset as mir_onset, beat as mir_beat
+
+from omnizart.cache import PredictionCache, resolve_cache_dir
+from omnizart.utils import get_logger, parallel_generator
+from omnizart.setting_loaders import MusicSettings, DrumSettings, BeatSettings
+from omnizart.music.inference import (
+    split_instrument_channels,
+    instrument_std,
+    norm,
+    prepare_onset_dura,
+    threshold_onset_dura,
+    prepare_frame,
+    infer_frame,
+    infer_piece,
+    down_sample,
+)
+from omnizart.drum.inference import get_3inst_ary
+
+
+logger = get_logger("Threshold Sweep")
+
+#: Lowest MIDI pitch of the music module (A0).
+MUSIC_LOWEST_PITCH = 21
+
+
+def expand_grid(grid, defaults):
+    """Expands the grid into a list of settings, with the missing ones filled by ``defaults``."""
+    names = list(grid.keys())
+    cells = []
+    for values in itertools.product(*[grid[name] for name in names]):
+        cell = dict(defaults)
+        cell.update(zip(names, values))
+        cells.append(cell)
+    return cells
+
+
+def _f_measure_summary(precision, recall, f_measure):
+    return {"precision": precision, "recall": recall, "f_measure": f_measure}
+
+
+class MusicSweeper:
+    """Sweeps ``onset_th``, ``dura_th``, ``frame_th``, and ``inst_th`` of the music module.
+
+    Notes are scored with ``mir_eval.transcription`` on onsets and pitches, regardless
+    of the instrument classes.
+    """
+    params = ["onset_th", "dura_th", "frame_th", "inst_th"]
+
+    def __init__(self, settings):
+        self.mode = settings.training.label_type
+        self.t_unit = settings.feature.hop_size
+        self.defaults = {name: getattr(settings.inference, name) for name in self.params}
+
+    def load_reference(self, ref_path):  # pylint: disable=R0201
+        """Loads the non-drum notes of the MIDI file as intervals and pitches in Hz."""
+        midi = pretty_midi.PrettyMIDI(ref_path)
+        notes = [(nn.start, nn.end, nn.pitch) for inst in midi.instruments for nn in inst.notes if not inst.is_drum]
+        notes = np.array(notes).reshape(-1, 3)
+        return notes[:, :2], pretty_midi.note_number_to_hz(notes[:, 2])
+
+    def infer(self, cached, cells):
+        """Infers notes of each grid cell.
+
+        Returns
+        -------
+        notes: list[2D numpy array]
+            The inferred notes of each cell. Each row is (start, end, pitch).
+        """
+        mode, iters, inst_preds = split_instrument_channels(cached["pred"], mode=self.mode)
+        est = [[] for _ in cells]
+        for inst_pred in inst_preds:
+            std = instrument_std(inst_pred)
+            active = [iters == 1 or std >= cell["inst_th"] for cell in cells]
+            if not any(active):
+                continue
+
+            if "note" in mode:
+                shared = prepare_onset_dura(inst_pred)
+                th_names = ["onset_th", "dura_th"]
+            else:
+                shared = prepare_frame(inst_pred)
+                th_names = ["frame_th"]
+
+            inferred = {}
+            for idx, cell in enumerate(cells):
+                if not active[idx]:
+                    continue
+                key = tuple(cell[name] for name in th_names)
+                if key not in inferred:
+                    inferred[key] = self._infer_notes(mode, shared, key, channels=inst_pred.shape[2])
+                est[idx].append(inferred[key])
+
+        return [np.concatenate(notes) if len(notes) > 0 else np.zeros((0, 3)) for notes in est]
+
+    def _infer_notes(self, mode, shared, thresholds, channels):
+        if "note" in mode:
+            norm_pred = threshold_onset_dura(*shared, *thresholds, channels=channels)
+            notes = infer_piece(down_sample(norm_pred), t_unit=0.01)
+            t_unit = self.t_unit / 2
+        else:
+            notes = infer_frame(*shared, frm_th=thresholds[0], t_unit=self.t_unit)
+            t_unit = self.t_unit
+        notes = np.array([(nn["start"], nn["end"], nn["pitch"]) for nn in notes]).reshape(-1, 3)
+        notes[:, :2] *= t_unit
+        notes[:, 2] += MUSIC_LOWEST_PITCH
+        return notes
+
+    def evaluate(self, cached, ref, cells):
+        ref_intervals, ref_pitches = ref
+        scores = []
+        for notes in self.infer(cached, cells):
+            notes = notes[notes[:, 1] > notes[:, 0]]
+            precision, recall, f_measure, _ = mir_transcription.precision_recall_f1_overlap(
+                ref_intervals,
+                ref_pitches,
+                notes[:, :2],
+                pretty_midi.note_number_to_hz(notes[:, 2]),
+                offset_ratio=None
+            )
+            scores.append(_f_measure_summary(precision, recall, f_measure))
+        return scores
+
+
+class DrumSweeper:
+    """Sweeps ``bass_drum_th``, ``snare_th``, and ``hihat_th`` of the drum module.
+
+    Onsets of each drum class are scored with ``mir_eval.onset``, and ``f_measure``
+    is the average of the three classes.
+    """
+    params = ["bass_drum_th", "snare_th", "hihat_th"]
+
+    #: MIDI pitches of the three drum classes, same as ``omnizart.drum.labels.extract_label_13_inst``.
+    class_pitches = [[33, 35, 36], [27, 38, 40, 85, 87], [42, 44, 46]]
+
+    def __init__(self, settings):
+        self.defaults = {name: getattr(settings.inference, name) for name in self.params}
+
+    def load_reference(self, ref_path):
+        """Loads the onsets of each drum class from the MIDI file."""
+        midi = pretty_midi.PrettyMIDI(ref_path)
+        notes = np.array([
+            (nn.start, nn.pitch) for inst in midi.instruments for nn in inst.notes if inst.is_drum
+        ]).reshape(-1, 2)
+        return [np.sort(notes[np.isin(notes[:, 1], pitches), 0]) for pitches in self.class_pitches]
+
+    def _detect_peaks(self, cached):  # pylint: disable=R0201
+        # Peak positions do not depend on the height threshold since the distance is one.
+        insts = get_3inst_ary(cached["pred"])
+        peaks = []
+        for ch in range(insts.shape[1]):
+            act = norm(insts[:, ch])
+            pos, _ = find_peaks(act, distance=1)
+            peaks.append((cached["mini_beat_arr"][pos], act[pos]))
+        return peaks
+
+    def infer(self, cached, cells):
+        """Infers the onsets of each drum class for each grid cell."""
+        peaks = self._detect_peaks(cached)
+        return [
+            [onsets[heights >= cell[name]] for (onsets, heights), name in zip(peaks, self.params)]
+            for cell in cells
+        ]
+
+    def evaluate(self, cached, ref, cells):
+        peaks = self._detect_peaks(cached)
+        class_scores = {}
+        scores = []
+        for cell in cells:
+            score = {}
+            for cidx, name in enumerate(self.params):
+                key = (cidx, cell[name])
+                if key not in class_scores:
+                    onsets, heights = peaks[cidx]
+                    class_scores[key] = mir_onset.f_measure(ref[cidx], onsets[heights >= cell[name]], window=0.05)
+                score[f"{name[:-3]}_f_measure"] = class_scores[key][0]
+            score["f_measure"] = np.mean(list(score.values()))
+            scores.append(score)
+        return scores
+
+
+class BeatSweeper:
+    """Sweeps ``beat_threshold``, ``down_beat_threshold``, and ``min_distance`` of the beat module.
+
+    Beats and down beats are scored with ``mir_eval.beat.f_measure``, and ``f_measure``
+    is the average of the two.
+
+    Peaks are detected once for each ``min_distance`` and then filtered by height,
+    which gives the same results as ``omnizart.beat.inference.inference``, except for
+    peaks of exactly the same height within the minimum distance.
+    """
+    params = ["beat_threshold", "down_beat_threshold", "min_distance"]
+
+    def __init__(self, settings):
+        self.t_unit = settings.feature.time_unit
+        self.defaults = {name: getattr(settings.inference, name) for name in self.params}
+
+    def load_reference(self, ref_path):  # pylint: disable=R0201
+        """Loads the beat annotation.
+
+        The file should contain the beat time in seconds at the first column, and optionally
+        the beat number at the second column, where number 1 denotes down beats.
+        """
+        ref = np.loadtxt(ref_path, ndmin=2)
+        beats = ref[:, 0]
+        down_beats = beats[ref[:, 1] == 1] if ref.shape[1] > 1 else np.array([])
+        return beats, down_beats
+
+    def _detect_peaks(self, cached, min_dists):
+        peaks = {}
+        for min_dist in min_dists:
+            mdist = max(1, round(min_dist / self.t_unit))
+            peaks[min_dist] = []
+            for ch in range(2):
+                act = cached["pred"][:, ch]
+                pos, _ = find_peaks(act, distance=mdist)
+                peaks[min_dist].append((pos * self.t_unit, act[pos]))
+        return peaks
+
+    def infer(self, cached, cells):
+        """Infers the beat and down beat positions of each grid cell."""
+        peaks = self._detect_peaks(cached, {cell["min_distance"] for cell in cells})
+        results = []
+        for cell in cells:
+            (beats, beat_h), (down_beats, down_beat_h) = peaks[cell["min_distance"]]
+            results.append(
+                (beats[beat_h >= cell["beat_threshold"]], down_beats[down_beat_h >= cell["down_beat_threshold"]])
+            )
+        return results
+
+    def evaluate(self, cached, ref, cells):
+        ref_beats, ref_down_beats = ref
+        scores = []
+        for beats, down_beats in self.infer(cached, cells):
+            score = {
+                "beat_f_measure": mir_beat.f_measure(ref_beats, beats),
+                "down_beat_f_measure": mir_beat.f_measure(ref_down_beats, down_beats),
+            }
+            score["f_measure"] = np.mean(list(score.values()))
+            scores.append(score)
+        return scores
+
+
+SWEEPERS = {MusicSettings: MusicSweeper, DrumSettings: DrumSweeper, BeatSettings: BeatSweeper}
+
+
+def _sweep_job(job, sweeper):
+    file_idx, cache_path, ref_path, cell_ids, cells = job
+    with np.load(cache_path) as data:
+        cached = {name: data[name] for name in data.files}
+    cached["pred"] = cached["pred"].astype(np.float32)
+    scores = sweeper.evaluate(cached, sweeper.load_reference(ref_path), cells)
+    return file_idx, cell_ids, scores
+
+
+def sweep(app, data_pairs, grid, model_path=None, cache_dir=None, metric="f_measure", num_workers=4, output=None):
+    """Evaluates a grid of inference settings on the cached predictions.
+
+    The raw predictions of all the input files should have been cached by ``transcribe``
+    with the same ``model_path`` and ``cache_dir``.
+
+    Parameters
+    ----------
+    app: BaseTranscription
+        The application instance. Supports the music, drum, and beat applications.
+    data_pairs: list[tuple[Path, Path]]
+        Pairs of the input file and the ground-truth file. Ground-truth should be MIDI files
+        for the music and drum module, and beat annotations for the beat module (see
+        ``BeatSweeper.load_reference``).
+    grid: dict[str, list]
+        Candidate values of each inference setting. Settings not in the grid are fixed
+        to the values of the checkpoint.
+    model_path: Path
+        Path to the trained model or the transcription mode.
+    cache_dir: Path
+        Directory of the cached predictions. Default to ``OMNIZART_CACHE_DIR``.
+    metric: str
+        The metric for selecting the best settings.
+    num_workers: int
+        Number of processes for evaluating the grid.
+    output: Path (optional)
+        Path for writing out the result table as a CSV file.
+
+    Returns
+    -------
+    table: list[dict]
+        Settings and the metrics averaged over the files of each grid cell.
+    best: dict
+        The row of ``table`` with the highest ``metric``.
+    """
+    if len(data_pairs) == 0:
+        raise ValueError("No data pairs are given for the sweep.")
+
+    cache_dir = resolve_cache_dir(cache_dir)
+    if cache_dir is None:
+        raise ValueError("Cache directory is not specified. Either give 'cache_dir' or set OMNIZART_CACHE_DIR.")
+
+    model_path, settings = app._load_checkpoint_settings(model_path)  # pylint: disable=W0212
+    sweeper = SWEEPERS[type(settings)](settings)
+    unknown = set(grid) - set(sweeper.params)
+    if len(unknown) > 0:
+        raise AttributeError(f"Unknown inference settings: {unknown}. Available settings: {sweeper.params}")
+
+    cells = expand_grid(grid, sweeper.defaults)
+    logger.info("Total grid cells: %d, files: %d", len(cells), len(data_pairs))
+
+    # Split the grid into chunks so that the workers are still busy when there are only few files.
+    cache = PredictionCache(cache_dir)
+    chunks = min(len(cells), max(1, math.ceil(num_workers / len(data_pairs))))
+    chunk_size = math.ceil(len(cells) / chunks)
+    jobs = []
+    for file_idx, (input_path, ref_path) in enumerate(data_pairs):
+        cache_path = cache.path(cache.key(input_path, model_path, settings.feature))
+        for start in range(0, len(cells), chunk_size):
+            cell_ids = list(range(start, min(start + chunk_size, len(cells))))
+            jobs.append((file_idx, cache_path, ref_path, cell_ids, [cells[idx] for idx in cell_ids]))
+
+    scores = [[None] * len(cells) for _ in data_pairs]
+    for idx, ((file_idx, cell_ids, job_scores), _) in enumerate(
+        parallel_generator(_sweep_job, jobs, max_workers=num_workers, timeout=None, sweeper=sweeper), 1
+    ):
+        print(f"Progress: {idx}/{len(jobs)}", end="\r")
+        for cell_idx, score in zip(cell_ids, job_scores):
+            scores[file_idx][cell_idx] = score
+
+    table = []
+    for cell_idx, cell in enumerate(cells):
+        row = dict(cell)
+        for name in scores[0][cell_idx]:
+            row[name] = float(np.mean([file_scores[cell_idx][name] for file_scores in scores]))
+        table.append(row)
+
+    best = max(table, key=lambda row: row[metric])
+    logger.info("Best settings: %s", best)
+    if output is not None:
+        write_csv(table, output)
+        logger.info("Sweep results have been written to %s", output)
+    return table, best
+
+
+def write_csv(table, output="./sweep.csv"):
+    with open(output, "w", newline='') as out:
+        writer = csv.DictWriter(out, fieldnames=list(table[0].keys()))
+        writer.writeheader()
+        writer.writerows(table)
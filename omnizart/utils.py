@@ -5,16 +5,18 @@ import re
 import types
 import logging
 import uuid
+import queue
+import threading
 import concurrent.futures
 import importlib
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import jsonschema
 import pretty_midi
-import numpy as np
 import scipy.io.wavfile as wave
 
 from omnizart.constants.midi import SOUNDFONT_PATH
+from omnizart.contour import f0_segments, to_records
 
 
 def get_logger(name=None, level="warn"):
@@ -275,6 +277,51 @@ def parallel_generator(func, input_list, max_workers=2, use_thread=False, chunk_
     executor.shutdown()
 
 
+def prefetch_generator(generator, buffer_size=2):
+    """Runs the generator in a background thread, and yields the prefetched items.
+
+    Useful for overlapping the data preparation (e.g. feature extraction) with the
+    model prediction on the consumer side. At most ``buffer_size`` items are
+    prefetched. Exceptions raised by the generator are re-raised to the consumer.
+    """
+    buffer = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+    end_mark = object()
+
+    def _put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        try:
+            for item in generator:
+                if not _put((item, None)):
+                    return
+        except Exception as exp:  # pylint: disable=broad-except
+            _put((None, exp))
+            return
+        _put((end_mark, None))
+
+    producer = threading.Thread(target=_produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, exp = buffer.get()
+            if exp is not None:
+                raise exp
+            if item is end_mark:
+                break
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
 def synth_midi(midi_path, output_path, sampling_rate=44100, sf2_path=SOUNDFONT_PATH):
     """Synthesize MIDI into wav audio."""
     midi = pretty_midi.PrettyMIDI(midi_path)
@@ -357,39 +404,9 @@ def aggregate_f0_info(pred, t_unit):
         Aggregated F0 information. Each element in the list represents
         a single freqeuncy with start time, end time, and frequency
         recorded in *dict*.
+
+    See Also
+    --------
+    omnizart.contour.f0_segments: Columnar version of this function.
     """
-    results = []
-
-    cur_idx = 0
-    start_idx = 0
-    last_hz = pred[0]
-    eps = 1e-6
-    pred = np.append(pred, 0)  # Append an additional zero to the end temporarily.
-    while cur_idx < len(pred):
-        cur_hz = pred[cur_idx]
-        if abs(cur_hz - last_hz) < eps:
-            # Skip to the next index with different frequency.
-            last_hz = cur_hz
-            cur_idx += 1
-            continue
-
-        if last_hz < eps:
-            # Almost equals to zero. Ignored.
-            last_hz = cur_hz
-            start_idx = cur_idx
-            cur_idx += 1
-            continue
-
-        results.append({
-            "start_time": round(start_idx * t_unit, 6),
-            "end_time": round(cur_idx * t_unit, 6),
-            "frequency": last_hz,
-            "pitch": pretty_midi.hz_to_note_number(last_hz)
-        })
-
-        start_idx = cur_idx
-        cur_idx += 1
-        last_hz = cur_hz
-
-    pred = pred[:-1]  # Remove the additional ending zero.
-    return results
+    return to_records(f0_segments(pred, t_unit))
@@ -1,20 +1,23 @@
 import os
 import glob
 import shutil
-import subprocess
 from os.path import join as jpath
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import h5py
+import librosa
 import numpy as np
 import tensorflow as tf
 from spleeter.separator import Separator
 from spleeter.utils.logging import logger as sp_logger
 
 from omnizart.io import load_audio, write_yaml
+from omnizart.midi import to_pretty_midi
+from omnizart.contour import f0_segments
 from omnizart.utils import (
-    get_logger, resolve_dataset_type, parallel_generator, ensure_path_exists, LazyLoader, get_filename
+    get_logger, resolve_dataset_type, parallel_generator, ensure_path_exists, LazyLoader
 )
 from omnizart.constants import datasets as d_struct
 from omnizart.base import BaseTranscription, BaseDatasetLoader
@@ -22,7 +25,7 @@ from omnizart.feature.cfp import extract_vocal_cfp, _extract_vocal_cfp
 from omnizart.setting_loaders import VocalSettings
 from omnizart.vocal import labels as lextor
 from omnizart.vocal.prediction import predict
-from omnizart.vocal.inference import infer_interval, infer_midi
+from omnizart.vocal.inference import infer_interval, infer_notes, VOCAL_TRACKS
 from omnizart.train import get_train_val_feat_file_list
 from omnizart.models.pyramid_net import PyramidNet
 
@@ -30,6 +33,10 @@ from omnizart.models.pyramid_net import PyramidNet
 logger = get_logger("Vocal Transcription")
 vcapp = LazyLoader("vcapp", globals(), "omnizart.vocal_contour")
 
+#: Sampling rate of the Spleeter models.
+SPLEETER_SAMPLING_RATE = 44100
+_SEPARATOR = None
+
 
 class SpleeterError(Exception):
     """Wrapper exception class around Spleeter errors"""
@@ -47,7 +54,7 @@ class VocalTranscription(BaseTranscription):
         # Disable logging information of Spleeter
         sp_logger.setLevel(40)  # logging.ERROR
 
-    def transcribe(self, input_audio, model_path=None, output="./"):
+    def transcribe(self, input_audio, model_path=None, output="./", cache_dir=None, sonify=False):
         """Transcribe vocal notes in the audio.
 
         This function transcribes onset, offset, and pitch of the vocal in the audio.
@@ -62,6 +69,12 @@ class VocalTranscription(BaseTranscription):
             Path to the trained model or the supported transcription mode.
         output: Path (optional)
             Path for writing out the transcribed MIDI file. Default to the current path.
+        cache_dir: Path (optional)
+            Directory for caching the raw prediction and the pitch contour, which can later
+            be re-used by ``reinfer``. Default to the environment variable ``OMNIZART_CACHE_DIR``,
+            and nothing will be cached if neither is given.
+        sonify: bool
+            Whether to render the pitch contour of the vocal to ``<song>_trans.wav``.
 
         Returns
         -------
@@ -70,51 +83,109 @@ class VocalTranscription(BaseTranscription):
 
         Outputs
         -------
-        This function will outputs three files as listed below:
+        This function will outputs the files as listed below:
 
         - <song>.mid: the MIDI file with complete transcription results in piano sondfount.
         - <song>_f0.csv: pitch contour information of the vocal.
-        - <song>_trans.wav: the rendered pitch contour audio.
+        - <song>_trans.wav: the rendered pitch contour audio, only if ``sonify`` is set.
 
         See Also
         --------
         omnizart.cli.vocal.transcribe: CLI entry point of this function.
         omnizart.vocal_contour.transcribe: Pitch estimation function.
         """
-        logger.info("Separating vocal track from the audio...")
-        command = ["spleeter", "separate", input_audio, "-o", "./"]
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        _, error = process.communicate()
-        if process.returncode != 0:
-            raise SpleeterError(error.decode("utf-8"))
-
-        # Resolve the path of separated output files
-        folder_path = jpath("./", get_filename(input_audio))
-        vocal_wav_path = jpath(folder_path, "vocals.wav")
-        wav, fs = load_audio(vocal_wav_path)
-
-        # Clean out the output files
-        shutil.rmtree(folder_path)
-
-        logger.info("Loading model...")
-        model, model_settings = self._load_model(model_path)
-
-        logger.info("Extracting feature...")
-        feature = _extract_vocal_cfp(
-            wav,
-            fs,
-            down_fs=model_settings.feature.sampling_rate,
-            hop=model_settings.feature.hop_size,
-            fr=model_settings.feature.frequency_resolution,
-            fc=model_settings.feature.frequency_center,
-            tc=model_settings.feature.time_center,
-            g=model_settings.feature.gamma,
-            bin_per_octave=model_settings.feature.bins_per_octave
+        logger.info("Loading model in background...")
+        model_future, model_settings = self._load_model_in_background(model_path)
+
+        logger.info("Loading audio...")
+        waveform, fs = load_audio(input_audio, sampling_rate=SPLEETER_SAMPLING_RATE, mono=False)
+        if waveform.ndim == 1:
+            waveform = waveform[:, np.newaxis]
+
+        # The pitch contour is estimated from the original audio, concurrently with the vocal stage.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            contour_future = executor.submit(
+                _predict_pitch_contour, librosa.to_mono(waveform.T), fs, model_settings.inference.pitch_model
+            )
+
+            logger.info("Separating vocal track from the audio...")
+            wav = separate_vocal(waveform)
+
+            logger.info("Extracting feature...")
+            feature = _extract_vocal_cfp(
+                wav,
+                fs,
+                down_fs=model_settings.feature.sampling_rate,
+                hop=model_settings.feature.hop_size,
+                fr=model_settings.feature.frequency_resolution,
+                fc=model_settings.feature.frequency_center,
+                tc=model_settings.feature.time_center,
+                g=model_settings.feature.gamma,
+                bin_per_octave=model_settings.feature.bins_per_octave
+            )
+
+            logger.info("Predicting...")
+            pred = predict(feature, model_future.result())
+
+            logger.info("Extracting pitch contour")
+            f0, contour_settings = contour_future.result()
+
+        agg_f0 = f0_segments(f0, t_unit=contour_settings.feature.hop_size)
+        self._cache_prediction(
+            cache_dir,
+            input_audio,
+            model_path,
+            model_settings,
+            pred,
+            **{key: agg_f0[key] for key in ["start_time", "end_time", "frequency"]}
         )
 
-        logger.info("Predicting...")
-        pred = predict(feature, model)
+        notes = self._infer(pred, agg_f0, model_settings)
+        output = self._output_midi(output=output, input_audio=input_audio, midi=notes, tracks=VOCAL_TRACKS)
+        if output is not None:
+            vcapp.app.write_f0_outputs(f0, agg_f0, output, contour_settings, sonify=sonify)
+        logger.info("Transcription finished")
+        return to_pretty_midi(notes, tracks=VOCAL_TRACKS)
+
+    def reinfer(self, input_audio, model_path=None, output="./", cache_dir=None, **inference_settings):
+        """Infer vocal notes from the cached prediction with different inference settings.
+
+        Source separation, feature extraction, and model prediction (including the pitch
+        contour) are skipped. The raw prediction should be cached by ``transcribe``
+        beforehand with the same model.
+
+        Parameters
+        ----------
+        input_audio: Path
+            Path to the raw audio file (.wav).
+        model_path: Path
+            Path to the trained model or the supported transcription mode.
+        output: Path (optional)
+            Path for writing out the transcribed MIDI file. Default to the current path.
+        cache_dir: Path (optional)
+            Directory of the cached predictions. Default to ``OMNIZART_CACHE_DIR``.
+        **inference_settings:
+            Overrides the attributes of ``VocalSettings.inference``, e.g. ``threshold=0.4``.
+
+        Returns
+        -------
+        midi: pretty_midi.PrettyMIDI
+            The transcribed vocal notes.
 
+        See Also
+        --------
+        omnizart.cli.vocal.reinfer: CLI entry point of this function.
+        """
+        cached, model_settings = self._load_cached_prediction(
+            cache_dir, input_audio, model_path=model_path, inference_settings=inference_settings
+        )
+        agg_f0 = {key: cached[key] for key in ["start_time", "end_time", "frequency"]}
+        notes = self._infer(cached["pred"], agg_f0, model_settings)
+        self._output_midi(output=output, input_audio=input_audio, midi=notes, tracks=VOCAL_TRACKS)
+        logger.info("Re-inference finished")
+        return to_pretty_midi(notes, tracks=VOCAL_TRACKS)
+
+    def _infer(self, pred, agg_f0, model_settings):  # pylint: disable=R0201
         logger.info("Infering notes...")
         interval = infer_interval(
             pred,
@@ -124,15 +195,8 @@ class VocalTranscription(BaseTranscription):
             t_unit=model_settings.feature.hop_size
         )
 
-        logger.info("Extracting pitch contour")
-        agg_f0 = vcapp.app.transcribe(input_audio, model_path=model_settings.inference.pitch_model, output=output)
-
         logger.info("Inferencing MIDI...")
-        midi = infer_midi(interval, agg_f0, t_unit=model_settings.feature.hop_size)
-
-        self._output_midi(output=output, input_audio=input_audio, midi=midi)
-        logger.info("Transcription finished")
-        return midi
+        return infer_notes(interval, agg_f0, t_unit=model_settings.feature.hop_size)
 
     def generate_feature(self, dataset_path, vocal_settings=None, num_threads=4):
         """Extract the feature of the whole dataset.
@@ -342,6 +406,38 @@ class VocalTranscription(BaseTranscription):
         )
 
 
+def get_separator():
+    """Returns the 2-stems Spleeter separator, which is loaded only once in each process."""
+    global _SEPARATOR  # pylint: disable=global-statement
+    if _SEPARATOR is None:
+        _SEPARATOR = Separator("spleeter:2stems", multiprocess=False)
+        _SEPARATOR._params["stft_backend"] = "librosa"  # pylint: disable=protected-access
+    return _SEPARATOR
+
+
+def separate_vocal(waveform):
+    """Separates the vocal track of the audio in memory, without writing any file.
+
+    Parameters
+    ----------
+    waveform: 2D numpy array
+        The waveform of shape [samples x channels], sampled at ``SPLEETER_SAMPLING_RATE``.
+
+    Returns
+    -------
+    vocal: 1D numpy array
+        The monophonic waveform of the vocal track.
+    """
+    vocal = get_separator().separate(waveform)["vocals"]
+    return librosa.to_mono(vocal.T)
+
+
+def _predict_pitch_contour(waveform, fs, pitch_model):
+    model_future, model_settings = vcapp.app._load_model_in_background(pitch_model)  # pylint: disable=protected-access
+    feature = vcapp.app.extract_f0_feature(waveform, fs, model_settings)
+    return vcapp.app.predict_f0(feature, model_future.result(), model_settings), model_settings
+
+
 def _validate_order_and_get_new_pair(wav_paths, data_pair):
     wavs = [os.path.basename(wav) for wav in wav_paths]
     ori_wavs = [os.path.basename(data[0]) for data in data_pair]
@@ -366,8 +462,7 @@ def _vocal_separation(wav_list, out_folder):
 
     out_list = [jpath(out_folder, wav) for wav in wavs]
     if len(wav_list) > 0:
-        separator = Separator('spleeter:2stems')
-        separator._params["stft_backend"] = "librosa"  # pylint: disable=protected-access
+        separator = get_separator()
         for idx, wav_path in enumerate(wav_list, 1):
             logger.info("Separation Progress: %d/%d - %s", idx, len(wav_list), wav_path)
             separator.separate_to_file(wav_path, out_folder)
@@ -3,48 +3,47 @@ import pretty_midi
 from scipy.stats import norm
 
 from omnizart.utils import get_logger
+from omnizart.midi import note_array, to_pretty_midi
 
 
 logger = get_logger("Vocal Inference")
 
+#: Tracks of the inferred vocal notes, and the notes lacking pitch information.
+VOCAL_TRACKS = [("", 0, False), ("Missing Notes", 1, True)]
+
 
 def _conv(seq, window):
     half_len = len(window) // 2
-    end_idx = len(seq) - half_len
-    total = sum(window)
-    container = []
-    for val in seq[:half_len]:
-        container.append(val)
-    for idx in range(half_len, end_idx):
-        container.append(np.dot(seq[idx-half_len:idx+half_len+1], window) / total)  # noqa: E226
-    for val in seq[-half_len:]:
-        container.append(val)
-    return np.array(container)
+    if len(seq) < len(window):
+        smoothed = np.array([])
+    else:
+        smoothed = np.convolve(seq, window[::-1], mode="valid") / sum(window)
+    return np.concatenate([seq[:half_len], smoothed, seq[-half_len:]])
 
 
 def _find_peaks(seq, ctx_len=2, threshold=0.5):
     # Discard the first and the last <ctx_len> frames.
-    peaks = []
-    for idx in range(ctx_len, len(seq) - ctx_len - 1):
-        cur_val = seq[idx]
-        if cur_val < threshold:
-            continue
-        if not all(cur_val > seq[idx - ctx_len:idx]):
-            continue
-        if not all(cur_val >= seq[idx + 1:idx + ctx_len + 1]):
-            continue
-        peaks.append(idx)
-    return peaks
+    if len(seq) <= 2 * ctx_len + 1:
+        return np.array([], dtype=int)
+
+    seq = np.asarray(seq)
+    win_len = 2 * ctx_len + 1
+    windows = np.lib.stride_tricks.as_strided(
+        seq, shape=(len(seq) - win_len, win_len), strides=seq.strides * 2, writeable=False
+    )
+    center = windows[:, ctx_len:ctx_len + 1]
+    is_peak = center[:, 0] >= threshold
+    is_peak &= np.all(center > windows[:, :ctx_len], axis=1)
+    is_peak &= np.all(center >= windows[:, ctx_len + 1:], axis=1)
+    return np.flatnonzero(is_peak) + ctx_len
 
 
 def _find_first_bellow_th(seq, threshold=0.5):
-    activate = False
-    for idx, val in enumerate(seq):
-        if val > threshold:
-            activate = True
-        if activate and val < threshold:
-            return idx
-    return 0
+    above = np.flatnonzero(seq > threshold)
+    if len(above) == 0:
+        return 0
+    below = np.flatnonzero(seq[above[0]:] < threshold)
+    return above[0] + below[0] if len(below) > 0 else 0
 
 
 def infer_interval_original(pred, ctx_len=2, threshold=0.5, t_unit=0.02):
@@ -78,8 +77,8 @@ def infer_interval_original(pred, ctx_len=2, threshold=0.5, t_unit=0.02):
     onset_seq = _conv(onset_seq, window)
     offset_seq = _conv(offset_seq, window)
 
-    on_peaks = _find_peaks(onset_seq, ctx_len=ctx_len, threshold=threshold)
-    off_peaks = _find_peaks(offset_seq, ctx_len=ctx_len, threshold=threshold)
+    on_peaks = _find_peaks(onset_seq, ctx_len=ctx_len, threshold=threshold).tolist()
+    off_peaks = _find_peaks(offset_seq, ctx_len=ctx_len, threshold=threshold).tolist()
     if len(on_peaks) == 0 or len(off_peaks) == 0:
         return None
 
@@ -145,20 +144,23 @@ def infer_interval(pred, ctx_len=2, threshold=0.5, min_dura=0.1, t_unit=0.02):
         return None
 
     # Clearing out offsets before first onset (since onset is more accurate)
-    off_peaks = [idx for idx in off_peaks if idx > on_peaks[0]]
+    off_peaks = off_peaks[off_peaks > on_peaks[0]]
 
     on_peak_id = 0
     est_interval = []
     min_len = min_dura / t_unit
+
+    # Index of the first offset that is at least <min_len> frames after each onset.
+    match_off_ids = np.searchsorted(off_peaks, on_peaks + min_len)
     while on_peak_id < len(on_peaks) - 1:
         on_id = on_peaks[on_peak_id]
         next_on_id = on_peaks[on_peak_id + 1]
 
-        off_peak_id = np.where(np.array(off_peaks) >= on_id + min_len)[0]
-        if len(off_peak_id) == 0:
+        off_peak_id = match_off_ids[on_peak_id]
+        if off_peak_id == len(off_peaks):
             off_id = _find_first_bellow_th(pred[on_id:, 0], threshold=threshold)
         else:
-            off_id = off_peaks[off_peak_id[0]]
+            off_id = off_peaks[off_peak_id]
 
         if on_id < next_on_id < off_id \
                 and np.mean(pred[on_id:next_on_id, 1]) > np.mean(pred[on_id:next_on_id, 0]):
@@ -194,95 +196,148 @@ def infer_interval(pred, ctx_len=2, threshold=0.5, min_dura=0.1, t_unit=0.02):
     return np.array(est_interval)
 
 
-def _conclude_freq(freqs, std=2, min_count=3):
-    """Conclude the average frequency with gaussian distribution weighting.
-
-    Compute the average frequency with the given frequency list. Weighting each frequency
-    with gaussian distribution. The mean is set to the center position of the frequency
-    list, making sure that the center frequency has the highest weight. The assumption is
-    that for each note, the frequency should be the most stable and accurate at the middle
-    position.
+def _paint_f0(agg_f0, fs, total_frames):
+    """Flattens the aggregated F0 segments to the frame-level F0 contour.
 
-    Number of non-zero frequency should equal or greater than *min_count*, or the return
-    value will be zero, considering that there is not enough frequency information to
-    be concluded.
+    Segments are expected to be sorted and non-overlapping, same as the output of
+    ``omnizart.contour.f0_segments``.
     """
-    # Expect freqs contains zero
-    half_len = len(freqs) // 2
-    prob_func = lambda x: norm(0, std).pdf(x - half_len)
-    weights = [prob_func(idx) for idx in range(len(freqs))]
-    avg_freq = 0
-    count = 0
-    total_weight = 1e-8
-    for weight, freq in zip(weights, freqs):
-        if freq < 1e-6:
-            continue
+    start_idx = np.round(np.asarray(agg_f0["start_time"]) * fs).astype(int)
+    end_idx = np.round(np.asarray(agg_f0["end_time"]) * fs).astype(int)
+    order = np.argsort(start_idx, kind="stable")
+    start_idx, end_idx = start_idx[order], end_idx[order]
+    freqs = np.asarray(agg_f0["frequency"], dtype=np.float64)[order]
+
+    # Alternating the unvoiced gap before each segment and the segment itself.
+    prev_end = np.concatenate([[0], end_idx[:-1]])
+    lengths = np.stack([start_idx - prev_end, end_idx - start_idx], axis=1).clip(min=0)
+    values = np.stack([np.zeros_like(freqs), freqs], axis=1)
+    flat_f0 = np.repeat(values.ravel(), lengths.ravel())[:total_frames]
+    return np.pad(flat_f0, (0, total_frames - len(flat_f0)))
+
+
+def _conclude_freqs(flat_f0, start_idx, end_idx, std=2, min_count=3):
+    """Conclude the average frequency of each note with gaussian distribution weighting.
+
+    Compute the average frequency of ``flat_f0[start_idx[i]:end_idx[i]]`` for each note i.
+    Weighting each frequency with gaussian distribution. The mean is set to the center
+    position of the frequency slice, making sure that the center frequency has the highest
+    weight. The assumption is that for each note, the frequency should be the most stable
+    and accurate at the middle position.
+
+    Number of non-zero frequency should equal or greater than *min_count*, or the
+    concluded value will be zero, considering that there is not enough frequency
+    information to be concluded.
+    """
+    start_idx = np.clip(start_idx, 0, len(flat_f0))
+    end_idx = np.clip(end_idx, start_idx, len(flat_f0))
+    lengths = end_idx - start_idx
+    avg_freqs = np.zeros(len(lengths))
+    nonempty = lengths > 0
+    if not np.any(nonempty):
+        return avg_freqs
+
+    # Gather the slices of all notes into a single flat array.
+    offsets = np.concatenate([[0], np.cumsum(lengths[nonempty])[:-1]])
+    pos = np.arange(lengths.sum()) - np.repeat(offsets, lengths[nonempty])
+    freqs = flat_f0[np.repeat(start_idx[nonempty], lengths[nonempty]) + pos]
+    weights = norm(0, std).pdf(pos - np.repeat(lengths[nonempty] // 2, lengths[nonempty]))
+    weights[freqs < 1e-6] = 0
+
+    total_freq = np.add.reduceat(weights * freqs, offsets)
+    total_weight = np.add.reduceat(weights, offsets) + 1e-8
+    count = np.add.reduceat(freqs >= 1e-6, offsets)
+    avg_freqs[nonempty] = np.where(count >= min_count, total_freq / total_weight, 0)
+    return avg_freqs
+
+
+def infer_notes(interval, agg_f0, t_unit=0.02):
+    """Inference the given interval and aggregated F0 to the note array.
+
+    Notes with sufficient pitch information are placed in the first track, and the
+    remaining are placed in the second track as drum notes (see ``VOCAL_TRACKS``).
+
+    Parameters
+    ----------
+    interval: 2D numpy array
+        The return value of ``infer_interval`` function. Onset/offset pairs in seconds.
+    agg_f0: structured numpy array or dict[str, 1D numpy array]
+        Columnar aggregated f0 information, with at least the columns of *start_time*,
+        *end_time*, and *frequency*, e.g. the output of ``omnizart.contour.f0_segments``.
+        Time units should be in seonds, and pitch should be Hz.
+    t_unit: float
+        Time unit of each frame.
 
-        avg_freq += weight * freq
-        total_weight += weight
-        count += 1
+    Returns
+    -------
+    notes: structured numpy array
+        Note array of ``omnizart.midi.NOTE_DTYPE``.
+    """
+    fs = round(1 / t_unit)
+    end_times = np.asarray(agg_f0["end_time"])
+    max_secs = end_times.max() if len(end_times) > 0 else 0
+    total_frames = int(round(max_secs)) * fs + 10
+    flat_f0 = _paint_f0(agg_f0, fs, total_frames)
+
+    interval = np.zeros((0, 2)) if interval is None else np.asarray(interval).reshape(-1, 2)
+    start_idx = np.round(interval[:, 0] * fs).astype(int)
+    end_idx = np.round(interval[:, 1] * fs).astype(int)
+    avg_hz = _conclude_freqs(flat_f0, start_idx, end_idx)
+
+    voiced = avg_hz >= 1e-6
+    note_nums = np.full(len(avg_hz), -1)
+    note_nums[voiced] = np.round(pretty_midi.hz_to_note_number(avg_hz[voiced]))
+    valid = voiced & (note_nums >= 0) & (note_nums <= 127)
+    for note_num in note_nums[voiced & ~valid]:
+        logger.warning("Caught invalid note number: %d (should be in range 0~127). Skipping.", note_num)
+
+    skip_num = len(interval) - np.count_nonzero(valid)
+    if skip_num > 0:
+        logger.warning("A total of %d notes are skipped due to lack of corressponding pitch information.", skip_num)
 
-    return avg_freq / total_weight if count >= min_count else 0
+    counts = [np.count_nonzero(valid), np.count_nonzero(~voiced)]
+    return note_array(
+        start=np.concatenate([interval[valid, 0], interval[~voiced, 0]]),
+        end=np.concatenate([interval[valid, 1], interval[~voiced, 1]]),
+        pitch=np.concatenate([note_nums[valid], np.full(counts[1], 77)]),
+        velocity=80,
+        program=np.repeat([0, 1], counts),
+        is_drum=np.repeat([False, True], counts),
+        track=np.repeat([0, 1], counts)
+    )
 
 
-def infer_midi(interval, agg_f0, t_unit=0.02):
+def infer_midi(interval, agg_f0, t_unit=0.02, as_array=False):
     """Inference the given interval and aggregated F0 to MIDI file.
 
     Parameters
     ----------
     interval: list[tuple[float, float]]
         The return value of ``infer_interval`` function. List of onset/offset pairs in seconds.
-    agg_f0: list[dict]
+    agg_f0: list[dict] or structured numpy array
         Aggregated f0 information. Each elements in the list should contain three columns:
         *start_time*, *end_time*, and *frequency*. Time units should be in seonds, and pitch
         should be Hz.
     t_unit: float
         Time unit of each frame.
+    as_array: bool
+        Whether to return the note array of ``omnizart.midi.NOTE_DTYPE`` instead.
 
     Returns
     -------
     midi: pretty_midi.PrettyMIDI
         The inferred MIDI object.
-    """
-    fs = round(1 / t_unit)
-    max_secs = max(record["end_time"] for record in agg_f0)
-    total_frames = round(max_secs) * fs + 10
-    flat_f0 = np.zeros(total_frames)
-    for record in agg_f0:
-        start_idx = int(round(record["start_time"] * fs))
-        end_idx = int(round(record["end_time"] * fs))
-        flat_f0[start_idx:end_idx] = record["frequency"]
-
-    notes = []
-    drum_notes = []
-    skip_num = 0
-    for onset, offset in interval:
-        start_idx = int(round(onset * fs))
-        end_idx = int(round(offset * fs))
-        freqs = flat_f0[start_idx:end_idx]
-        avg_hz = _conclude_freq(freqs)
-        if avg_hz < 1e-6:
-            skip_num += 1
-            note = pretty_midi.Note(velocity=80, pitch=77, start=onset, end=offset)
-            drum_notes.append(note)
-            continue
-
-        note_num = int(round(pretty_midi.hz_to_note_number(avg_hz)))
-        if not (0 <= note_num <= 127):
-            logger.warning("Caught invalid note number: %d (should be in range 0~127). Skipping.", note_num)
-            skip_num += 1
-            continue
-        note = pretty_midi.Note(velocity=80, pitch=note_num, start=onset, end=offset)
-        notes.append(note)
 
-    if skip_num > 0:
-        logger.warning("A total of %d notes are skipped due to lack of corressponding pitch information.", skip_num)
-
-    inst = pretty_midi.Instrument(program=0)
-    inst.notes += notes
-    drum_inst = pretty_midi.Instrument(program=1, is_drum=True, name="Missing Notes")
-    drum_inst.notes += drum_notes
-    midi = pretty_midi.PrettyMIDI()
-    midi.instruments.append(inst)
-    midi.instruments.append(drum_inst)
-    return midi
+    See Also
+    --------
+    omnizart.vocal.inference.infer_notes: Array-native version of this function.
+    """
+    if not isinstance(agg_f0, np.ndarray):
+        agg_f0 = {
+            key: np.array([record[key] for record in agg_f0], dtype=np.float64)
+            for key in ["start_time", "end_time", "frequency"]
+        }
+    notes = infer_notes(interval, agg_f0, t_unit=t_unit)
+    if as_array:
+        return notes
+    return to_pretty_midi(notes, tracks=VOCAL_TRACKS)
@@ -6,46 +6,62 @@ from omnizart.utils import get_logger
 logger = get_logger("Vocal Predict")
 
 
-def create_batches(feature, ctx_len=9, batch_size=64):
-    feat_pad = np.pad(feature, ((ctx_len, ctx_len), (0, 0), (0, 0)))
+def iter_batches(feature, ctx_len=9, batch_size=64):
+    """Yields batches of the context windows centered at each frame.
 
-    slices = [feat_pad[idx - ctx_len:idx + ctx_len + 1] for idx in range(ctx_len, len(feat_pad) - ctx_len)]
-    pad_size = batch_size - len(slices) % batch_size
-    payload = np.zeros_like(slices[0])
-    for _ in range(pad_size):
-        slices.append(payload)
-    slices = np.array(slices)
-    assert len(slices) % batch_size == 0
+    Each window covers ``2*ctx_len+1`` frames of the zero-padded feature. Batches are
+    strided views of the padded feature, thus no copy of the windows is made.
 
-    batches = [slices[idx:idx + batch_size] for idx in range(0, len(slices), batch_size)]
-    return np.array(batches, dtype=np.float32), pad_size
+    Yields
+    ------
+    start_idx: int
+        Index of the first frame of the batch.
+    batch: 4D numpy array
+        Read-only view of shape [batch x (2*ctx_len+1) x freq x channels].
+    """
+    feat_pad = np.pad(feature.astype(np.float32), ((ctx_len, ctx_len), (0, 0), (0, 0)))
+    win_len = 2 * ctx_len + 1
+    windows = np.lib.stride_tricks.as_strided(
+        feat_pad,
+        shape=(len(feature), win_len) + feat_pad.shape[1:],
+        strides=(feat_pad.strides[0],) + feat_pad.strides,
+        writeable=False
+    )
+    for start_idx in range(0, len(windows), batch_size):
+        yield start_idx, windows[start_idx:start_idx + batch_size]
 
 
-def merge_batches(batch_pred):
-    assert len(batch_pred.shape) == 4
+class OverlapAdd:
+    """Accumulates the predictions of overlapped context windows.
 
-    batches, batch_size, frm_len, out_classes = batch_pred.shape
-    total_len = batches * batch_size + frm_len - 1
-    output = np.zeros((total_len, out_classes))
-    for bidx, batch in enumerate(batch_pred):
-        for fidx, frame in enumerate(batch):
-            start_idx = bidx * batch_size + fidx
-            output[start_idx:start_idx + frm_len] += frame
+    The window starting at frame ``idx`` covers the output frames from ``idx`` to
+    ``idx + frm_len``. The merged output of each frame is the average over all the
+    windows covering it.
+    """
+    def __init__(self, total_len, frm_len, out_classes):
+        self.frm_len = frm_len
+        self.output = np.zeros((total_len + frm_len - 1, out_classes))
+        self.counts = np.zeros((total_len + frm_len - 1, 1))
 
-    max_len = min(frm_len - 1, len(output) - frm_len)
-    output[max_len:-max_len] /= max_len + 1
-    for idx in range(max_len):
-        output[idx] /= idx + 1
-        output[-1 - idx] /= idx + 1
-    return output
+    def add(self, start_idx, batch_pred):
+        """Adds the predictions of the windows starting from ``start_idx``."""
+        length = len(batch_pred)
+        for fidx in range(self.frm_len):
+            self.output[start_idx + fidx:start_idx + fidx + length] += batch_pred[:, fidx]
+            self.counts[start_idx + fidx:start_idx + fidx + length] += 1
+
+    def result(self):
+        return self.output / np.maximum(self.counts, 1)
 
 
 def predict(feature, model, ctx_len=9, batch_size=16):
     assert feature.shape[1:] == (174, 9)
-    batches, pad_size = create_batches(feature, ctx_len=ctx_len, batch_size=batch_size)
-    batch_pred = []
-    for idx, batch in enumerate(batches):
-        print(f"Progress: {idx+1}/{len(batches)}", end="\r")
-        batch_pred.append(model.predict(batch))
-    pred = merge_batches(np.array(batch_pred))
-    return pred[ctx_len:-pad_size - ctx_len]
+    total_batches = int(np.ceil(len(feature) / batch_size))
+    merger = None
+    for idx, (start_idx, batch) in enumerate(iter_batches(feature, ctx_len=ctx_len, batch_size=batch_size)):
+        print(f"Progress: {idx+1}/{total_batches}", end="\r")
+        pred = model.predict(batch)
+        if merger is None:
+            merger = OverlapAdd(len(feature), pred.shape[1], pred.shape[2])
+        merger.add(start_idx, pred)
+    return merger.result()[ctx_len:ctx_len + len(feature)]
@@ -14,23 +14,23 @@ from os.path import join as jpath
 from datetime import datetime
 
 import numpy as np
-from scipy.io.wavfile import write as wavwrite
 import h5py
 import tensorflow as tf
 from tensorflow.keras.utils import to_categorical
-from mir_eval import sonify
 
 from omnizart.base import BaseTranscription, BaseDatasetLoader
 from omnizart.setting_loaders import VocalContourSettings
+from omnizart.feature.cfp import _extract_cfp
 from omnizart.feature.wrapper_func import extract_cfp_feature
-from omnizart.utils import get_logger, ensure_path_exists, parallel_generator, resolve_dataset_type, aggregate_f0_info
-from omnizart.io import write_yaml, write_agg_f0_results
+from omnizart.utils import get_logger, ensure_path_exists, parallel_generator, resolve_dataset_type
+from omnizart.io import load_audio, write_yaml, write_agg_f0_results
+from omnizart.contour import f0_segments, write_contour_wav
 from omnizart.train import train_epochs, get_train_val_feat_file_list
 from omnizart.callbacks import EarlyStopping, ModelCheckpoint
 from omnizart.vocal_contour.inference import inference
 from omnizart.vocal_contour import labels as lextor
 from omnizart.constants import datasets as d_struct
-from omnizart.models.u_net import semantic_segmentation
+from omnizart.models.u_net import semantic_segmentation, to_variable_length
 from omnizart.music.losses import focal_loss
 
 
@@ -42,7 +42,16 @@ class VocalContourTranscription(BaseTranscription):
     def __init__(self, conf_path=None):
         super().__init__(VocalContourSettings, conf_path=conf_path)
 
-    def transcribe(self, input_audio, model_path=None, output="./"):
+    def transcribe(
+        self,
+        input_audio,
+        model_path=None,
+        output="./",
+        variable_length=False,
+        hop_size=None,
+        batch_size=16,
+        sonify=False
+    ):
         """Transcribe frame-level fundamental frequency of vocal from the given audio.
 
         Parameters
@@ -54,11 +63,22 @@ class VocalContourTranscription(BaseTranscription):
             the folder that contains `arch.yaml`, `weights.h5`, and `configuration.yaml`.
         output: Path (optional)
             Path for writing out the extracted vocal f0. Default to current path.
+        variable_length: bool
+            Whether to predict the whole audio in large tiles with the fully-convolutional
+            model, instead of sliding a fixed-length window.
+        hop_size: int
+            Hop size of the sliding window in frames. Default to half of the window length.
+            Set to 1 for the slower, frame-by-frame reference mode.
+        batch_size: int
+            Number of windows to be predicted at once.
+        sonify: bool
+            Whether to render the pitch contour to ``<output>_trans.wav``.
 
         Returns
         -------
-        f0: txt
-            The transcribed f0 of the vocal contour in Hz.
+        agg_f0: structured numpy array
+            Segments of the transcribed f0 of the vocal contour, with the onset, offset,
+            and frequency (Hz). See ``omnizart.contour.F0_SEGMENT_DTYPE``.
 
         See Also
         --------
@@ -67,35 +87,95 @@ class VocalContourTranscription(BaseTranscription):
         if not os.path.isfile(input_audio):
             raise FileNotFoundError(f"The given audio path does not exist. Path: {input_audio}")
 
-        logger.info("Loading model...")
-        model, model_settings = self._load_model(model_path)
+        logger.info("Loading model in background...")
+        model_future, model_settings = self._load_model_in_background(model_path)
 
-        logger.info("Extracting feature...")
-        feature = extract_cfp_feature(
-            input_audio,
-            hop=model_settings.feature.hop_size,
-            win_size=model_settings.feature.window_size,
-            down_fs=model_settings.feature.sampling_rate
-        )
+        logger.info("Loading audio...")
+        waveform, fs = load_audio(input_audio, sampling_rate=model_settings.feature.sampling_rate)
+        feature = self.extract_f0_feature(waveform, fs, model_settings)
 
-        logger.info("Predicting...")
-        f0 = inference(feature[:, :, 0], model, timestep=model_settings.training.timesteps)
-        agg_f0 = aggregate_f0_info(f0, t_unit=model_settings.feature.hop_size)
-
-        timestamp = np.arange(len(f0)) * model_settings.feature.hop_size
-        wav = sonify.pitch_contour(
-            timestamp, f0, model_settings.feature.sampling_rate, amplitudes=0.5 * np.ones(len(f0))
-        )
+        model = model_future.result()
+        if variable_length:
+            model = to_variable_length(model)
+        f0 = self.predict_f0(feature, model, model_settings, hop_size=hop_size, batch_size=batch_size)
+        agg_f0 = f0_segments(f0, t_unit=model_settings.feature.hop_size)
 
         output = self._output_midi(output, input_audio, verbose=False)
         if output is not None:
-            write_agg_f0_results(agg_f0, f"{output}_f0.csv")
-            wavwrite(f"{output}_trans.wav", model_settings.feature.sampling_rate, wav)
-            logger.info("Text and Wav files have been written to %s", os.path.abspath(os.path.dirname(output)))
+            self.write_f0_outputs(f0, agg_f0, output, model_settings, sonify=sonify)
+            logger.info("Output files have been written to %s", os.path.abspath(os.path.dirname(output)))
 
         logger.info("Transcription finished")
         return agg_f0
 
+    def extract_f0_feature(self, waveform, fs, model_settings):  # pylint: disable=R0201
+        """Extracts the feature for F0 prediction from the decoded audio.
+
+        Parameters
+        ----------
+        waveform: 1D numpy array
+            The monophonic waveform of the audio.
+        fs: int
+            Sampling rate of the waveform. Will be resampled to the sampling rate of the model.
+        model_settings: VocalContourSettings
+            Settings of the model.
+
+        Returns
+        -------
+        feature: 2D numpy array
+            The CFP feature in shape [time x freq].
+        """
+        logger.info("Extracting feature...")
+        z, _, _, _, _ = _extract_cfp(
+            waveform,
+            fs,
+            down_fs=model_settings.feature.sampling_rate,
+            hop=model_settings.feature.hop_size,
+            win_size=model_settings.feature.window_size
+        )
+        return z.T
+
+    def predict_f0(self, feature, model, model_settings, hop_size=None, batch_size=16):  # pylint: disable=R0201
+        """Predicts the frame-level F0 of the vocal from the extracted feature.
+
+        Together with ``extract_f0_feature``, this is the composable stage of ``transcribe``,
+        which works on the in-memory waveform with the preloaded model, and writes no file.
+
+        Parameters
+        ----------
+        feature: 2D numpy array
+            The feature extracted by ``extract_f0_feature``.
+        model: tf.keras.Model
+            The vocal-contour model, e.g. loaded by ``_load_model``.
+        model_settings: VocalContourSettings
+            Settings of the model.
+        hop_size: int
+            Hop size of the sliding window in frames.
+        batch_size: int
+            Number of windows to be predicted at once.
+
+        Returns
+        -------
+        f0: 1D numpy array
+            The F0 of each frame in Hz, and 0 for the unvoiced frames.
+        """
+        logger.info("Predicting...")
+        return inference(
+            feature,
+            model,
+            timestep=model_settings.training.timesteps,
+            batch_size=batch_size,
+            hop_size=hop_size
+        )
+
+    def write_f0_outputs(self, f0, agg_f0, output, model_settings, sonify=False):  # pylint: disable=R0201
+        """Writes the aggregated F0 to ``<output>_f0.csv``, and optionally renders the F0 to ``<output>_trans.wav``."""
+        write_agg_f0_results(agg_f0, f"{output}_f0.csv")
+        if sonify:
+            write_contour_wav(
+                f0, model_settings.feature.hop_size, model_settings.feature.sampling_rate, f"{output}_trans.wav"
+            )
+
     def generate_feature(self, dataset_path, vocalcontour_settings=None, num_threads=4):
         """Extract the feature from the given dataset.
 
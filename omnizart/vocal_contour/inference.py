@@ -1,54 +1,96 @@
 import numpy as np
 from scipy.special import expit
-from librosa.core import midi_to_hz
 
-from omnizart.constants.midi import LOWEST_MIDI_NOTE
+from omnizart.contour import bin_to_hz, decode_f0
+from omnizart.models.u_net import predict_on_tiles
 
 
-def inference(feature, model, timestep=128, batch_size=10, feature_num=384):
+def inference(feature, model, timestep=128, batch_size=16, feature_num=384, tile_size=1024, hop_size=None):
+    """Infers the F0 contour from the feature.
+
+    The model is applied with a sliding window, and the overlapping predictions are
+    merged by weighted overlap-add. If the model accepts inputs of variable length
+    (see ``omnizart.models.u_net.to_variable_length``), the feature is instead
+    predicted in large tiles of ``tile_size`` frames.
+
+    Parameters
+    ----------
+    feature: 2D numpy array
+        The CFP feature of shape [time x freq].
+    model: tf.keras.Model
+        The vocal-contour model.
+    timestep: int
+        Length of the input window of the model.
+    batch_size: int
+        Number of windows predicted at once.
+    feature_num: int
+        Size of the frequency axis of the model input.
+    tile_size: int
+        Length of each tile for models of variable input length.
+    hop_size: int
+        Hop size of the sliding window. Default to half of ``timestep``. Set to 1
+        for predicting every frame within all windows, which is much slower
+        and serves as the reference mode.
+
+    Returns
+    -------
+    f0: 1D numpy array
+        The F0 of each frame in Hz, and 0 for the unvoiced frames.
+    """
     assert len(feature.shape) == 2
     # Padding
+    freq_num = feature.shape[1]
+    pad_bottom = (feature_num - freq_num) // 2
+    pad_top = feature_num - freq_num - pad_bottom
+    feature = np.pad(feature, ((0, 0), (pad_bottom, pad_top)))
+    if model.input_shape[1] is None:
+        output = predict_on_tiles(np.expand_dims(feature, axis=2), model, tile_size=tile_size)[:, :, 1]
+        output = 1 / (1 + np.exp(-expit(output)))
+    else:
+        hop_size = timestep // 2 if hop_size is None else hop_size
+        output = _sliding_inference(feature, model, timestep, hop_size, batch_size)
+    output = output[:, pad_bottom:pad_bottom + freq_num]  # Remove padding
+
+    # Filter values
+    avg_max_val = np.mean(np.max(output, axis=1))
+    output = np.where(output > avg_max_val, output, 0)
+
+    # Generate final output F0
+    return decode_f0(output, bin_to_hz(freq_num))
+
+
+def _sliding_inference(feature, model, timestep, hop_size, batch_size):
     total_samples = len(feature)
-    pad_bottom = (feature_num - feature.shape[1]) // 2
-    pad_top = feature_num - feature.shape[1] - pad_bottom
-    pad_len = timestep - 1
-    feature = np.pad(feature, ((pad_len, pad_len), (pad_bottom, pad_top)))
-
-    # Prepare for prediction
-    output = np.zeros(feature.shape + (2,))
-    total_batches = int(np.ceil(total_samples / batch_size))
-    last_batch_idx = len(feature) - pad_len
+    pad_front = timestep - hop_size
+    total_windows = int(np.ceil((total_samples + pad_front) / hop_size))
+    pad_end = (total_windows - 1) * hop_size + timestep - total_samples - pad_front
+    feature = np.pad(feature, ((pad_front, pad_end), (0, 0))).astype(np.float32)
+
+    # Windows as a strided view of the padded feature, without copying.
+    st0, st1 = feature.strides
+    windows = np.lib.stride_tricks.as_strided(
+        feature, shape=(total_windows, timestep, feature.shape[1]), strides=(st0 * hop_size, st0, st1), writeable=False
+    )
+
+    # Frames near the window border see less context, thus are weighted down when windows overlap.
+    weights = np.ones(timestep) if hop_size == 1 else np.hanning(timestep + 2)[1:-1]
+    output = np.zeros(feature.shape)
+    weight_sum = np.zeros(len(feature))
+    total_batches = int(np.ceil(total_windows / batch_size))
     for bidx in range(total_batches):
         print(f"batch: {bidx+1}/{total_batches}", end="\r")
 
-        # Collect batch feature
         start_idx = bidx * batch_size
-        end_idx = min(start_idx + batch_size, last_batch_idx)
-        batch = np.array([feature[idx:idx+timestep] for idx in range(start_idx, end_idx)])  # noqa: E226
-        batch = np.expand_dims(batch, axis=3)
+        batch = windows[start_idx:start_idx + batch_size, :, :, np.newaxis]
 
         # Predict contour
-        batch_pred = model.predict(batch)
+        batch_pred = model.predict(batch, batch_size=batch_size)[:, :, :, 1]
         batch_pred = 1 / (1 + np.exp(-expit(batch_pred)))
 
-        # Add the batch results to the output container.
+        # Overlap-add the batch results to the output container.
         for idx, pred in enumerate(batch_pred):
-            slice_start = start_idx + idx
-            slice_end = slice_start + timestep
-            output[slice_start:slice_end] += pred
-    output = output[pad_len:-pad_len, pad_bottom:-pad_top, 1]  # Remove padding
-
-    # Filter values
-    avg_max_val = np.mean(np.max(output, axis=1))
-    output = np.where(output > avg_max_val, output, 0)
-
-    # Generate final output F0
-    f0 = []  # pylint: disable=invalid-name
-    for pitches in output:
-        if np.sum(pitches) > 0:
-            pidx = np.argmax(pitches)
-            f0.append(midi_to_hz(pidx / 4 + LOWEST_MIDI_NOTE))
-        else:
-            f0.append(0)
-
-    return np.array(f0)
+            slice_start = (start_idx + idx) * hop_size
+            output[slice_start:slice_start + timestep] += weights[:, None] * pred
+            weight_sum[slice_start:slice_start + timestep] += weights
+    output = output[pad_front:pad_front + total_samples]  # Remove padding
+    return output / weight_sum[pad_front:pad_front + total_samples, None]
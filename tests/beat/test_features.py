@@ -0,0 +1,81 @@
+import numpy as np
+
+from omnizart.base import Label
+from omnizart.beat import features
+from omnizart.constants.datasets import MusicNetStructure
+
+
+def test_extract_feature_from_notes():
+    start_time = np.array([0.0, 0.02, 0.02, 0.05])
+    end_time = np.array([0.03, 0.02, 0.06, 0.08])
+    pitch = np.array([21, 22, 108, 21])
+    feature = features.extract_feature_from_notes(start_time, end_time, pitch, t_unit=0.01)
+
+    expected_onset = np.zeros((8, 88))
+    expected_onset[[0, 2, 2, 5], [0, 1, 87, 0]] = 1
+    expected_dura = np.zeros((8, 88))
+    expected_dura[0:3, 0] = 1
+    expected_dura[2:6, 87] = 1
+    expected_dura[5:8, 0] = 1
+    assert feature.shape == (8, 178)
+    assert np.array_equal(feature[:, :88], expected_onset)
+    assert np.array_equal(feature[:, 88:176], expected_dura)
+    assert np.allclose(feature[:, 176], [0, 0, 0.02, 0, 0, 0.03, 0, 0])
+    assert np.array_equal(feature[:, 177], [0, 0, 2, 0, 0, 1, 0, 0])
+
+
+def test_extract_feature_with_labels():
+    labels = [
+        Label(start_time=0.1, end_time=0.5, note=60),
+        Label(start_time=0.3, end_time=0.4, note=64),
+        Label(start_time=0.3, end_time=0.35, note=20)
+    ]
+    feature = features.extract_feature(labels, t_unit=0.01)
+    expected = features.extract_feature_from_notes(
+        np.array([0.1, 0.3]), np.array([0.5, 0.4]), np.array([60, 64]), t_unit=0.01
+    )
+    assert np.array_equal(feature, expected)
+
+
+def test_load_musicnet_label_columns(tmp_path):
+    csv_path = tmp_path / "label.csv"
+    csv_path.write_text(
+        "start_time,end_time,instrument,note,start_beat,end_beat,note_value\n"
+        "44100,88200,1,60,1.0,0.5,Quarter\n"
+        "66150,132300,41,72,1.5,1.0,Half\n"
+    )
+    labels = MusicNetStructure.load_label(str(csv_path))
+    columns = MusicNetStructure.load_label_columns(str(csv_path))
+    for key in ["start_time", "end_time", "note", "instrument", "start_beat", "end_beat"]:
+        assert np.allclose(columns[key], [getattr(label, key) for label in labels])
+
+
+def test_extract_musicnet_label(tmp_path):
+    csv_path = tmp_path / "label.csv"
+    csv_path.write_text(
+        "start_time,end_time,instrument,note,start_beat,end_beat,note_value\n"
+        "44100,88200,1,60,1.0,1.0,Quarter\n"
+        "66150,88200,1,62,2.0,0.5,Eighth\n"
+        "77175,88200,1,62,2.5,0.5,Eighth\n"
+        "110250,132300,1,64,4.0,1.0,Quarter\n"
+    )
+    beat_arr, down_beat_arr = features.extract_musicnet_label(str(csv_path), t_unit=0.01, fade_out=3)
+
+    # Beat 3 is interpolated, and beat 5 is skipped for exceeding the end.
+    expected_beat = np.zeros(303)
+    for idx in [100, 150, 200, 250]:
+        expected_beat[idx:idx + 3] = [1, 1/2, 1/3]
+    expected_down_beat = np.zeros(303)
+    expected_down_beat[100:103] = [1, 1/2, 1/3]
+    assert np.allclose(beat_arr, expected_beat)
+    assert np.allclose(down_beat_arr, expected_down_beat)
+
+
+def test_fade_out_activation():
+    act = features._fade_out_activation(10, np.array([5, 1, 2]), 3)
+    assert np.allclose(act, [0, 1, 1, 1/2, 1/3, 1, 1/2, 1/3, 0, 0])
+
+
+def test_round_beats():
+    beats = np.array([1.95, 2.95, 0.05, 0.15, 1.25, 3.0, -0.35])
+    assert features._round_beats(beats, rounding=1).tolist() == [round(float(beat), 1) for beat in beats]
@@ -0,0 +1,76 @@
+import pytest
+import numpy as np
+
+from omnizart.beat import prediction as putils
+from omnizart.models.rnn import blstm, blstm_attn, ChunkedBLSTMInference
+
+
+TIMESTEPS = 20
+
+
+class FakeModel:
+    def predict_on_batch(self, batch):
+        # Prediction of each frame depends only on the feature of itself.
+        return batch[:, :, :2]
+
+
+@pytest.mark.parametrize("length", [7, 40, 123])
+def test_predict_overlap(length):
+    feature = np.random.random((length, 178))
+    pred = putils.predict(feature, FakeModel(), timesteps=TIMESTEPS, batch_size=4)
+    batches = putils.create_batches(feature, timesteps=TIMESTEPS, batch_size=4)
+    assert np.array_equal(pred, batches[..., :2].reshape(-1, 2)[:length])
+
+
+@pytest.mark.parametrize("length", [7, 40, 123])
+def test_predict_merge_overlap(length):
+    feature = np.random.random((length, 178))
+    pred = putils.predict(feature, FakeModel(), timesteps=TIMESTEPS, batch_size=4, merge_overlap=True)
+    assert np.array_equal(pred, feature[:, :2])
+
+
+def test_create_batches():
+    feature = np.random.random((53, 178))
+    batches = putils.create_batches(feature, timesteps=TIMESTEPS, batch_size=4)
+    step_size = TIMESTEPS // 2
+    padded = np.pad(feature, ((step_size // 2, len(batches) * 4 * step_size), (0, 0)))
+    slices = batches.reshape(-1, TIMESTEPS, 178)
+    for idx, feat_slice in enumerate(slices):
+        assert np.array_equal(feat_slice, padded[idx * step_size:idx * step_size + TIMESTEPS])
+
+
+def test_chunked_inference_without_state():
+    model = blstm(timesteps=TIMESTEPS, input_dim=178, hidden_dim=4)
+    feature = np.random.random((3 * TIMESTEPS + 7, 178)).astype(np.float32)
+    padded = np.pad(feature, ((0, TIMESTEPS - 7), (0, 0))).reshape(4, TIMESTEPS, 178)
+    expected = model.predict(padded, verbose=0).reshape(-1, 2)[:len(feature)]
+
+    pred = ChunkedBLSTMInference(model, look_ahead=0, carry_state=False)(feature, batch_size=3)
+    assert np.allclose(pred, expected, atol=1e-5)
+
+
+def test_chunked_inference_full_context():
+    model = blstm(timesteps=TIMESTEPS, input_dim=178, hidden_dim=4)
+    inference = ChunkedBLSTMInference(model, look_ahead=4 * TIMESTEPS, carry_state=True)
+    seq = inference.layer_norm(np.random.random((1, 4 * TIMESTEPS, 178)).astype(np.float32))
+
+    expected, chunked = seq, seq
+    for bilstm in inference.bilstms:
+        expected = bilstm(expected)
+        chunked = inference._bilstm(bilstm, chunked, 4)
+    assert np.allclose(chunked, expected, atol=1e-5)
+
+
+def test_predict_chunk():
+    model = blstm(timesteps=TIMESTEPS, input_dim=178, hidden_dim=4)
+    feature = np.random.random((57, 178)).astype(np.float32)
+    pred = putils.predict(feature, model, timesteps=TIMESTEPS, mode="chunk", look_ahead=5)
+    assert pred.shape == (57, 2)
+    assert np.allclose(pred, ChunkedBLSTMInference(model, look_ahead=5)(feature))
+
+
+def test_predict_chunk_with_attention():
+    model = blstm_attn(timesteps=TIMESTEPS, input_dim=178, lstm_hidden_dim=4, attn_hidden_dim=8)
+    pred = putils.predict(np.random.random((45, 178)), model, timesteps=TIMESTEPS, mode="chunk")
+    assert pred.shape == (45, 2)
+    assert np.all((pred >= 0) & (pred <= 1))
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from omnizart.chord import app
@@ -6,3 +7,28 @@ from omnizart.chord import app
 @pytest.mark.parametrize("mode", [None, "ChordV1"])
 def test_load_model(mode):
     app._load_model(mode, custom_objects=app.custom_objects)
+
+
+def test_mcgill_dataset_loader_lazy_augment(tmp_path, mocker):
+    from omnizart.chord.app import McGillDatasetLoader, _write_feature
+    from omnizart.chord.features import shift_segmented_chromagram, shift_chord
+
+    feature = [{
+        "chroma": np.random.random((3, 4, 2*24)).astype(np.float32),
+        "chord": np.random.randint(0, 25, size=(3, 4)).astype(np.int32),
+        "chord_change": np.random.randint(0, 2, size=(3, 4)).astype(np.int32),
+        "tc": np.zeros((3, 4, 2*6), dtype=np.float32),
+        "sequence_len": np.array([4, 4, 4], dtype=np.int32),
+        "num_sequence": 3
+    }]
+    _write_feature(feature, str(tmp_path / "eager.hdf"))
+    _write_feature(feature, str(tmp_path / "lazy.hdf"), lazy_augment=True)
+    mocker.patch("omnizart.chord.app.random.randrange", return_value=5)
+
+    loader = McGillDatasetLoader(feature_folder=str(tmp_path), num_samples=6)
+    for hdf_name, expected_shift in [(str(tmp_path / "eager.hdf"), 0), (str(tmp_path / "lazy.hdf"), 5)]:
+        chroma = loader._get_feature(hdf_name, 1)
+        chord, chord_change = loader._get_label(hdf_name, 1)
+        assert np.array_equal(chroma, shift_segmented_chromagram(feature[0]["chroma"][1], expected_shift))
+        assert np.array_equal(chord, shift_chord(feature[0]["chord"][1], expected_shift))
+        assert np.array_equal(chord_change, feature[0]["chord_change"][1])
@@ -0,0 +1,63 @@
+import numpy as np
+
+from omnizart.chord import features
+from omnizart.constants.feature import CHORD_INT_MAPPING
+
+
+def test_load_feature(tmp_path):
+    lab_path = tmp_path / "full.lab"
+    lab_path.write_text("0.0\t1.0\tN\n1.0\t2.5\tBb:maj\n2.5\t4.0\tA#:maj\n4.0\t9.0\tD:min\n")
+    chroma = np.random.random((8, 24))
+    onsets = np.arange(8) * 0.5
+    rows = [f"\"song\",{onset}," + ",".join(map(str, row)) for onset, row in zip(onsets, chroma)]
+    feat_path = tmp_path / "bothchroma.csv"
+    feat_path.write_text("\n".join(rows))
+
+    label = features.load_label(str(lab_path))
+    feature = features.load_feature(str(feat_path), label)
+    expected_chord = [CHORD_INT_MAPPING[name] for name in ["N"]*2 + ["A#:maj"]*3 + ["A#:maj"]*3]
+    assert np.allclose(feature["onset"], onsets)
+    assert np.allclose(feature["chroma"], chroma)
+    assert feature["chroma"].dtype == np.float32
+    assert feature["chord"].tolist() == expected_chord
+    assert feature["chord_change"].tolist() == [1, 0, 1, 0, 0, 0, 0, 0]
+
+
+def test_shift_chord():
+    chord = np.arange(26)
+    for shift in range(12):
+        expected = [(c + shift) % 12 if c < 12 else (c - 12 + shift) % 12 + 12 if c < 24 else c for c in chord]
+        assert features.shift_chord(chord, shift).tolist() == expected
+        assert features.shift_chord(5, shift) == expected[5]
+
+
+def test_shift_segmented_chromagram():
+    feature = {
+        "chroma": np.random.random((37, 24)).astype(np.float32),
+        "chord": np.random.randint(0, 25, size=37),
+        "chord_change": np.zeros(37, dtype=int)
+    }
+    augmented = features.augment_feature(feature)
+    segments = features.segment_feature(augmented, segment_width=3, segment_hop=2)
+    reshaped = features.reshape_feature(segments, num_steps=4)
+    for shift, feat in enumerate(reshaped):
+        shifted = features.shift_segmented_chromagram(np.array(reshaped[0]["chroma"]), shift)
+        assert np.array_equal(shifted, feat["chroma"])
+        assert np.array_equal(features.shift_chord(reshaped[0]["chord"], shift), feat["chord"])
+
+
+def test_load_feature_overlapped_labels(tmp_path):
+    lab_path = tmp_path / "full.lab"
+    lab_path.write_text("0.0\t2.0\tN\n1.0\t3.0\tC:maj\n2.5\t4.0\tD:min\n0.5\t1.5\tE:maj\n")
+    chroma = np.random.random((8, 24))
+    onsets = np.arange(8) * 0.5
+    rows = [f"\"song\",{onset}," + ",".join(map(str, row)) for onset, row in zip(onsets, chroma)]
+    feat_path = tmp_path / "bothchroma.csv"
+    feat_path.write_text("\n".join(rows))
+
+    label = features.load_label(str(lab_path))
+    feature = features.load_feature(str(feat_path), label)
+
+    # Each frame takes the first interval in the label file that covers it.
+    names = ["N"] * 4 + ["C:maj"] * 2 + ["D:min"] * 2
+    assert feature["chord"].tolist() == [CHORD_INT_MAPPING[name] for name in names]
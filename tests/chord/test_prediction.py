@@ -0,0 +1,39 @@
+import pytest
+import numpy as np
+
+from omnizart.chord import prediction as putils
+from omnizart.feature.chroma import segment_view
+
+
+@pytest.mark.parametrize("segment_hop", [1, 5])
+def test_segment_view(segment_hop):
+    chroma = np.random.random((37, 24))
+    segments = segment_view(chroma, segment_width=5, segment_hop=segment_hop)
+
+    chroma_pad = np.pad(chroma, ((2, 2), (0, 0)))
+    expected = np.array([chroma_pad[idx:idx + 5].ravel() for idx in range(0, 37, segment_hop)])
+    assert not segments.flags.writeable
+    assert np.array_equal(segments, expected)
+
+
+def test_iter_sequences():
+    segments = np.random.random((250, 8))
+    batches = list(putils.iter_sequences(segments, num_steps=20, batch_size=4))
+    assert [batch.shape for batch in batches] == [(4, 20, 8), (4, 20, 8), (4, 20, 8), (1, 20, 8)]
+
+    sequences = np.concatenate(batches).reshape(-1, 8)
+    assert np.array_equal(sequences[:250], segments)
+    assert np.all(sequences[250:] == 0)
+
+
+class FakeModel:
+    def predict_on_batch(self, batch):
+        # Chord of each step depends only on the center frame of the segment.
+        chord_pred = np.argmax(batch[:, :, 48:72], axis=-1)
+        return chord_pred, None, None, None
+
+
+def test_predict():
+    chroma = np.random.random((123, 24))
+    chord = putils.predict(chroma, FakeModel(), segment_width=5, num_steps=10, batch_size=3)
+    assert np.array_equal(chord, np.argmax(chroma, axis=1))
@@ -1,8 +1,41 @@
+import os
+
+import h5py
 import pytest
+import numpy as np
 
 from omnizart.drum import app
+from omnizart.drum.app import _parallel_feature_extraction_v2, _is_feature_complete
 
 
 @pytest.mark.parametrize("mode", [None, "Keras"])
 def test_load_model(mode):
     app._load_model(mode, custom_objects=app.custom_objects)
+
+
+def _fake_extract(wav_path, label_path, feat_settings):
+    length = len(os.path.basename(wav_path))
+    return np.ones((length, 4, 4)), np.arange(length), np.zeros((length, 128)), np.zeros((length, 13))
+
+
+def test_parallel_feature_extraction(mocker, tmp_path):
+    mocker.patch("omnizart.drum.app._all_in_one_extract", _fake_extract)
+    data_pair = [(f"song_{'x'*idx}.wav", f"song_{idx}.mid") for idx in range(5)]
+
+    # Simulate an interrupted extraction with a partially written file.
+    with h5py.File(tmp_path / "song_.hdf", "w") as out_f:
+        out_f.create_dataset("feature", data=np.zeros(3))
+    assert not _is_feature_complete(str(tmp_path / "song_.hdf"))
+
+    _parallel_feature_extraction_v2(data_pair, str(tmp_path), None, num_threads=2)
+    for wav_path, _ in data_pair:
+        hdf_path = str(tmp_path / wav_path.replace(".wav", ".hdf"))
+        assert _is_feature_complete(hdf_path)
+        with h5py.File(hdf_path, "r") as hdf:
+            assert hdf["feature"].shape == (len(wav_path), 4, 4)
+            assert len(hdf["mini_beat_arr"]) == len(wav_path)
+
+    # Completed files are skipped.
+    mocked_submit = mocker.patch("omnizart.drum.app.ProcessPoolExecutor.submit")
+    _parallel_feature_extraction_v2(data_pair, str(tmp_path), None, num_threads=2)
+    mocked_submit.assert_not_called()
@@ -2,7 +2,7 @@ import pickle
 
 import numpy as np
 
-from omnizart.drum.labels import extract_label_13_inst
+from omnizart.drum.labels import extract_label_13_inst, _mini_beat_range, INST_13_MAPPING
 
 
 def test_extract_label_13_inst():
@@ -12,3 +12,15 @@ def test_extract_label_13_inst():
 
     _, label_13 = extract_label_13_inst("tests/resource/drum_test_data.mid", m_beat_arr)
     assert np.array_equal(expected_label, label_13)
+
+
+def test_mini_beat_range():
+    m_beat_arr = np.array([1.0, 2.0, 3.0, 5.0])
+    assert np.array_equal(_mini_beat_range(m_beat_arr), [0.5, 1.5, 2.0, 3.0, 6.0])
+
+
+def test_inst_13_mapping():
+    assert INST_13_MAPPING.shape == (128, 13)
+    assert np.all(INST_13_MAPPING.sum(axis=0) >= 1)
+    assert np.all(INST_13_MAPPING.sum(axis=1) <= 1)
+    assert INST_13_MAPPING[36, 0] and INST_13_MAPPING[82, 12]
@@ -67,3 +67,34 @@ def test_merge_batches_value(shape, value):
     data.fill(value)
     result = putils.merge_batches(data)
     assert np.array_equiv(result, value)
+
+
+@pytest.mark.parametrize("shape,mini_beat_per_seg,batch_size", [
+    ((20, 13, 4), 6, 4),
+    ((51, 33, 7), 11, 5),
+    ((2, 30, 4), 7, 10)
+])
+def test_iter_batches(shape, mini_beat_per_seg, batch_size):
+    data = np.random.random(shape)
+    expected, pad_size = putils.create_batches(data, mini_beat_per_seg, b_size=batch_size)
+    expected = expected.reshape(-1, *expected.shape[2:])
+
+    batches = list(putils.iter_batches(data, mini_beat_per_seg, b_size=batch_size))
+    result = np.concatenate([batch for _, batch in batches])
+    assert [start_idx for start_idx, _ in batches] == list(range(0, len(result), batch_size))
+    assert not batches[0][1].flags.writeable
+    assert np.array_equal(result, expected[:len(expected) - pad_size])
+
+
+class FakeModel:
+    def predict_on_batch(self, batch):
+        # Prediction of each mini beat depends only on the feature of itself.
+        return batch[:, :3, 0, :, np.newaxis]
+
+
+@pytest.mark.parametrize("length,batch_size", [(60, 10), (57, 10), (4, 8)])
+def test_predict(length, batch_size):
+    data = np.random.random((length, 12, 10))
+    pred = putils.predict(data, FakeModel(), 8, batch_size=batch_size)
+    assert pred.shape == (max(length, 8), 3)
+    assert np.allclose(pred[:length], data[:, :3, 0])
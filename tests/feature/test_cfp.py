@@ -0,0 +1,24 @@
+import numpy as np
+
+from omnizart.feature import cfp
+
+
+def test_iter_patch_cfp():
+    patch_size, half_ps = 5, 2
+    Z = np.zeros((20, 30))
+    peaks = [(3, 0), (10, 0), (6, 7), (12, 7), (17, 7), (5, 29)]
+    for fidx, tidx in peaks:
+        Z[fidx, tidx] = fidx + tidx + 1
+    Z[1, 4] = 1  # Peak too close to the border.
+
+    batches = list(cfp.iter_patch_cfp(Z, patch_size=patch_size, batch_size=4, block_size=8))
+    assert [len(patches) for patches, _ in batches] == [4, 2]
+
+    patches = np.concatenate([batch[0] for batch in batches])
+    mapping = np.concatenate([batch[1] for batch in batches])
+    assert patches.dtype == np.float32
+    assert np.array_equal(mapping, np.array(peaks)[np.lexsort(np.array(peaks).T)])
+
+    pad_z = np.pad(Z, ((0, half_ps), (half_ps, half_ps)))
+    for patch, (fidx, tidx) in zip(patches, mapping.astype(int)):
+        assert np.array_equal(patch, pad_z[fidx - half_ps:fidx + half_ps + 1, tidx:tidx + patch_size])
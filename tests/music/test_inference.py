@@ -54,6 +54,19 @@ def test_down_sample():
         validate_down_sample(outs[:,:,idx], on_pitches[idx])
 
 
+def test_down_sample_float32_out():
+    preds = np.random.random((100, 352, 3)).astype(np.float32)
+    expected = np.dstack([inf.roll_down_sample(preds[:,:,idx]) for idx in range(3)])
+    outs = inf.down_sample(preds)
+    assert outs.dtype == np.float32
+    assert np.allclose(outs, expected)
+
+    buffer = np.zeros((100, 88, 3), dtype=np.float32)
+    outs = inf.down_sample(preds, out=buffer)
+    assert outs is buffer
+    assert np.allclose(buffer, expected)
+
+
 def test_find_occur():
     data = np.array([1, 1, 0, 0, 0, 1, 0, 1, 1, 1, 1, 1, 0, 1, 1, 1])
     expected = [{"onset": 0, "offset": 1}, {"onset": 7, "offset": 11}, {"onset": 13, "offset": 15}]
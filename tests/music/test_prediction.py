@@ -50,3 +50,44 @@ def test_create_batches(shape, b_size, timesteps, step_size):
     out = putils.create_batches(data, b_size=b_size, timesteps=timesteps, step_size=step_size)
     assert len(out) == num_batches
 
+
+
+def test_predict_on_tiles():
+    from omnizart.models.u_net import semantic_segmentation, to_variable_length, predict_on_tiles
+
+    model = semantic_segmentation(feature_num=64, timesteps=32, out_class=2, ch_num=2)
+    var_model = to_variable_length(model)
+    assert var_model.input_shape[1] is None
+
+    window = np.random.random((1, 32, 64, 2)).astype(np.float32)
+    assert np.allclose(model.predict(window), var_model.predict(window), atol=1e-5)
+
+    feat = np.random.random((50, 64, 2)).astype(np.float32)
+    pred = predict_on_tiles(feat, var_model, tile_size=64, context=0)
+    assert pred.shape == (50, 64, 2)
+
+    padded = np.pad(feat, ((0, 14), (0, 0), (0, 0)))
+    expected = var_model.predict(padded[np.newaxis])[0, :50]
+    assert np.allclose(pred, expected, atol=1e-5)
+
+    tiled = predict_on_tiles(feat, var_model, tile_size=16, context=16, batch_size=2)
+    assert tiled.shape == (50, 64, 2)
+
+
+def test_predict_on_tiles_matches_windowed_predict():
+    import tensorflow as tf
+    from scipy.special import expit
+    from omnizart.models.u_net import semantic_segmentation, to_variable_length, predict_on_tiles
+
+    np.random.seed(0)
+    tf.random.set_seed(0)
+    timesteps = 128
+    model = semantic_segmentation(feature_num=32, timesteps=timesteps, out_class=2, ch_num=2)
+    feat = np.random.random((6 * timesteps, 32, 2)).astype(np.float32)
+
+    expected = putils.predict(feat, model, batch_size=4, step_size=32)
+    tiled = expit(predict_on_tiles(feat, to_variable_length(model)))
+
+    # Compare away from both ends, where every frame is covered by all the overlapped windows.
+    end = min(len(expected), len(feat)) - timesteps
+    assert np.allclose(tiled[timesteps:end], expected[timesteps:end], atol=0.1)
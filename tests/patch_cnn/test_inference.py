@@ -0,0 +1,24 @@
+import pytest
+import numpy as np
+
+from omnizart.patch_cnn.inference import inference
+
+
+def test_inference():
+    # Columns: frequency index, time index.
+    mapping = np.array([[5, 2], [3, 0], [4, 2], [7, 0], [2, 3], [6, 1], [9, 4]], dtype=float)
+    pred = np.zeros((len(mapping), 2))
+    pred[:, 1] = [0.6, 0.9, 0.8, 0.7, 0.55, 0.3, 0.95]
+    zzz = np.zeros((10, 5))
+    zzz[5, 2] = zzz[7, 0] = 1
+    cenf = np.arange(10) * 100
+
+    contour = inference(pred, mapping, zzz, cenf, threshold=0.5, max_method="posterior")
+    assert np.array_equal(contour, [300, 0, 400, 200, 900, 0, 0, 0, 0, 0])
+
+    contour = inference(pred, mapping, zzz, cenf, threshold=0.5, max_method="prior")
+    assert np.array_equal(contour, [700, 0, 500, 200, 900, 0, 0, 0, 0, 0])
+
+    assert len(inference(pred, mapping, zzz, cenf, threshold=1)) == 0
+    with pytest.raises(ValueError):
+        inference(pred, mapping, zzz, cenf, max_method="unknown")
@@ -0,0 +1,20 @@
+import numpy as np
+
+from omnizart.feature.cfp import iter_patch_cfp
+from omnizart.patch_cnn.prediction import predict_patches
+
+
+class FakeModel:
+    def predict_on_batch(self, batch):  # pylint: disable=no-self-use
+        center = batch[:, 2, 2, 0]
+        return np.stack([1 - center, center], axis=1)
+
+
+def test_predict_patches():
+    Z = np.random.random((40, 100))
+    patch_batches = iter_patch_cfp(Z, patch_size=5, batch_size=16, block_size=30)
+    pred, mapping = predict_patches(FakeModel(), patch_batches)
+    assert len(pred) == len(mapping) > 16
+
+    fidx, tidx = mapping.astype(int).T
+    assert np.allclose(pred[:, 1], Z[fidx, tidx])
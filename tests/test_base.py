@@ -0,0 +1,32 @@
+import threading
+
+import pytest
+
+from omnizart.music import app as music_app
+
+
+def test_load_model_in_background(mocker):
+    started, release = threading.Event(), threading.Event()
+
+    def fake_load_model(model_path, custom_objects=None):
+        started.set()
+        release.wait(timeout=10)
+        return ("model", model_path, custom_objects)
+
+    mocker.patch("omnizart.base.tf.keras.models.load_model", side_effect=fake_load_model)
+    model_future, settings = music_app._load_model_in_background("Piano", custom_objects=music_app.custom_objects)
+    assert started.wait(timeout=10)
+    assert not model_future.done()
+
+    model_path, expected_settings = music_app._load_checkpoint_settings("Piano")
+    assert settings.to_json() == expected_settings.to_json()
+
+    release.set()
+    assert model_future.result() == ("model", model_path, music_app.custom_objects)
+
+
+def test_load_model_in_background_not_found(mocker):
+    mocker.patch("omnizart.base.tf.keras.models.load_model", side_effect=OSError)
+    model_future, _ = music_app._load_model_in_background("Piano")
+    with pytest.raises(FileNotFoundError):
+        model_future.result()
@@ -0,0 +1,54 @@
+import pytest
+import numpy as np
+
+from omnizart import cache
+from omnizart.music import app as music_app
+from omnizart.setting_loaders import MusicSettings
+
+
+def test_cache_save_load(tmp_path):
+    pred_cache = cache.PredictionCache(str(tmp_path))
+    pred = np.random.random((100, 352, 3))
+    beat_arr = np.arange(100) * 0.123456
+    pred_cache.save("abc", pred, beat_arr=beat_arr)
+
+    loaded = pred_cache.load("abc")
+    assert loaded["pred"].dtype == np.float32
+    assert np.allclose(loaded["pred"], pred, atol=1e-3)
+    assert np.array_equal(loaded["beat_arr"], beat_arr)
+
+    with pytest.raises(FileNotFoundError):
+        pred_cache.load("not-exist")
+
+
+def test_cache_key(tmp_path):
+    audio = tmp_path / "audio.wav"
+    audio.write_bytes(b"some audio content")
+    model_path = music_app._load_checkpoint_settings("Piano")[0]
+    settings = MusicSettings()
+    pred_cache = cache.PredictionCache(str(tmp_path))
+
+    key = pred_cache.key(str(audio), model_path, settings.feature)
+    assert key == pred_cache.key(str(audio), model_path, settings.feature)
+
+    settings.feature.hop_size = 0.01
+    assert key != pred_cache.key(str(audio), model_path, settings.feature)
+
+    audio.write_bytes(b"another audio content")
+    assert key != pred_cache.key(str(audio), model_path, MusicSettings().feature)
+
+
+def test_music_reinfer(tmp_path, mocker):
+    audio = tmp_path / "audio.wav"
+    audio.write_bytes(b"some audio content")
+    pred = np.random.random((50, 352, 3))
+    music_app._cache_prediction(str(tmp_path), str(audio), "Piano", MusicSettings(), pred)
+
+    mocked_infer = mocker.patch("omnizart.music.app.multi_inst_note_inference")
+    music_app.reinfer(str(audio), "Piano", output=None, cache_dir=str(tmp_path), onset_th=3.5)
+    kwargs = mocked_infer.call_args[1]
+    assert kwargs["onset_th"] == 3.5
+    assert np.allclose(mocked_infer.call_args[0][0], pred, atol=1e-3)
+
+    with pytest.raises(AttributeError):
+        music_app.reinfer(str(audio), "Piano", output=None, cache_dir=str(tmp_path), unknown_th=1)
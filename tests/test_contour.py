@@ -0,0 +1,63 @@
+import numpy as np
+from librosa import midi_to_hz
+from mir_eval import sonify
+from scipy.io import wavfile
+
+from omnizart import contour
+from omnizart import io
+from omnizart.constants.midi import LOWEST_MIDI_NOTE
+
+
+def test_decode_f0():
+    activation = np.zeros((5, 8))
+    activation[0, 3] = 0.5
+    activation[2, [1, 6]] = [0.2, 0.9]
+    activation[4, 0] = 1
+    hz_table = contour.bin_to_hz(8)
+
+    f0 = contour.decode_f0(activation, hz_table)
+    expected = [midi_to_hz(idx / 4 + LOWEST_MIDI_NOTE) if idx is not None else 0 for idx in [3, None, 6, None, 0]]
+    assert np.allclose(f0, expected)
+
+
+def test_f0_segments():
+    t_unit = 0.02
+    f0 = np.array([440, 440, 0, 0, 220, 220, 220, 330, 0, 110])
+    segments = contour.f0_segments(f0, t_unit)
+    assert segments.dtype == contour.F0_SEGMENT_DTYPE
+    assert np.allclose(segments["start_time"], [0, 0.08, 0.14, 0.18])
+    assert np.allclose(segments["end_time"], [0.04, 0.14, 0.16, 0.2])
+    assert np.allclose(segments["frequency"], [440, 220, 330, 110])
+    assert np.allclose(segments["pitch"], [69, 57, 64.01955, 45])
+
+    records = contour.to_records(segments)
+    assert records[1] == {"start_time": 0.08, "end_time": 0.14, "frequency": 220, "pitch": 57}
+    assert len(contour.f0_segments(np.zeros(10), t_unit)) == 0
+    assert len(contour.f0_segments(np.zeros(0), t_unit)) == 0
+
+
+def test_write_f0_segments(tmp_path):
+    segments = contour.f0_segments(np.array([0, 0, 440, 440, 0, 220]), 0.01)
+    output_path = str(tmp_path / "f0.csv")
+    io.write_agg_f0_results(segments, output_path)
+
+    loaded = np.genfromtxt(output_path, delimiter=",", names=True)
+    assert loaded.dtype.names == contour.F0_SEGMENT_DTYPE.names
+    for name in contour.F0_SEGMENT_DTYPE.names:
+        assert np.allclose(loaded[name], segments[name])
+
+
+def test_synthesize_contour(tmp_path):
+    t_unit, fs = 0.02, 8000
+    f0 = np.repeat([0, 220, 440, 0, 330], 20).astype(float)
+    expected = sonify.pitch_contour(np.arange(len(f0)) * t_unit, f0, fs, amplitudes=0.5 * (f0 > 0))
+
+    blocks = list(contour.synthesize_contour(f0, t_unit, fs, block_size=1000))
+    assert len(blocks) == int(np.ceil(len(expected) / 1000))
+    assert np.allclose(np.concatenate(blocks), expected, atol=1e-5)
+
+    output_path = str(tmp_path / "trans.wav")
+    contour.write_contour_wav(f0, t_unit, fs, output_path, block_size=1000)
+    sr, wav = wavfile.read(output_path)
+    assert sr == fs
+    assert np.allclose(wav / 32767, expected, atol=1e-4)
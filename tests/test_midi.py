@@ -0,0 +1,73 @@
+import io
+
+import numpy as np
+import pretty_midi
+
+from omnizart import midi as omidi
+from omnizart.beat.inference import inference as beat_inference, BEAT_TRACKS
+
+
+def generate_notes(num, tracks=3):
+    start = np.round(np.random.random(num) * 100, 3)
+    return omidi.note_array(
+        start=start,
+        end=start + np.random.random(num),
+        pitch=np.random.randint(0, 128, num),
+        velocity=np.random.randint(1, 128, num),
+        track=np.random.randint(0, tracks, num)
+    )
+
+
+def pretty_midi_bytes(midi):
+    buffer = io.BytesIO()
+    midi.write(buffer)
+    return buffer.getvalue()
+
+
+def test_note_array():
+    notes = omidi.note_array(start=[0, 1.5], end=[1, 2], pitch=60, is_drum=True)
+    assert notes.dtype == omidi.NOTE_DTYPE
+    assert len(notes) == 2
+    assert np.array_equal(notes["pitch"], [60, 60])
+    assert np.array_equal(notes["velocity"], [100, 100])
+    assert notes["is_drum"].all()
+
+
+def test_midi_bytes_same_as_pretty_midi():
+    notes = generate_notes(1000)
+    tracks = [("Piano", 0, False), ("Drums", 1, True), ("", 40, False)]
+    expected = pretty_midi_bytes(omidi.to_pretty_midi(notes, tracks=tracks))
+    assert omidi.midi_bytes(notes, tracks=tracks) == expected
+
+    empty = omidi.note_array(start=[], end=[], pitch=[])
+    assert omidi.midi_bytes(empty) == pretty_midi_bytes(pretty_midi.PrettyMIDI())
+
+
+def test_write_and_load_midi(tmp_path):
+    # Non-overlapping notes, since overlapped notes of the same pitch are ambiguous in MIDI.
+    start = np.arange(200) + np.round(np.random.random(200) * 0.5, 3)
+    notes = omidi.note_array(
+        start=start,
+        end=start + 0.1 + np.random.random(200) * 0.3,
+        pitch=np.random.randint(0, 128, 200),
+        velocity=np.random.randint(1, 128, 200),
+        track=np.arange(200) % 2
+    )
+    notes["is_drum"] = notes["track"] == 1
+    out_path = str(tmp_path / "out.mid")
+    omidi.write_midi(notes, out_path)
+
+    loaded, tracks = omidi.from_pretty_midi(pretty_midi.PrettyMIDI(out_path))
+    assert tracks == [("", 0, False), ("", 0, True)]
+    for track_idx in range(2):
+        expected = notes[notes["track"] == track_idx]
+        loaded_notes = loaded[loaded["track"] == track_idx]
+        assert len(loaded_notes) == len(expected)
+        assert np.allclose(np.sort(loaded_notes["start"]), np.sort(expected["start"]), atol=0.01)
+
+
+def test_inference_as_array():
+    pred = np.random.random((300, 2))
+    midi = beat_inference(pred, t_unit=0.01)
+    notes = beat_inference(pred, t_unit=0.01, as_array=True)
+    assert pretty_midi_bytes(midi) == omidi.midi_bytes(notes, tracks=BEAT_TRACKS)
@@ -0,0 +1,114 @@
+import pytest
+import numpy as np
+import pretty_midi
+
+from omnizart import sweep
+from omnizart.music import app as music_app
+from omnizart.music.inference import multi_inst_note_inference
+from omnizart.drum.inference import inference as drum_inference
+from omnizart.beat import app as beat_app
+from omnizart.beat.inference import inference as beat_inference
+from omnizart.setting_loaders import MusicSettings, DrumSettings, BeatSettings
+
+
+def test_expand_grid():
+    cells = sweep.expand_grid({"a": [1, 2], "b": [3, 4, 5]}, defaults={"a": 0, "c": 6})
+    assert len(cells) == 6
+    assert cells[0] == {"a": 1, "b": 3, "c": 6}
+    assert cells[-1] == {"a": 2, "b": 5, "c": 6}
+
+
+def test_music_sweeper_consistency():
+    settings = MusicSettings()
+    settings.training.label_type = "note-stream"
+    settings.feature.hop_size = 0.02
+    pred = np.random.random((200, 352, 13)) ** 3
+
+    sweeper = sweep.MusicSweeper(settings)
+    cells = sweep.expand_grid({"onset_th": [3, 5], "inst_th": [0.01, 1.1]}, sweeper.defaults)
+    for cell, notes in zip(cells, sweeper.infer({"pred": pred}, cells)):
+        midi = multi_inst_note_inference(
+            pred,
+            mode="note-stream",
+            onset_th=cell["onset_th"],
+            dura_th=cell["dura_th"],
+            frm_th=cell["frame_th"],
+            inst_th=cell["inst_th"],
+            t_unit=0.02
+        )
+        expected = sorted((nn.start, nn.pitch) for inst in midi.instruments for nn in inst.notes)
+        assert np.allclose(sorted(zip(notes[:, 0], notes[:, 2])), expected)
+
+
+def test_drum_sweeper_consistency():
+    settings = DrumSettings()
+    pred = np.random.random((300, 13))
+    m_beat_arr = np.arange(300) * 0.03
+    cached = {"pred": pred, "mini_beat_arr": m_beat_arr}
+
+    sweeper = sweep.DrumSweeper(settings)
+    cells = sweep.expand_grid({"bass_drum_th": [0.5, 1], "hihat_th": [0.1, 0.7]}, sweeper.defaults)
+    for cell, onsets in zip(cells, sweeper.infer(cached, cells)):
+        midi = drum_inference(pred, m_beat_arr, **cell)
+        for pitch, inst_onsets in zip([35, 38, 42], onsets):
+            expected = [nn.start for nn in midi.instruments[0].notes if nn.pitch == pitch]
+            assert np.allclose(inst_onsets, expected)
+
+
+def test_beat_sweep(tmp_path):
+    settings = BeatSettings()
+    t_unit = settings.feature.time_unit
+    pred = np.zeros((1200, 2))
+    pred[100::100, 0] = 0.9
+    pred[100::400, 1] = 0.7
+    pred[150::100, 0] = 0.4
+
+    sweeper = sweep.BeatSweeper(settings)
+    cells = sweep.expand_grid({"beat_threshold": [0.3, 0.5], "min_distance": [0.3, 0.5]}, sweeper.defaults)
+    for cell, (beats, down_beats) in zip(cells, sweeper.infer({"pred": pred}, cells)):
+        midi = beat_inference(
+            pred,
+            beat_th=cell["beat_threshold"],
+            down_beat_th=cell["down_beat_threshold"],
+            min_dist=cell["min_distance"],
+            t_unit=t_unit
+        )
+        assert np.allclose(beats, [nn.start for nn in midi.instruments[0].notes])
+        assert np.allclose(down_beats, [nn.start for nn in midi.instruments[1].notes])
+
+    midi_path = str(tmp_path / "input.mid")
+    pretty_midi.PrettyMIDI().write(midi_path)
+    beat_app._cache_prediction(str(tmp_path), midi_path, None, settings, pred)  # pylint: disable=W0212
+
+    ref_path = tmp_path / "ref.beats"
+    ref_path.write_text("\n".join(f"{pos * t_unit} {1 if pos % 400 == 100 else 2}" for pos in range(100, 1200, 100)))
+
+    out_csv = str(tmp_path / "sweep.csv")
+    table, best = sweep.sweep(
+        beat_app,
+        [(midi_path, str(ref_path))],
+        {"beat_threshold": [0.3, 0.5, 0.95]},
+        cache_dir=str(tmp_path),
+        num_workers=2,
+        output=out_csv
+    )
+    assert len(table) == 3
+    assert best["beat_threshold"] == 0.5
+    assert best["f_measure"] == 1
+    assert table[2]["beat_f_measure"] == 0
+    with open(out_csv) as csv_file:
+        assert len(csv_file.readlines()) == 4
+
+
+def test_sweep_unknown_setting(tmp_path):
+    data_pairs = [("song.wav", "song.mid")]
+    try:
+        sweep.sweep(music_app, data_pairs, {"unknown_th": [1]}, model_path="Piano", cache_dir=str(tmp_path))
+    except AttributeError:
+        return
+    assert False
+
+
+def test_sweep_empty_data_pairs(tmp_path):
+    with pytest.raises(ValueError):
+        sweep.sweep(music_app, [], {"onset_th": [1]}, model_path="Piano", cache_dir=str(tmp_path))
@@ -210,3 +210,19 @@ def test_aggregate_f0_info():
         io.write_agg_f0_results(results, output_path)
 
     os.remove(output_path)
+
+
+def test_prefetch_generator():
+    assert list(utils.prefetch_generator(iter(range(10)), buffer_size=3)) == list(range(10))
+
+    def _failing_gen():
+        yield 1
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        list(utils.prefetch_generator(_failing_gen()))
+
+    # Stop consuming early
+    gen = utils.prefetch_generator(iter(range(100)), buffer_size=2)
+    assert next(gen) == 0
+    gen.close()
@@ -1,13 +1,26 @@
 import os
 
 import pytest
+import numpy as np
 import tensorflow as tf
 
 from omnizart import MODULE_PATH
 from omnizart.vocal import app
+from omnizart.vocal.app import separate_vocal
 
 
 @pytest.mark.parametrize("mode", [None, "Semi"])
 def test_load_model(mode):
     app._load_model(mode)
 
+
+def test_separate_vocal(mocker):
+    waveform = np.random.random((44100, 2)).astype(np.float32)
+    mocked_separator = mocker.patch("omnizart.vocal.app.Separator")
+    mocked_separator.return_value.separate.return_value = {"vocals": waveform, "accompaniment": waveform}
+    mocker.patch("omnizart.vocal.app._SEPARATOR", None)
+
+    for _ in range(2):
+        vocal = separate_vocal(waveform)
+        assert np.allclose(vocal, waveform.mean(axis=1))
+    mocked_separator.assert_called_once()
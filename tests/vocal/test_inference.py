@@ -0,0 +1,54 @@
+import numpy as np
+
+from omnizart.contour import f0_segments, to_records
+from omnizart.vocal import inference as inf
+
+
+def test_conv():
+    seq = np.array([1, 2, 3, 4, 5, 6], dtype=float)
+    window = np.array([0.25, 0.5, 1.0, 0.5, 0.25])
+    expected = [1, 2, 3, 4, 5, 6]
+    assert np.allclose(inf._conv(seq, window), expected)
+
+    seq = np.array([0, 0, 1, 0, 0, 0, 0])
+    assert np.allclose(inf._conv(seq, window), [0, 0, 0.4, 0.2, 0.1, 0, 0])
+
+
+def test_find_peaks():
+    seq = np.array([0, 0, 0.9, 0.3, 0.6, 0.6, 0, 0.2, 0.8, 0, 0.7, 0.1, 0])
+    assert inf._find_peaks(seq, ctx_len=1, threshold=0.5).tolist() == [2, 4, 8, 10]
+    assert inf._find_peaks(seq, ctx_len=2, threshold=0.5).tolist() == [2, 8]
+    assert len(inf._find_peaks(seq[:5], ctx_len=2)) == 0
+
+
+def test_find_first_bellow_th():
+    assert inf._find_first_bellow_th(np.array([0.1, 0.6, 0.7, 0.2, 0.9])) == 3
+    assert inf._find_first_bellow_th(np.array([0.1, 0.6, 0.7])) == 0
+    assert inf._find_first_bellow_th(np.array([0.1, 0.2])) == 0
+
+
+def test_infer_interval():
+    pred = np.zeros((40, 6))
+    pred[5:30, 0] = 1
+    pred[5, 2] = 1
+    pred[20, 2] = 1
+    pred[15, 4] = 1
+    interval = inf.infer_interval(pred, min_dura=0.1, t_unit=0.02)
+    assert np.allclose(interval, [[0.1, 0.3], [0.4, 0.6]])
+
+
+def test_infer_notes():
+    f0 = np.zeros(200)
+    f0[10:50] = 440
+    f0[60:61] = 220
+    agg_f0 = f0_segments(f0, t_unit=0.02)
+    interval = np.array([[0.2, 1.0], [1.2, 1.4], [1.5, 2.0]])
+
+    notes = inf.infer_notes(interval, agg_f0, t_unit=0.02)
+    assert notes["pitch"].tolist() == [69, 77, 77]
+    assert notes["is_drum"].tolist() == [False, True, True]
+    assert np.allclose(notes["start"], [0.2, 1.2, 1.5])
+
+    records = inf.infer_midi(interval, to_records(agg_f0), t_unit=0.02, as_array=True)
+    assert np.array_equal(records, notes)
+    assert len(inf.infer_notes(None, agg_f0, t_unit=0.02)) == 0
@@ -0,0 +1,33 @@
+import numpy as np
+
+from omnizart.vocal import prediction as pred
+
+
+class FakeModel:
+    def predict(self, batch):
+        # Output of each frame depends only on the input frame itself.
+        return np.stack([batch[..., 0, 0], batch[..., 1, 1] * 2], axis=-1)
+
+
+def test_iter_batches():
+    feature = np.random.random((37, 174, 9))
+    batches = list(pred.iter_batches(feature, ctx_len=2, batch_size=16))
+    assert [start for start, _ in batches] == [0, 16, 32]
+    assert [len(batch) for _, batch in batches] == [16, 16, 5]
+
+    _, batch = batches[1]
+    assert batch.shape == (16, 5, 174, 9)
+    assert not batch.flags.writeable
+    assert np.allclose(batch[3], feature[17:22])
+
+    _, batch = batches[0]
+    assert np.all(batch[0, :2] == 0)
+    assert np.allclose(batch[0, 2:], feature[:3])
+
+
+def test_predict():
+    feature = np.random.random((50, 174, 9)).astype(np.float32)
+    output = pred.predict(feature, FakeModel(), ctx_len=3, batch_size=16)
+    assert output.shape == (50, 2)
+    assert np.allclose(output[:, 0], feature[:, 0, 0])
+    assert np.allclose(output[:, 1], feature[:, 1, 1] * 2)
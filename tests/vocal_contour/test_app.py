@@ -1,8 +1,29 @@
 import pytest
+import numpy as np
 
 from omnizart.vocal_contour import app
+from omnizart.vocal_contour.inference import inference
+from omnizart.setting_loaders import VocalContourSettings
+from tests.vocal_contour.test_inference import FakeModel
 
 
 @pytest.mark.parametrize("mode", [None, "VocalContour"])
 def test_load_model(mode):
     app._load_model(mode, custom_objects=app.custom_objects)
+
+
+def test_predict_f0(mocker):
+    z = np.zeros((60, 100))
+    z[np.arange(100) % 60, np.arange(100)] = 1
+    mocked_cfp = mocker.patch("omnizart.vocal_contour.app._extract_cfp", return_value=(z, None, None, None, None))
+    model = FakeModel(timestep=32)
+    settings = VocalContourSettings()
+    settings.training.timesteps = 32
+
+    waveform = np.zeros(16000)
+    feature = app.extract_f0_feature(waveform, 16000, settings)
+    assert mocked_cfp.call_args[0][0] is waveform
+    assert np.array_equal(feature, z.T)
+
+    f0 = app.predict_f0(feature, model, settings, hop_size=16)
+    assert np.allclose(f0, inference(z.T, model, timestep=32, feature_num=384, hop_size=16))
@@ -0,0 +1,32 @@
+import pytest
+import numpy as np
+from librosa import midi_to_hz
+
+from omnizart.constants.midi import LOWEST_MIDI_NOTE
+from omnizart.vocal_contour.inference import inference
+
+
+class FakeModel:
+    """Frame-wise model, which outputs the same value for a frame regardless of the window position."""
+    def __init__(self, timestep):
+        self.input_shape = (None, timestep, 64, 1)
+
+    def predict(self, batch, batch_size=None):  # pylint: disable=unused-argument
+        return np.concatenate([-batch, batch], axis=3)
+
+
+@pytest.mark.parametrize("hop_size", [1, 8, None, 32])
+def test_inference_hop_size(hop_size):
+    feature = np.zeros((100, 60))
+    pitch_idx = np.random.randint(0, 60, size=100)
+    feature[np.arange(100), pitch_idx] = 1
+    feature[::10] = 0
+
+    model = FakeModel(timestep=32)
+    f0 = inference(feature, model, timestep=32, batch_size=4, feature_num=64, hop_size=hop_size)
+    expected = inference(feature, model, timestep=32, batch_size=100, feature_num=64, hop_size=1)
+    assert f0.shape == (100,)
+    assert np.allclose(f0, expected)
+    voiced = np.arange(100) % 10 != 0
+    assert np.all(f0[~voiced] == 0)
+    assert np.allclose(f0[voiced], midi_to_hz(pitch_idx[voiced] / 4 + LOWEST_MIDI_NOTE))